@@ -2,6 +2,8 @@
 ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests resolve against ``app.urls_async``, which serves API reads from
+worker threads, see core.async_views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,7 +11,7 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
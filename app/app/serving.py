@@ -0,0 +1,68 @@
+"""
+Production server entry points.
+
+WSGI, with gunicorn reading gunicorn.conf.py from this directory:
+
+    gunicorn app.wsgi
+
+ASGI, with uvicorn:
+
+    python -m app.serving
+
+Both run WEB_CONCURRENCY worker processes. A process only runs Python on
+one CPU at a time, so its threads, WSGI_THREADS for WSGI and
+ASYNC_VIEW_THREADS for ASGI, overlap requests waiting on the database,
+and the processes use the CPUs. Every thread holds its own database
+connection, or a process shares DB_POOL_MAX_SIZE + DB_POOL_MAX_OVERFLOW
+when pooled; size the database's max_connections for all of them.
+"""
+import os
+
+
+def cpu_count():
+    """Return the number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS
+        return os.cpu_count() or 1
+
+
+def wsgi_workers(environ=os.environ):
+    """Return the number of WSGI worker processes to run.
+
+    One more than the CPUs, keeping them busy while a worker restarts
+    after GUNICORN_MAX_REQUESTS.
+    """
+    return max(1, int(environ.get('WEB_CONCURRENCY') or cpu_count() + 1))
+
+
+def wsgi_threads(environ=os.environ):
+    """Return the number of request threads per WSGI worker."""
+    return max(1, int(environ.get('WSGI_THREADS') or 4))
+
+
+def asgi_workers(environ=os.environ):
+    """Return the number of ASGI worker processes to run."""
+    return max(1, int(environ.get('WEB_CONCURRENCY') or cpu_count()))
+
+
+def main():
+    """Serve app.asgi with uvicorn."""
+    import uvicorn
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    uvicorn.run(
+        'app.asgi:application',
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', 8000)),
+        workers=asgi_workers(),
+        # Django 3.2 does not implement the lifespan protocol
+        lifespan='off',
+        proxy_headers=True,
+        timeout_keep_alive=int(os.environ.get('KEEP_ALIVE', 5)),
+        limit_concurrency=int(os.environ.get('MAX_CONCURRENCY', 0)) or None,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.instrumentation.InstrumentationMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +65,16 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'app.urls'
 
+# URLs served by app.asgi, with async API reads, see core.async_views.
+ASGI_URLCONF = 'app.urls_async'
+
+# Worker threads per ASGI process running safe requests, each holding its
+# own database connection.
+ASYNC_VIEW_THREADS = int(os.environ.get(
+    'ASYNC_VIEW_THREADS',
+    min(32, (os.cpu_count() or 1) + 4),
+))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -83,16 +97,85 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_POOL_MAX_SIZE enables the in-process connection pool of
+# core.db.backends.postgresql; connections then return to the pool after
+# each request instead of persisting for DB_CONN_MAX_AGE seconds.
+DB_POOL = {
+    'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 0)),
+    'MAX_OVERFLOW': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 0)),
+    'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': 0 if DB_POOL['MAX_SIZE'] else int(
+            os.environ.get('DB_CONN_MAX_AGE', 60),
+        ),
+        'HEALTH_CHECKS': os.environ.get('DB_HEALTH_CHECKS', '1') == '1',
+        'POOL': DB_POOL if DB_POOL['MAX_SIZE'] else None,
+    }
+}
+
+# Read replicas, one alias per host in DB_REPLICA_HOSTS, see
+# core.db.routers.ReplicaRouter. After a write a user reads from the
+# primary for REPLICA_PIN_SECONDS, tracked in the REPLICA_PIN_CACHE cache
+# which must be shared between workers: with DB_REPLICA_HOSTS set, a
+# LocMemCache or DummyCache there fails the core.E002 system check, since
+# pins would only reach the worker that served the write. Replicas
+# lagging more than REPLICA_MAX_LAG seconds are skipped.
+REPLICA_DATABASES = []
+for number, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')),
+    start=1,
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_CACHE = os.environ.get('REPLICA_PIN_CACHE', 'default')
+REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))
+REPLICA_LAG_CHECK_INTERVAL = 5
+
+
+# Password hashing, see core.hashers. ALGORITHM (scrypt, pbkdf2, argon2
+# or bcrypt, the last two needing argon2-cffi or bcrypt) hashes new
+# passwords; the others only verify old hashes, which are rehashed on
+# login, as are those hashed with other cost parameters.
+PASSWORD_HASHING = {
+    'ALGORITHM': os.environ.get('PASSWORD_HASHER', 'scrypt'),
+    'PBKDF2_ITERATIONS': int(os.environ.get(
+        'PASSWORD_PBKDF2_ITERATIONS',
+        260000,
+    )),
+    'SCRYPT_N': int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 14)),
+    'SCRYPT_R': int(os.environ.get('PASSWORD_SCRYPT_R', 8)),
+    'SCRYPT_P': int(os.environ.get('PASSWORD_SCRYPT_P', 1)),
 }
 
+_PASSWORD_HASHERS = {
+    'scrypt': 'core.hashers.ScryptPasswordHasher',
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHING['ALGORITHM']],
+    *(
+        hasher for name, hasher in _PASSWORD_HASHERS.items()
+        if name != PASSWORD_HASHING['ALGORITHM']
+    ),
+]
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -139,6 +222,151 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Token authentication cache, see core.authentication.TokenCache.
+# CACHE_ALIAS names an entry of CACHES shared between workers; leave unset
+# to only use the per-process LRU, which is only safe with one process: a
+# token revoked in one worker would keep authenticating in the others for
+# up to TTL seconds.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_MAX_SIZE', 10000)),
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60)),
+    'CACHE_ALIAS': os.environ.get('TOKEN_AUTH_CACHE_ALIAS'),
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared in production, e.g. RESPONSE_CACHE_BACKEND=django.core.cache.
+    # backends.memcached.PyMemcacheCache with RESPONSE_CACHE_LOCATION and
+    # RESPONSE_CACHE_OPTIONS='{}'.
+    'responses': {
+        'BACKEND': os.environ.get(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'responses'),
+        'OPTIONS': json.loads(os.environ.get(
+            'RESPONSE_CACHE_OPTIONS',
+            '{"MAX_ENTRIES": 5000}',
+        )),
+    },
+}
+
+# Recipe API response cache, see recipe.caching.ResponseCache.
+RESPONSE_CACHE = {
+    'ENABLED': os.environ.get('RESPONSE_CACHE_ENABLED', '1') == '1',
+    'CACHE_ALIAS': 'responses',
+    'TTL': int(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+}
+
+# Per-recipe representations, see recipe.caching.FragmentCache.
+FRAGMENT_CACHE = {
+    'ENABLED': os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1',
+    'CACHE_ALIAS': 'responses',
+    'TTL': int(os.environ.get('FRAGMENT_CACHE_TTL', 3600)),
+}
+
+# Response compression, see core.middleware.CompressionMiddleware. CODECS
+# lists codings in order of preference; br needs the brotli package.
+# HTML is left out as the browsable API embeds CSRF tokens (BREACH).
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024)),
+    'CODECS': ['br', 'gzip'],
+    'LEVELS': {
+        'br': int(os.environ.get('RESPONSE_COMPRESSION_BR_LEVEL', 4)),
+        'gzip': int(os.environ.get('RESPONSE_COMPRESSION_GZIP_LEVEL', 6)),
+    },
+    'CONTENT_TYPES': [
+        'application/json',
+        'application/vnd.oai.openapi',
+        'application/vnd.oai.openapi+json',
+        'application/x-ndjson',
+        'text/csv',
+    ],
+}
+
+# Per-request SQL, serialization and render timing, see
+# core.instrumentation. SAMPLE_RATE is the fraction of requests timed;
+# CI runs the tests with REQUEST_INSTRUMENTATION_SAMPLE_RATE=0 so sampled
+# timing lines stay out of their output.
+REQUEST_INSTRUMENTATION = {
+    'SAMPLE_RATE': float(os.environ.get(
+        'REQUEST_INSTRUMENTATION_SAMPLE_RATE',
+        0.01,
+    )),
+    'SERVER_TIMING': True,
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+
+# Queries taking THRESHOLD_MS or more are logged as JSON lines to
+# LOG_FILE, or stderr, with the EXPLAIN plan of a SAMPLE_RATE fraction of
+# them; see core.slow_queries and `manage.py slow_queries`.
+SLOW_QUERIES = {
+    'THRESHOLD_MS': float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200)),
+    'SAMPLE_RATE': float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', 0.1)),
+    'LOG_FILE': os.environ.get('SLOW_QUERY_LOG'),
+}
+
+# Metrics served at /metrics, see core.metrics. Workers of one server
+# share MULTIPROCESS_DIR, a directory private to it, e.g. on /dev/shm,
+# to expose their sum. Scrapers send TOKEN, if set, as a bearer token,
+# or else connect from one of ALLOWED_IPS (comma separated in
+# METRICS_ALLOWED_IPS); with neither, /metrics is a 404 unless DEBUG.
+METRICS = {
+    'MULTIPROCESS_DIR': os.environ.get('METRICS_MULTIPROCESS_DIR'),
+    'WRITE_INTERVAL': 5,
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+    'ALLOWED_IPS': list(filter(None, (
+        ip.strip()
+        for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',')
+    ))),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'metrics': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+        'slow_queries': {
+            'formatter': 'message',
+            **({
+                'class': 'logging.handlers.WatchedFileHandler',
+                'filename': SLOW_QUERIES['LOG_FILE'],
+            } if SLOW_QUERIES['LOG_FILE'] else {
+                'class': 'logging.StreamHandler',
+            }),
+        },
+    },
+    'loggers': {
+        'core.instrumentation': {
+            'handlers': ['metrics'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
\ No newline at end of file
@@ -0,0 +1,10 @@
+"""
+URL configuration for ASGI, see core.asgi.AsyncViewsASGIHandler.
+
+The same URLs as app.urls, with the recipe, tag and ingredient reads and
+token logins as async views.
+"""
+from app.urls import urlpatterns as sync_urlpatterns
+from core.async_views import async_patterns
+
+urlpatterns = async_patterns(sync_urlpatterns)
@@ -4,3 +4,7 @@ from django.apps import AppConfig   # noqa
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        """Connect signal handlers and register system checks."""
+        from core import checks, instrumentation, metrics, signals  # noqa
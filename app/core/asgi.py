@@ -0,0 +1,68 @@
+"""
+ASGI handler serving the API with async read views.
+"""
+import django
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+
+# marks the end of a streaming response's iterator
+_DONE = object()
+
+
+class AsyncViewsASGIHandler(ASGIHandler):
+    """ASGIHandler resolving requests against settings.ASGI_URLCONF.
+
+    Also iterates streaming responses off the event loop: Django 3.2
+    consumes them on the loop, where the queries of e.g. the recipe
+    export raise SynchronousOnlyOperation.
+    """
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        urlconf = getattr(settings, 'ASGI_URLCONF', None)
+        if request is not None and urlconf:
+            request.urlconf = urlconf
+        return request, error_response
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            headers.append((
+                b'Set-Cookie',
+                cookie.output(header='').encode('ascii').strip(),
+            ))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+
+        # one thread for the whole iterator, e.g. for server side cursors
+        chunks = iter(response)
+        next_chunk = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await next_chunk(chunks, _DONE)
+            if part is _DONE:
+                break
+            for chunk, _last in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+    """Like django.core.asgi.get_asgi_application with async views."""
+    django.setup(set_prefix=False)
+    return AsyncViewsASGIHandler()
@@ -0,0 +1,153 @@
+"""
+Async views for serving API reads over ASGI.
+
+Django 3.2 has no async ORM. Under ASGI it runs sync views on a single
+thread shared by the whole process, so concurrent requests queue behind
+each other's queries. `async_view` runs safe requests on a pool of
+ASYNC_VIEW_THREADS worker threads instead, each with its own database
+connections; unsafe requests keep Django's single thread path, except
+for views whose class sets `async_offload`, e.g. token logins, which
+spend their time hashing passwords with the GIL released.
+"""
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connections
+from django.dispatch import receiver
+from django.urls import URLPattern, URLResolver
+
+from core.instrumentation import timer
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# actions of the GET routes served from worker threads
+READ_ACTIONS = ('list', 'retrieve')
+
+# (executor, number of threads) once started
+_executor = None
+
+
+def get_view_executor():
+    """Return the executor running safe and offloaded requests."""
+    global _executor
+    if _executor is None:
+        threads = settings.ASYNC_VIEW_THREADS
+        _executor = (
+            ThreadPoolExecutor(
+                max_workers=threads,
+                thread_name_prefix='async-view',
+            ),
+            threads,
+        )
+    return _executor[0]
+
+
+def shutdown_view_executor():
+    """Close the worker threads' connections and stop the threads."""
+    global _executor
+    if _executor is None:
+        return
+    (executor, threads), _executor = _executor, None
+    # every thread blocks at the barrier, so each runs one close_all
+    barrier = threading.Barrier(threads)
+
+    def close():
+        barrier.wait()
+        connections.close_all()
+
+    for _thread in range(threads):
+        executor.submit(close)
+    executor.shutdown(wait=True)
+
+
+@receiver(setting_changed)
+def _reset_executor(setting, **kwargs):
+    if setting == 'ASYNC_VIEW_THREADS':
+        shutdown_view_executor()
+
+
+def _call_in_worker(view, request, *args, **kwargs):
+    """Run view on a worker thread and render its response.
+
+    Workers keep their connections between requests, so they are
+    checked like request_started and request_finished do for Django's
+    own thread. Rendering here keeps serialization off that thread too.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if not response.streaming and callable(
+            getattr(response, 'render', None),
+        ):
+            with timer('render'):
+                response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def is_offloaded(callback):
+    """Return whether every request to callback runs on the workers."""
+    return getattr(getattr(callback, 'cls', None), 'async_offload', False)
+
+
+def async_view(view):
+    """Return an async version of a sync view for ASGI.
+
+    Attributes of view, e.g. `csrf_exempt` and DRF's `cls` and
+    `actions`, are kept.
+    """
+    thread_sensitive = sync_to_async(view, thread_sensitive=True)
+    offload_unsafe = is_offloaded(view)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS and not offload_unsafe:
+            return await thread_sensitive(request, *args, **kwargs)
+        offloaded = sync_to_async(
+            _call_in_worker,
+            thread_sensitive=False,
+            executor=get_view_executor(),
+        )
+        return await offloaded(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+def is_read_view(callback):
+    """Return whether callback is a viewset route with a read action."""
+    actions = getattr(callback, 'actions', None) or {}
+    return actions.get('get') in READ_ACTIONS
+
+
+def is_async_view(callback):
+    """Return whether callback is a read or offloaded view."""
+    return is_read_view(callback) or is_offloaded(callback)
+
+
+def async_patterns(patterns, predicate=is_async_view):
+    """Return a copy of patterns with async views where predicate holds."""
+    copied = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                async_patterns(pattern.url_patterns, predicate),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            )
+        elif predicate(pattern.callback):
+            pattern = URLPattern(
+                pattern.pattern,
+                async_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        copied.append(pattern)
+    return copied
@@ -0,0 +1,168 @@
+"""
+Token authentication with a cache in front of the token lookup.
+"""
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """Map token keys to their (user, token) pair.
+
+    Entries live in the Django cache `cache_alias` names, when set, and
+    otherwise in a bounded in-process LRU; both honour `ttl`. Lookups go
+    to the shared backend alone, without a local copy, so a token revoked
+    in one process stops authenticating in every other one at once. The
+    LRU is only invalidated in its own process: run a single process
+    without `cache_alias`.
+    """
+
+    key_prefix = 'auth-token:'
+
+    def __init__(self, max_size=10000, ttl=60, cache_alias=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ['hits', 'shared_hits', 'misses', 'evictions', 'invalidations'],
+            0,
+        )
+
+    @property
+    def shared(self):
+        """Return the shared cache backend or None."""
+        if self.cache_alias:
+            return caches[self.cache_alias]
+        return None
+
+    def _cache_key(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.key_prefix + digest
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        """Return the cached (user, token) for key or None."""
+        cache_key = self._cache_key(key)
+        shared = self.shared
+        if shared is not None:
+            payload = shared.get(cache_key)
+            if payload is None:
+                self._count('misses')
+                return None
+            self._count('shared_hits')
+            return pickle.loads(payload)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[cache_key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self._stats['hits'] += 1
+        # unpickle per request so concurrent requests never share a user
+        if entry is not None:
+            return pickle.loads(entry[0])
+
+        self._count('misses')
+        return None
+
+    def _store_local(self, cache_key, payload):
+        with self._lock:
+            self._entries[cache_key] = (payload, time.monotonic() + self.ttl)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def set(self, key, user, token):
+        """Cache the (user, token) pair for key."""
+        cache_key = self._cache_key(key)
+        payload = pickle.dumps((user, token), pickle.HIGHEST_PROTOCOL)
+        shared = self.shared
+        if shared is not None:
+            shared.set(cache_key, payload, self.ttl)
+        else:
+            self._store_local(cache_key, payload)
+
+    def invalidate(self, *keys):
+        """Drop cached entries for the given token keys."""
+        cache_keys = [self._cache_key(key) for key in keys]
+        with self._lock:
+            for cache_key in cache_keys:
+                self._entries.pop(cache_key, None)
+            self._stats['invalidations'] += len(cache_keys)
+        shared = self.shared
+        if shared is not None and cache_keys:
+            shared.delete_many(cache_keys)
+
+    def clear(self):
+        """Drop every locally cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current local size."""
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries))
+        lookups = stats['hits'] + stats['shared_hits'] + stats['misses']
+        hits = stats['hits'] + stats['shared_hits']
+        stats['hit_rate'] = hits / lookups if lookups else 0.0
+        return stats
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    """Return the process wide token cache built from settings."""
+    global _token_cache
+    if _token_cache is None:
+        options = getattr(settings, 'TOKEN_AUTH_CACHE', {})
+        _token_cache = TokenCache(
+            max_size=options.get('MAX_SIZE', 10000),
+            ttl=options.get('TTL', 60),
+            cache_alias=options.get('CACHE_ALIAS'),
+        )
+    return _token_cache
+
+
+@receiver(setting_changed)
+def _reset_token_cache(setting, **kwargs):
+    """Rebuild the token cache when its settings change in tests."""
+    global _token_cache
+    if setting == 'TOKEN_AUTH_CACHE':
+        _token_cache = None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the database for known tokens.
+
+    Failed lookups are never cached, so invalid and inactive tokens keep
+    hitting the database and raising as before.
+    """
+
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
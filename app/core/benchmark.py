@@ -0,0 +1,365 @@
+"""
+API benchmark: data generation, scenarios and baseline comparison.
+
+`generate` bulk inserts users with recipes, tags and ingredients in a
+few queries per table. `run_in_process` drives the API through Django's
+test client, counting queries and allocations; `run_over_http` drives a
+running server. Both return {scenario: metrics} for `compare`.
+"""
+import json
+import random
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.authtoken.models import Token
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.versioning import data_changed
+
+EMAIL_DOMAIN = 'bench.example.com'
+PASSWORD = 'bench-pass-123'
+
+WORDS = [
+    'roast', 'chicken', 'lemon', 'garlic', 'soup', 'tomato', 'basil',
+    'curry', 'coconut', 'rice', 'noodle', 'salad', 'spicy', 'bean',
+    'mushroom', 'risotto', 'pie', 'apple', 'chocolate', 'cake', 'pasta',
+    'pesto', 'grilled', 'salmon', 'ginger', 'honey', 'stew', 'lentil',
+]
+
+
+@dataclass
+class Scenario:
+    """A request issued repeatedly by the benchmark.
+
+    `path` and `body` are formatted with the ids of the requesting
+    user's data: user, recipe, tag and ingredient.
+    """
+
+    name: str
+    path: str
+    method: str = 'GET'
+    body: dict = None
+    authenticated: bool = True
+
+
+SCENARIOS = [
+    Scenario('recipes', '/api/recipe/recipes/'),
+    Scenario('recipes-filtered', '/api/recipe/recipes/?tags={tag}'),
+    Scenario('recipes-sparse', '/api/recipe/recipes/?fields=id,title'),
+    Scenario('recipe', '/api/recipe/recipes/{recipe}/'),
+    Scenario('search', '/api/recipe/recipes/search/?q=soup'),
+    Scenario('tags', '/api/recipe/tags/'),
+    Scenario('ingredients', '/api/recipe/ingredients/?assigned_only=1'),
+    Scenario('me', '/api/user/me/'),
+    Scenario(
+        'token',
+        '/api/user/token/',
+        method='POST',
+        body={'email': '{email}', 'password': PASSWORD},
+        authenticated=False,
+    ),
+]
+
+
+def _title(rng):
+    return ' '.join(rng.sample(WORDS, rng.randint(2, 4))).capitalize()
+
+
+def generate(users=10, recipes=200, tags=20, ingredients=60, seed=0):
+    """Create users with data and return their pks, skipping existing.
+
+    Users are bench-<n>@EMAIL_DOMAIN with password PASSWORD. Every
+    recipe gets 1-5 tags and 3-12 ingredients of its user.
+    """
+    rng = random.Random(seed)
+    User = get_user_model()
+    emails = [f'bench-{number}@{EMAIL_DOMAIN}' for number in range(users)]
+    existing = set(User.objects.filter(
+        email__in=emails,
+    ).values_list('email', flat=True))
+    password = make_password(PASSWORD)
+    User.objects.bulk_create([
+        User(email=email, name=email.split('@')[0], password=password)
+        for email in emails if email not in existing
+    ])
+    created = dict(User.objects.filter(
+        email__in=[email for email in emails if email not in existing],
+    ).values_list('email', 'id'))
+    Token.objects.bulk_create([
+        Token(key=Token.generate_key(), user_id=user_id)
+        for user_id in created.values()
+    ])
+
+    user_ids = sorted(created.values())
+    for model, count, prefix in [
+        (Tag, tags, 'tag'),
+        (Ingredient, ingredients, 'ingredient'),
+    ]:
+        model.objects.bulk_create([
+            model(user_id=user_id, name=f'{prefix} {number}')
+            for user_id in user_ids
+            for number in range(count)
+        ])
+    Recipe.objects.bulk_create([
+        Recipe(
+            user_id=user_id,
+            title=_title(rng),
+            description=' '.join(rng.choices(WORDS, k=rng.randint(5, 30))),
+            time_minutes=rng.randint(5, 180),
+            price=Decimal(rng.randint(100, 9999)) / 100,
+        )
+        for user_id in user_ids
+        for _number in range(recipes)
+    ])
+
+    def ids(model):
+        grouped = {}
+        for row_id, user_id in model.objects.filter(
+            user_id__in=user_ids,
+        ).order_by('id').values_list('id', 'user_id'):
+            grouped.setdefault(user_id, []).append(row_id)
+        return grouped
+
+    recipe_ids = ids(Recipe)
+    tag_ids = ids(Tag)
+    ingredient_ids = ids(Ingredient)
+    for field, related, low, high in [
+        (Recipe.tags, tag_ids, 1, 5),
+        (Recipe.ingredient, ingredient_ids, 3, 12),
+    ]:
+        through = field.through
+        column = field.field.m2m_reverse_field_name() + '_id'
+        through.objects.bulk_create([
+            through(recipe_id=recipe_id, **{column: related_id})
+            for user_id in user_ids
+            for recipe_id in recipe_ids.get(user_id, [])
+            for related_id in rng.sample(
+                related.get(user_id, []),
+                min(len(related.get(user_id, [])), rng.randint(low, high)),
+            )
+        ], batch_size=5000)
+
+    # bulk inserts send no signals
+    for user_id in user_ids:
+        data_changed(user_id)
+    return sorted(User.objects.filter(
+        email__in=emails,
+    ).values_list('id', flat=True))
+
+
+def user_contexts(user_ids):
+    """Return the format arguments of `Scenario` for each user."""
+    User = get_user_model()
+    contexts = []
+    for user in User.objects.filter(id__in=user_ids).order_by('id'):
+        contexts.append({
+            'user': user.pk,
+            'email': user.email,
+            'token': Token.objects.get_or_create(user=user)[0].key,
+            'recipe': Recipe.objects.filter(
+                user=user,
+            ).values_list('id', flat=True).first(),
+            'tag': Tag.objects.filter(
+                user=user,
+            ).values_list('id', flat=True).first(),
+            'ingredient': Ingredient.objects.filter(
+                user=user,
+            ).values_list('id', flat=True).first(),
+        })
+    return contexts
+
+
+def _format(value, context):
+    if isinstance(value, dict):
+        return {key: _format(item, context) for key, item in value.items()}
+    if isinstance(value, str):
+        return value.format(**context)
+    return value
+
+
+def percentile(values, percent):
+    """Return the percent-th percentile of values, nearest rank."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def summarize(latencies, elapsed, errors, queries=None, peak_memory=None):
+    """Return the metrics of one scenario; times in milliseconds."""
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'queries': queries,
+        'peak_memory_kb': peak_memory,
+    }
+
+
+def _client_request(client, scenario, context):
+    body = _format(scenario.body, context)
+    return client.generic(
+        scenario.method,
+        _format(scenario.path, context),
+        json.dumps(body) if body is not None else '',
+        'application/json',
+    )
+
+
+def run_in_process(contexts, scenarios=SCENARIOS, requests=200):
+    """Return {scenario name: metrics} from Django's test client.
+
+    Users take turns. Queries are the most any request issued. Peak
+    memory is measured on one more request, as tracing slows down the
+    timed ones.
+    """
+    clients = [
+        Client(HTTP_AUTHORIZATION=f"Token {context['token']}")
+        for context in contexts
+    ]
+    anonymous = Client()
+    results = {}
+    for scenario in scenarios:
+        latencies = []
+        queries = 0
+        errors = 0
+        started = time.perf_counter()
+        for number in range(requests):
+            index = number % len(contexts)
+            client = clients[index] if scenario.authenticated else anonymous
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = _client_request(client, scenario, contexts[index])
+                latencies.append(time.perf_counter() - request_started)
+            queries = max(queries, len(captured))
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started
+
+        client = clients[0] if scenario.authenticated else anonymous
+        tracemalloc.start()
+        try:
+            _client_request(client, scenario, contexts[0])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        results[scenario.name] = summarize(
+            latencies,
+            elapsed,
+            errors,
+            queries,
+            peak // 1024,
+        )
+    return results
+
+
+def run_over_http(base_url, contexts, scenarios=SCENARIOS, requests=200,
+                  concurrency=8, timeout=30):
+    """Return {scenario name: metrics} from requests to base_url."""
+    results = {}
+    for scenario in scenarios:
+        latencies = []
+        errors = []
+        pending = iter(range(requests))
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    number = next(pending, None)
+                if number is None:
+                    return
+                context = contexts[number % len(contexts)]
+                body = _format(scenario.body, context)
+                request = urllib.request.Request(
+                    base_url.rstrip('/') + _format(scenario.path, context),
+                    data=json.dumps(body).encode() if body else None,
+                    method=scenario.method,
+                    headers={'Content-Type': 'application/json'},
+                )
+                if scenario.authenticated:
+                    request.add_header(
+                        'Authorization',
+                        f"Token {context['token']}",
+                    )
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=timeout) as f:
+                        f.read()
+                    failed = False
+                except (urllib.error.URLError, OSError):
+                    failed = True
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    errors.append(failed)
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[scenario.name] = summarize(
+            latencies,
+            time.perf_counter() - started,
+            sum(errors),
+        )
+    return results
+
+
+def compare(results, baseline, threshold=0.25, slack_ms=1.0):
+    """Return a list of regressions of results against baseline.
+
+    Errors and query counts must not grow at all. Latency and peak
+    memory may grow and throughput drop by `threshold`, a fraction,
+    before regressing, and latency by `slack_ms` more so scheduling
+    noise does not fail millisecond timings. p99 of a short run is too
+    noisy to compare. Scenarios or metrics missing on either side are
+    skipped.
+    """
+    # (metric, allowed fraction, allowed amount, whether higher is worse)
+    checks = [
+        ('errors', 0, 0, True),
+        ('queries', 0, 0, True),
+        ('p50_ms', threshold, slack_ms, True),
+        ('p95_ms', threshold, slack_ms, True),
+        ('peak_memory_kb', threshold, 0, True),
+        ('throughput', threshold, 0, False),
+    ]
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric, allowed, slack, higher_is_worse in checks:
+            value = metrics.get(metric)
+            limit = expected.get(metric)
+            if value is None or limit is None:
+                continue
+            if higher_is_worse and value > limit * (1 + allowed) + slack:
+                regressions.append(
+                    f'{name}: {metric} {value} > {limit} (+{allowed:.0%})',
+                )
+            elif not higher_is_worse and value < limit * (1 - allowed):
+                regressions.append(
+                    f'{name}: {metric} {value} < {limit} (-{allowed:.0%})',
+                )
+    return regressions
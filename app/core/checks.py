@@ -0,0 +1,45 @@
+"""
+System checks of settings that only fail under several workers.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# backends keeping entries in the process, or not at all
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Require a shared REPLICA_PIN_CACHE when replicas are configured.
+
+    Pins written to a per-process cache only reach the worker that served
+    the write, so the user's next read may hit a lagging replica.
+    """
+    from core.db.routers import replica_aliases
+
+    if not replica_aliases() or getattr(
+        settings, 'REPLICA_PIN_SECONDS', 5,
+    ) <= 0:
+        return []
+    alias = getattr(settings, 'REPLICA_PIN_CACHE', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend is None:
+        return [Error(
+            f'REPLICA_PIN_CACHE names the unknown cache {alias!r}.',
+            id='core.E001',
+        )]
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f'REPLICA_PIN_CACHE {alias!r} uses {backend}, which workers '
+            'do not share.',
+            hint=(
+                'Point REPLICA_PIN_CACHE at a cache shared between '
+                'workers, e.g. memcached or Redis, when DB_REPLICA_HOSTS '
+                'is set.'
+            ),
+            id='core.E002',
+        )]
+    return []
@@ -0,0 +1,140 @@
+"""
+PostgreSQL backend with connection health checks and optional pooling.
+
+Settings, next to the usual DATABASES entry keys:
+
+- HEALTH_CHECKS: ping persistent connections on their first use in each
+  request and reconnect when they are gone, like CONN_HEALTH_CHECKS in
+  later Django versions.
+- POOL: {'MAX_SIZE', 'MAX_OVERFLOW', 'TIMEOUT'} to take connections from
+  a per-process `ConnectionPool` instead of connecting per request. Use
+  it with CONN_MAX_AGE 0 so connections go back to the pool after each
+  request.
+"""
+import os
+
+from django.db.backends.postgresql.base import (
+    Database,
+    DatabaseWrapper as PostgreSQLDatabaseWrapper,
+)
+import psycopg2.extensions
+import psycopg2.extras
+
+from core.db.backends.postgresql.creation import DatabaseCreation
+from core.db.pool import (
+    ConnectionPool,
+    PoolTimeout,
+    get_or_create_pool,
+)
+
+
+def _ping(connection):
+    """Return whether connection answers a trivial query."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except Database.Error:
+        return False
+
+
+def _reset(connection):
+    """Roll back leftover transactions; False if connection is broken."""
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    """PostgreSQL wrapper adding HEALTH_CHECKS and POOL settings."""
+
+    creation_class = DatabaseCreation
+    health_check_done = False
+    pool = None
+
+    @property
+    def health_checks_enabled(self):
+        return self.settings_dict.get('HEALTH_CHECKS', False)
+
+    def _get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+
+        def build():
+            check = _ping if self.health_checks_enabled else (
+                lambda connection: not connection.closed
+            )
+            return ConnectionPool(
+                lambda: Database.connect(**conn_params),
+                max_size=options.get('MAX_SIZE', 10),
+                max_overflow=options.get('MAX_OVERFLOW', 0),
+                timeout=options.get('TIMEOUT', 30),
+                check=check,
+                reset=_reset,
+            )
+
+        # tests switch NAME to the test database, which needs its own pool
+        key = repr(sorted(conn_params.items()))
+        return get_or_create_pool(self.alias, key, build)
+
+    def get_new_connection(self, conn_params):
+        pool = self._get_pool(conn_params)
+        if pool is None:
+            connection = super().get_new_connection(conn_params)
+            self.health_check_done = True
+            return connection
+
+        try:
+            connection = pool.acquire()
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+        self.pool = pool
+        # pooled connections were checked on acquisition
+        self.health_check_done = True
+
+        # as in the parent, isolation_level must be known before
+        # _set_autocommit() runs
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection,
+            loads=lambda x: x,
+        )
+        return connection
+
+    def ensure_connection(self):
+        """Reconnect a persistent connection that failed its health check."""
+        if (
+            self.connection is not None
+            and self.health_checks_enabled
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        """Check again on the next use in the following request."""
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def _close(self):
+        pool, self.pool = self.pool, None
+        if pool is None or pool.pid != os.getpid():
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
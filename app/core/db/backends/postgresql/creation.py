@@ -0,0 +1,16 @@
+"""
+Test database creation for the pooling PostgreSQL backend.
+"""
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as PostgreSQLDatabaseCreation,
+)
+
+from core.db.pool import close_pools
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+    """Close pooled connections before dropping the test database."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,206 @@
+"""
+A thread safe pool of DB-API connections.
+"""
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the acquisition timeout."""
+
+
+class ConnectionPool:
+    """Hand out connections from `factory`, keeping idle ones for reuse.
+
+    Up to `max_size` connections are kept open. Under load up to
+    `max_overflow` more are opened, and closed again instead of being
+    kept once released. `acquire` waits up to `timeout` seconds for a
+    connection beyond that.
+
+    `check(connection)` vets idle connections before they are handed out
+    and `reset(connection)` before they return to the pool; either
+    returning False discards the connection.
+    """
+
+    def __init__(self, factory, max_size=10, max_overflow=0, timeout=30,
+                 check=None, reset=None):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.check = check
+        self.reset = reset
+        self.pid = os.getpid()
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = dict.fromkeys(
+            ['acquired', 'created', 'waits', 'timeouts', 'discarded'],
+            0,
+        )
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _forget(self):
+        """Free the slot of a connection to close; call holding the lock."""
+        self._open -= 1
+        self._stats['discarded'] += 1
+        self._cond.notify()
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _healthy(self, connection):
+        if self.check is None:
+            return True
+        try:
+            return self.check(connection)
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Return a connection, waiting for one when at capacity.
+
+        Idle connections are checked and new ones opened outside the
+        lock, so a slow or dead database never blocks other threads'
+        acquires and releases.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            connection = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        connection = self._idle.pop()
+                        popped = time.monotonic()
+                        break
+                    if self._open < self.max_size + self.max_overflow:
+                        # reserve the slot, connect outside the lock
+                        self._open += 1
+                        self._record_acquire(started, waited)
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'No connection available within '
+                            f'{self.timeout}s ({self._open} open).'
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if connection is None:
+                break
+            if self._healthy(connection):
+                with self._cond:
+                    self._record_acquire(started, waited, popped)
+                return connection
+            with self._cond:
+                self._forget()
+            self._close(connection)
+
+        try:
+            connection = self.factory()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return connection
+
+    def _record_acquire(self, started, waited, acquired=None):
+        wait = (acquired or time.monotonic()) - started
+        self._stats['acquired'] += 1
+        if waited:
+            self._stats['waits'] += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+
+    def release(self, connection):
+        """Return connection to the pool, or close it when not reusable."""
+        reusable = True
+        if self.reset is not None:
+            try:
+                reusable = self.reset(connection)
+            except Exception:
+                reusable = False
+
+        with self._cond:
+            if reusable and self._open <= self.max_size:
+                self._idle.append(connection)
+                self._cond.notify()
+                return
+            self._forget()
+        self._close(connection)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            for _connection in idle:
+                self._forget()
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Return pool size and wait time metrics."""
+        with self._cond:
+            stats = dict(
+                self._stats,
+                open=self._open,
+                idle=len(self._idle),
+                in_use=self._open - len(self._idle),
+                wait_time_total=self._wait_total,
+                wait_time_max=self._wait_max,
+            )
+        acquired = stats['acquired']
+        stats['wait_time_avg'] = (
+            stats['wait_time_total'] / acquired if acquired else 0.0
+        )
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_or_create_pool(alias, key, build):
+    """Return this process' pool for (alias, key), calling build once.
+
+    Pools are per process so forked workers never share connections.
+    """
+    full_key = (os.getpid(), alias, key)
+    with _pools_lock:
+        pool = _pools.get(full_key)
+        if pool is None:
+            pool = _pools[full_key] = build()
+    return pool
+
+
+def get_pools():
+    """Return {alias: [pool]} for the pools of this process."""
+    pid = os.getpid()
+    pools = {}
+    with _pools_lock:
+        for (pool_pid, alias, key), pool in _pools.items():
+            if pool_pid == pid:
+                pools.setdefault(alias, []).append(pool)
+    return pools
+
+
+def close_pools(alias=None):
+    """Close and forget the pools of alias, or all of them."""
+    with _pools_lock:
+        for full_key in list(_pools):
+            if alias is None or full_key[1] == alias:
+                _pools.pop(full_key).close()
@@ -0,0 +1,142 @@
+"""
+Database router sending reads of safe requests to read replicas.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# the replica reads of the current scope go to, None for the primary
+_replica = ContextVar('replica', default=None)
+
+_lag_lock = threading.Lock()
+_lag_checked = {}
+
+PIN_KEY_PREFIX = 'replica-pin:'
+
+
+def replica_aliases():
+    """Return the aliases of the configured read replicas."""
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+@contextmanager
+def primary_reads():
+    """Route reads to the primary until allow_replica_reads() is called.
+
+    Views wrap each request in it, so a replica choice never leaks into
+    the next request served by the same thread.
+    """
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def allow_replica_reads():
+    """Let reads in the current `primary_reads` scope use a replica.
+
+    One current replica is picked for the whole scope, so all its reads,
+    e.g. a version used as cache key and the rows cached under it, see
+    the same replication lag. Reads stay on the primary if none is
+    current.
+    """
+    aliases = [
+        alias for alias in replica_aliases()
+        if replica_is_current(alias)
+    ]
+    _replica.set(random.choice(aliases) if aliases else None)
+
+
+def _pin_cache():
+    return caches[getattr(settings, 'REPLICA_PIN_CACHE', 'default')]
+
+
+def pin_to_primary(user_id):
+    """Read from the primary for user for REPLICA_PIN_SECONDS."""
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    if seconds > 0 and replica_aliases():
+        _pin_cache().set(f'{PIN_KEY_PREFIX}{user_id}', True, seconds)
+
+
+def is_pinned(user_id):
+    """Return whether user wrote recently enough to read the primary."""
+    if not replica_aliases():
+        return False
+    return bool(_pin_cache().get(f'{PIN_KEY_PREFIX}{user_id}'))
+
+
+def measure_lag(alias):
+    """Return the replication lag of alias in seconds.
+
+    PostgreSQL replicas report the age of the last replayed transaction;
+    other backends (SQLite stand-ins in tests) report no lag.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT CASE WHEN pg_is_in_recovery() THEN COALESCE('
+            'EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), '
+            '0) ELSE 0 END'
+        )
+        return float(cursor.fetchone()[0])
+
+
+def replica_is_current(alias):
+    """Return whether alias lags less than REPLICA_MAX_LAG seconds.
+
+    The answer is remembered for REPLICA_LAG_CHECK_INTERVAL seconds per
+    process; replicas that cannot be queried count as lagging.
+    """
+    interval = getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checked.get(alias)
+    if checked is not None and now - checked[0] < interval:
+        return checked[1]
+
+    try:
+        current = measure_lag(alias) <= getattr(
+            settings, 'REPLICA_MAX_LAG', 5,
+        )
+    except DatabaseError:
+        current = False
+    with _lag_lock:
+        _lag_checked[alias] = (now, current)
+    return current
+
+
+def reset_lag_checks():
+    """Forget remembered lag checks."""
+    with _lag_lock:
+        _lag_checked.clear()
+
+
+class ReplicaRouter:
+    """Send reads to the replica picked for the request, if any.
+
+    Writes, migrations and reads outside replica scopes use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
@@ -0,0 +1,135 @@
+"""
+Password hashers tuned from settings.
+
+PASSWORD_HASHING['ALGORITHM'] picks the hasher new passwords use, see
+PASSWORD_HASHERS in app.settings. The cost parameters are read from
+PASSWORD_HASHING when hashing, and `must_update` compares them with
+those of the stored hash, so Django's `check_password` rehashes a
+password on the next successful login after the algorithm or its cost
+changes.
+
+`ScryptPasswordHasher` is memory-hard: each hash needs 128 * N * r
+bytes, 16 MiB with the defaults, which makes guessing on GPUs costly
+for half the CPU time of PBKDF2 at Django's iteration count. It encodes
+hashes like the scrypt hasher of Django 4.0, which can verify them.
+"""
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+
+
+def _options():
+    return getattr(settings, 'PASSWORD_HASHING', {})
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """Django's PBKDF2 SHA256 hasher with PBKDF2_ITERATIONS iterations."""
+
+    @property
+    def iterations(self):
+        return _options().get(
+            'PBKDF2_ITERATIONS',
+            hashers.PBKDF2PasswordHasher.iterations,
+        )
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    """scrypt with SCRYPT_N, SCRYPT_R and SCRYPT_P from settings."""
+
+    algorithm = 'scrypt'
+    dklen = 64
+
+    @property
+    def work_factor(self):
+        return _options().get('SCRYPT_N', 2 ** 14)
+
+    @property
+    def block_size(self):
+        return _options().get('SCRYPT_R', 8)
+
+    @property
+    def parallelism(self):
+        return _options().get('SCRYPT_P', 1)
+
+    def _derive(self, password, salt, work_factor, block_size, parallelism):
+        derived = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=work_factor,
+            r=block_size,
+            p=parallelism,
+            # OpenSSL's default limit is 32 MiB
+            maxmem=256 * work_factor * block_size * parallelism,
+            dklen=self.dklen,
+        )
+        return base64.b64encode(derived).decode('ascii')
+
+    def encode(self, password, salt, work_factor=None, block_size=None,
+               parallelism=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        work_factor = work_factor or self.work_factor
+        block_size = block_size or self.block_size
+        parallelism = parallelism or self.parallelism
+        hash = self._derive(
+            password,
+            salt,
+            work_factor,
+            block_size,
+            parallelism,
+        )
+        return (
+            f'{self.algorithm}${work_factor}${salt}${block_size}$'
+            f'{parallelism}${hash}'
+        )
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash = (
+            encoded.split('$', 5)
+        )
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password,
+            decoded['salt'],
+            decoded['work_factor'],
+            decoded['block_size'],
+            decoded['parallelism'],
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            'algorithm': decoded['algorithm'],
+            'work factor': decoded['work_factor'],
+            'block size': decoded['block_size'],
+            'parallelism': decoded['parallelism'],
+            'salt': hashers.mask_hash(decoded['salt']),
+            'hash': hashers.mask_hash(decoded['hash']),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor
+            or decoded['block_size'] != self.block_size
+            or decoded['parallelism'] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # the cost is in the encoded hash, so verify takes as long
+        pass
@@ -0,0 +1,229 @@
+"""
+Per-request timing of SQL, serialization and rendering.
+
+`InstrumentationMiddleware` samples REQUEST_INSTRUMENTATION['SAMPLE_RATE']
+of requests. For those, every query on any connection and thread the
+request runs on is recorded by `record_query`, an execute wrapper
+installed on each connection as it is created, and `timer` adds up
+named phases. The totals are returned in a Server-Timing header and
+logged as one JSON line on the `core.instrumentation` logger, with
+queries repeated N_PLUS_ONE_THRESHOLD times or more reported as
+likely N+1 patterns.
+
+Every query's duration is also observed by the db_query_duration_seconds
+histogram of core.metrics, and the phases of sampled requests by
+http_request_phase_duration_seconds. Queries slower than
+SLOW_QUERIES['THRESHOLD_MS'] are logged by core.slow_queries. Unsampled
+requests cost a context variable lookup per timed phase and a clock
+read per query.
+"""
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.deprecation import MiddlewareMixin
+
+from core import slow_queries
+from core.metrics import (
+    DB_QUERY_SECONDS,
+    PHASE_SECONDS,
+    view_label,
+)
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+# literals and placeholders, then runs of them, e.g. IN (%s, %s, ...),
+# and of rows, e.g. VALUES (%s, %s), (%s, %s)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_LISTS = re.compile(r'\?(?:\s*,\s*\?)+')
+_ROWS = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+
+
+def query_signature(sql):
+    """Return sql with literals and parameter lists replaced by `?`."""
+    return _ROWS.sub('(?)', _LISTS.sub('?', _LITERALS.sub('?', sql)))
+
+
+class RequestMetrics:
+    """Counters of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.signatures = Counter()
+        self.phases = {}
+        self._open = Counter()
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        self.signatures[query_signature(sql)] += 1
+
+    def duplicates(self, threshold):
+        """Return [(signature, count)] of queries run threshold+ times."""
+        return [
+            (signature, count)
+            for signature, count in self.signatures.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self, total):
+        """Return the Server-Timing header value, durations in ms."""
+        metrics = [
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+        ]
+        metrics.extend(
+            f'{name};dur={duration * 1000:.1f}'
+            for name, duration in self.phases.items()
+        )
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def current_metrics():
+    """Return the metrics of the sampled request being served or None."""
+    return _current.get()
+
+
+@contextmanager
+def timer(name):
+    """Add the time spent in the block to phase name.
+
+    Nested blocks of the same phase, e.g. nested serializers, only count
+    once.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics._open[name]:
+        yield
+        return
+    metrics._open[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._open[name] -= 1
+        metrics.phases[name] = (
+            metrics.phases.get(name, 0.0) + time.perf_counter() - started
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper timing every query, recording sampled ones.
+
+    Failed queries are timed too but never captured as slow: their
+    transaction may be aborted, and the error must reach the caller.
+    """
+    started = time.perf_counter()
+    succeeded = False
+    try:
+        result = execute(sql, params, many, context)
+        succeeded = True
+        return result
+    finally:
+        duration = time.perf_counter() - started
+        DB_QUERY_SECONDS.observe(duration, alias=context['connection'].alias)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add_query(sql, duration)
+        slow = slow_queries.threshold()
+        if succeeded and slow is not None and duration >= slow:
+            slow_queries.capture(sql, params, many, context, duration)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Record the queries of every connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedRepresentationMixin:
+    """Count a serializer's `to_representation` as the serialize phase."""
+
+    def to_representation(self, instance):
+        with timer('serialize'):
+            return super().to_representation(instance)
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """Time sampled requests and report where the time went.
+
+    Rendering is timed from `process_template_response`, just before
+    Django renders the response, or by the async views, which render
+    on their worker thread.
+    """
+
+    def _options(self):
+        return getattr(settings, 'REQUEST_INSTRUMENTATION', {})
+
+    def process_request(self, request):
+        sampled = random.random() < self._options().get('SAMPLE_RATE', 0)
+        request._metrics = RequestMetrics() if sampled else None
+        _current.set(request._metrics)
+        slow_queries.set_view(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_view(request.resolver_match.view_name)
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, '_metrics', None)
+        if metrics is not None and not response.is_rendered:
+            started = time.perf_counter()
+
+            def rendered(response):
+                metrics.phases['render'] = (
+                    metrics.phases.get('render', 0.0)
+                    + time.perf_counter() - started
+                )
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def process_response(self, request, response):
+        metrics = getattr(request, '_metrics', None)
+        if metrics is None:
+            return response
+        _current.set(None)
+        total = time.perf_counter() - metrics.started
+        options = self._options()
+
+        if options.get('SERVER_TIMING', True):
+            response['Server-Timing'] = metrics.server_timing(total)
+
+        view = view_label(request)
+        PHASE_SECONDS.observe(metrics.sql_time, view=view, phase='db')
+        for name, duration in metrics.phases.items():
+            PHASE_SECONDS.observe(duration, view=view, phase=name)
+
+        duplicates = metrics.duplicates(
+            options.get('N_PLUS_ONE_THRESHOLD', 5),
+        )
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view if request.resolver_match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            **{
+                f'{name}_ms': round(duration * 1000, 2)
+                for name, duration in metrics.phases.items()
+            },
+            'duplicates': [
+                {'sql': signature[:300], 'count': count}
+                for signature, count in duplicates
+            ],
+        }))
+        return response
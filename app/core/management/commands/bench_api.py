@@ -0,0 +1,186 @@
+"""
+Django command to benchmark the API against a stored baseline.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from core import benchmark
+
+# isolates in-process runs from shared caches
+BENCH_CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'bench-{alias}',
+    }
+    for alias in ['default', 'responses']
+}
+
+# turns off response, fragment and token caching, see --warm
+COLD_SETTINGS = {
+    'RESPONSE_CACHE': {'ENABLED': False},
+    'FRAGMENT_CACHE': {'ENABLED': False},
+    'TOKEN_AUTH_CACHE': {'MAX_SIZE': 0, 'CACHE_ALIAS': None},
+}
+
+
+class Command(BaseCommand):
+    """Django command to measure API latency, throughput and queries."""
+
+    help = (
+        'Seed users with recipes, tags and ingredients and drive the API '
+        'in process, or over HTTP with --url, reporting latency '
+        'percentiles, throughput, query counts and peak memory. With '
+        '--baseline, fail when a result regresses beyond --threshold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help=(
+                'Base URL of a server using this database. Seeded data is '
+                'kept so later runs reuse it; without --url it is rolled '
+                'back.'
+            ),
+        )
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--ingredients', type=int, default=60)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests per scenario.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Concurrent requests over HTTP.',
+        )
+        parser.add_argument(
+            '--scenarios',
+            nargs='+',
+            choices=[scenario.name for scenario in benchmark.SCENARIOS],
+        )
+        parser.add_argument(
+            '--baseline',
+            help=(
+                'JSON results to compare, saved with --save on the same '
+                'machine, database and options.'
+            ),
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.25,
+            help='Allowed relative regression of timings and memory.',
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help=(
+                'Keep the response, fragment and token caches on in '
+                'process. By default they are off, so every request pays '
+                'its queries and serialization, as the baseline does.'
+            ),
+        )
+        parser.add_argument('--save', help='Write the results as JSON.')
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        scenarios = [
+            scenario for scenario in benchmark.SCENARIOS
+            if not options['scenarios'] or scenario.name in (
+                options['scenarios']
+            )
+        ]
+        if options['url']:
+            results = self._run_over_http(scenarios, options)
+        else:
+            results = self._run_in_process(scenarios, options)
+
+        self._report(results)
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = benchmark.compare(
+                results,
+                baseline,
+                options['threshold'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Regressed against the baseline:\n'
+                    + '\n'.join(regressions),
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def _seed(self, options):
+        started = time.monotonic()
+        user_ids = benchmark.generate(
+            options['users'],
+            options['recipes'],
+            options['tags'],
+            options['ingredients'],
+        )
+        self.stdout.write(
+            f'{len(user_ids)} users with data ready in '
+            f'{time.monotonic() - started:.1f}s.'
+        )
+        return benchmark.user_contexts(user_ids)
+
+    def _run_in_process(self, scenarios, options):
+        """Run against data rolled back afterwards, on the primary."""
+        with transaction.atomic(), override_settings(
+            CACHES=BENCH_CACHES,
+            REPLICA_DATABASES=[],
+            DEBUG=False,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            **({} if options['warm'] else COLD_SETTINGS),
+        ):
+            try:
+                contexts = self._seed(options)
+                return benchmark.run_in_process(
+                    contexts,
+                    scenarios,
+                    options['requests'],
+                )
+            finally:
+                transaction.set_rollback(True)
+
+    def _run_over_http(self, scenarios, options):
+        return benchmark.run_over_http(
+            options['url'],
+            self._seed(options),
+            scenarios,
+            options['requests'],
+            options['concurrency'],
+        )
+
+    def _report(self, results):
+        self.stdout.write(
+            f"{'scenario':<18}{'reqs':>6}{'errors':>7}{'p50 ms':>9}"
+            f"{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}{'queries':>8}"
+            f"{'peak KB':>9}"
+        )
+        for name, metrics in results.items():
+            queries = metrics['queries']
+            memory = metrics['peak_memory_kb']
+            self.stdout.write(
+                f"{name:<18}{metrics['requests']:>6}{metrics['errors']:>7}"
+                f"{metrics['p50_ms']:>9.2f}{metrics['p95_ms']:>9.2f}"
+                f"{metrics['p99_ms']:>9.2f}{metrics['throughput']:>8.1f}"
+                f"{'-' if queries is None else queries:>8}"
+                f"{'-' if memory is None else memory:>9}"
+            )
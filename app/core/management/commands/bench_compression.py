@@ -0,0 +1,58 @@
+"""
+Django command to benchmark response compression.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.management.commands.bench_renderers import recipe_payload
+from core.middleware import available_codecs
+from core.renderers import FastJSONRenderer
+
+DEFAULT_LEVELS = {'gzip': [1, 6, 9], 'br': [1, 4, 11]}
+
+
+class Command(BaseCommand):
+    """Django command to compare codecs on recipe list payloads."""
+
+    help = (
+        'Compress rendered recipe lists of several sizes with every '
+        'available codec, reporting bytes on the wire and CPU time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--counts',
+            type=int,
+            nargs='+',
+            default=[5, 50, 500, 5000],
+            help='Numbers of recipes per payload.',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        codecs = available_codecs()
+        self.stdout.write(
+            f"{'recipes':>8}{'codec':>8}{'level':>6}{'bytes':>10}"
+            f"{'wire':>10}{'ratio':>7}{'cpu ms':>9}"
+        )
+        for count in options['counts']:
+            body = FastJSONRenderer().render(recipe_payload(count))
+            self.stdout.write(
+                f"{count:>8}{'none':>8}{'':>6}{len(body):>10}"
+                f"{len(body):>10}{1:>7.2f}{0:>9.3f}"
+            )
+            for name, codec_class in codecs.items():
+                for level in DEFAULT_LEVELS[name]:
+                    codec = codec_class(level)
+                    started = time.process_time()
+                    for _ in range(options['repeat']):
+                        compressed = codec.compress(body)
+                    cpu = (time.process_time() - started) / options['repeat']
+                    self.stdout.write(
+                        f'{count:>8}{name:>8}{level:>6}{len(body):>10}'
+                        f'{len(compressed):>10}'
+                        f'{len(compressed) / len(body):>7.2f}'
+                        f'{cpu * 1000:>9.3f}'
+                    )
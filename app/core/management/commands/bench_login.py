@@ -0,0 +1,150 @@
+"""
+Django command to benchmark password hashers and token logins.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from app.serving import cpu_count
+
+EMAIL = 'bench-login@example.com'
+PASSWORD = 'bench-login-pass-123'
+
+
+def _path(hasher):
+    return f'{type(hasher).__module__}.{type(hasher).__qualname__}'
+
+
+class Command(BaseCommand):
+    """Django command to measure logins per second for each hasher."""
+
+    help = (
+        'For each configured password hasher, measure hashing time, '
+        'verifications per second on one core and on --threads threads, '
+        'and token logins per second through the API, in process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--algorithms',
+            nargs='+',
+            help=(
+                'Hasher algorithms to compare, e.g. scrypt pbkdf2_sha256. '
+                'Defaults to those of PASSWORD_HASHERS whose library is '
+                'installed.'
+            ),
+        )
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=20,
+            help='Verifications and logins per measurement.',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=cpu_count(),
+            help='Threads verifying concurrently. Defaults to the CPUs.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        hashers = {hasher.algorithm: hasher for hasher in get_hashers()}
+        algorithms = options['algorithms'] or list(hashers)
+        unknown = set(algorithms) - set(hashers)
+        if unknown:
+            raise CommandError(
+                f"Not in PASSWORD_HASHERS: {', '.join(sorted(unknown))}.",
+            )
+
+        self.stdout.write(
+            f"{'algorithm':<16}{'hash ms':>9}{'verify/s':>10}"
+            f"{'threads':>9}{'verify/s':>10}{'logins/s':>10}  parameters"
+        )
+        for algorithm in algorithms:
+            hasher = hashers[algorithm]
+            try:
+                started = time.perf_counter()
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+                hash_time = time.perf_counter() - started
+            except ValueError as error:
+                # the hasher's library is not installed
+                if options['algorithms']:
+                    raise CommandError(str(error))
+                continue
+
+            single = self._verify_rate(hasher, encoded, options['logins'], 1)
+            threaded = self._verify_rate(
+                hasher,
+                encoded,
+                options['logins'],
+                options['threads'],
+            )
+            logins = self._login_rate(hasher, options['logins'])
+            parameters = ', '.join(
+                f'{name}={value}'
+                for name, value in hasher.safe_summary(encoded).items()
+                if name not in ('algorithm', 'salt', 'hash', 'checksum')
+            )
+            self.stdout.write(
+                f'{algorithm:<16}{hash_time * 1000:>9.1f}{single:>10.1f}'
+                f"{options['threads']:>9}{threaded:>10.1f}{logins:>10.1f}"
+                f'  {parameters}'
+            )
+
+    def _verify_rate(self, hasher, encoded, count, threads):
+        """Return verifications per second of count spread on threads."""
+        pending = iter(range(count))
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if next(pending, None) is None:
+                        return
+                hasher.verify(PASSWORD, encoded)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return count / (time.perf_counter() - started)
+
+    def _login_rate(self, hasher, count):
+        """Return token logins per second with passwords hashed by hasher.
+
+        The user is created in a transaction rolled back afterwards.
+        """
+        paths = [_path(hasher)] + [
+            path for path in settings.PASSWORD_HASHERS
+            if path != _path(hasher)
+        ]
+        client = Client()
+        url = reverse('user:token')
+        body = {'email': EMAIL, 'password': PASSWORD}
+        with transaction.atomic(), override_settings(
+            PASSWORD_HASHERS=paths,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            try:
+                get_user_model().objects.create_user(EMAIL, PASSWORD)
+                started = time.perf_counter()
+                for _login in range(count):
+                    response = client.post(url, body)
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f'Login failed with {response.status_code}.',
+                        )
+                return count / (time.perf_counter() - started)
+            finally:
+                transaction.set_rollback(True)
@@ -0,0 +1,102 @@
+"""
+Django command to benchmark the JSON renderers and parsers.
+"""
+import io
+import time
+import tracemalloc
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+def recipe_payload(count):
+    """Return a paginated list of count recipes shaped like the API's."""
+    results = []
+    for i in range(count):
+        results.append(OrderedDict([
+            ('id', i + 1),
+            ('title', f'Recipe {i} with crème fraîche'),
+            ('time_minutes', i % 120),
+            ('price', str(Decimal(i % 10000) / 100)),
+            ('link', f'https://example.com/recipes/{i}'),
+            ('tags', [
+                OrderedDict([('id', tag), ('name', f'Tag {tag}')])
+                for tag in range(i % 4)
+            ]),
+            ('ingredients', [
+                OrderedDict([('id', item), ('name', f'Ingredient {item}')])
+                for item in range(i % 6)
+            ]),
+        ]))
+    return OrderedDict([
+        ('next', None),
+        ('previous', None),
+        ('results', results),
+    ])
+
+
+def measure(func, repeat):
+    """Return (best seconds, peak allocated bytes) of calling func."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+class Command(BaseCommand):
+    """Django command to compare JSON rendering and parsing speed."""
+
+    help = (
+        'Render and parse a recipe list payload with DRF stdlib JSON and '
+        'the orjson backed classes, reporting best time and peak memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        payload = recipe_payload(options['count'])
+        body = JSONRenderer().render(payload)
+        self.stdout.write(
+            f"{options['count']} recipes, {len(body) / 1024:.0f} KiB"
+        )
+
+        pairs = [
+            ('render', JSONRenderer(), FastJSONRenderer(), lambda r: (
+                lambda: r.render(payload, 'application/json')
+            )),
+            ('parse', JSONParser(), FastJSONParser(), lambda p: (
+                lambda: p.parse(io.BytesIO(body), 'application/json')
+            )),
+        ]
+        for operation, stdlib, fast, call in pairs:
+            results = {}
+            for name, impl in [('stdlib', stdlib), ('fast', fast)]:
+                results[name] = measure(call(impl), options['repeat'])
+                seconds, peak = results[name]
+                self.stdout.write(
+                    f'{operation:<7}{name:<8}{seconds * 1000:9.1f} ms'
+                    f'{peak / 1024:10.0f} KiB peak'
+                )
+            speedup = results['stdlib'][0] / results['fast'][0]
+            self.stdout.write(self.style.SUCCESS(
+                f'{operation} speedup: {speedup:.1f}x'
+            ))
@@ -0,0 +1,190 @@
+"""
+Django command to load test the WSGI and ASGI serving paths.
+"""
+import asyncio
+import io
+import sys
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from rest_framework.authtoken.models import Token
+
+from core.asgi import AsyncViewsASGIHandler
+from core.async_views import shutdown_view_executor
+from core.benchmark import percentile
+
+DEFAULT_PATHS = [
+    '/api/recipe/recipes/',
+    '/api/recipe/tags/',
+    '/api/recipe/ingredients/',
+]
+
+
+class Command(BaseCommand):
+    """Django command to compare concurrent throughput of the servers."""
+
+    help = (
+        'Send concurrent authenticated GETs through the WSGI handler from '
+        'threads, Django\'s ASGI handler and the ASGI handler with async '
+        'views, in process, reporting requests/s and latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user whose data is requested.',
+        )
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+        parser.add_argument('--host', default='localhost')
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+        self.token = Token.objects.get_or_create(user=user)[0].key
+        self.host = options['host']
+
+        paths = options['paths']
+        targets = [
+            paths[number % len(paths)]
+            for number in range(options['requests'])
+        ]
+        concurrency = options['concurrency']
+
+        self.stdout.write(
+            f"{'server':<12}{'requests':>9}{'errors':>8}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}"
+        )
+        runs = [
+            ('wsgi', self._run_wsgi, WSGIHandler),
+            ('asgi', self._run_asgi, ASGIHandler),
+            ('asgi-async', self._run_asgi, AsyncViewsASGIHandler),
+        ]
+        for name, run, handler_class in runs:
+            started = time.perf_counter()
+            results = run(handler_class(), targets, concurrency)
+            elapsed = time.perf_counter() - started
+
+            latencies = [latency for status, latency in results]
+            errors = sum(status != 200 for status, latency in results)
+            self.stdout.write(
+                f'{name:<12}{len(results):>9}{errors:>8}'
+                f'{len(results) / elapsed:>9.0f}'
+                f'{percentile(latencies, 50) * 1000:>9.1f}'
+                f'{percentile(latencies, 95) * 1000:>9.1f}'
+            )
+
+    def _run_wsgi(self, handler, targets, concurrency):
+        """Return [(status, latency)] from concurrency threads."""
+        results = []
+        pending = iter(targets)
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        path = next(pending, None)
+                    if path is None:
+                        return
+                    results.append(self._wsgi_get(handler, path))
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _wsgi_get(self, handler, path):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.host,
+            'HTTP_AUTHORIZATION': f'Token {self.token}',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+        }
+        status = []
+        started = time.perf_counter()
+        response = handler(
+            environ,
+            lambda value, headers: status.append(int(value.split()[0])),
+        )
+        b''.join(response)
+        response.close()
+        return status[0], time.perf_counter() - started
+
+    def _run_asgi(self, handler, targets, concurrency):
+        """Return [(status, latency)] from concurrency tasks."""
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def get(path):
+                async with semaphore:
+                    return await self._asgi_get(handler, path)
+
+            results = await asyncio.gather(*map(get, targets))
+            # Django's thread for sync code holds connections too
+            await sync_to_async(connections.close_all)()
+            return results
+
+        try:
+            return asyncio.run(run())
+        finally:
+            shutdown_view_executor()
+
+    async def _asgi_get(self, handler, path):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', self.host.encode()),
+                (b'authorization', f'Token {self.token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': (self.host, 80),
+        }
+        status = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        started = time.perf_counter()
+        await handler(scope, receive, send)
+        return status[0], time.perf_counter() - started
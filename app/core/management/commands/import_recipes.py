@@ -0,0 +1,253 @@
+"""
+Django command to bulk import recipes from NDJSON or CSV.
+"""
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.versioning import (
+    coalesce_data_changes,
+    data_changed,
+)
+
+
+def _clean(model, name, value):
+    """Return value cleaned by the model field name, ValueError if invalid.
+
+    Runs the field's validators, e.g. its length and digit limits, so a
+    bad record fails with its number instead of a database error.
+    """
+    try:
+        return model._meta.get_field(name).clean(value, None)
+    except ValidationError as exc:
+        raise ValueError(f"{name}: {' '.join(exc.messages)}")
+
+
+def _names(model, value):
+    """Return related names from an export style value.
+
+    Accepts a list of {'name': ...} objects or strings (NDJSON) or a ';'
+    separated string (CSV).
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(';')
+    names = []
+    for item in value:
+        name = item.get('name') if isinstance(item, dict) else item
+        if not isinstance(name, str):
+            raise ValueError('tag and ingredient names must be strings')
+        name = name.strip()
+        if name:
+            names.append(_clean(model, 'name', name))
+    return list(dict.fromkeys(names))
+
+
+def _parse_record(record):
+    """Validate one record and return (recipe fields, tags, ingredients)."""
+    title = record.get('title')
+    fields = {
+        'title': _clean(
+            Recipe,
+            'title',
+            title.strip() if isinstance(title, str) else title,
+        ),
+        'description': record.get('description') or '',
+        'time_minutes': _clean(
+            Recipe,
+            'time_minutes',
+            record.get('time_minutes'),
+        ),
+        'price': _clean(Recipe, 'price', record.get('price')),
+        'link': _clean(Recipe, 'link', record.get('link') or ''),
+    }
+    tags = _names(Tag, record.get('tags'))
+    ingredients = _names(Ingredient, record.get('ingredients'))
+    return fields, tags, ingredients
+
+
+class Command(BaseCommand):
+    """Django command to import recipes for one user."""
+
+    help = (
+        'Stream recipes in the export format (NDJSON or CSV) from a file or '
+        'stdin into the database in batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin.")
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user owning the imported recipes.',
+        )
+        parser.add_argument(
+            '--input-format',
+            choices=['ndjson', 'csv'],
+            help='Defaults to the file extension, ndjson for stdin.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'File recording how many records were committed; an '
+                'existing checkpoint resumes after those records.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        User = get_user_model()
+        try:
+            self.user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+
+        path = options['path']
+        input_format = options['input_format'] or (
+            'csv' if path.lower().endswith('.csv') else 'ndjson'
+        )
+        batch_size = options['batch_size']
+        checkpoint = options['checkpoint']
+        done = self._read_checkpoint(checkpoint)
+
+        self.names = {
+            Tag: dict(Tag.objects.filter(user=self.user).values_list(
+                'name', 'id',
+            )),
+            Ingredient: dict(Ingredient.objects.filter(
+                user=self.user,
+            ).values_list('name', 'id')),
+        }
+        connection = connections[router.db_for_write(Recipe)]
+        self.bulk_insert_ids = (
+            connection.features.can_return_rows_from_bulk_insert
+        )
+
+        stream = sys.stdin if path == '-' else open(path, newline='')
+        try:
+            records = self._read(stream, input_format)
+            if done:
+                self.stdout.write(f'Resuming after {done} records.')
+                # islice consumes and discards without keeping records
+                next(islice(records, done - 1, done), None)
+
+            imported = 0
+            started = time.monotonic()
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                self._import_batch(batch, done + imported)
+                imported += len(batch)
+                self._write_checkpoint(checkpoint, done + imported)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{done + imported} records imported '
+                    f'({imported / elapsed if elapsed else 0:.0f} rows/s)'
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes in {elapsed:.1f}s '
+            f'({imported / elapsed if elapsed else 0:.0f} rows/s).'
+        ))
+
+    def _read(self, stream, input_format):
+        """Yield input records as dicts, one at a time."""
+        if input_format == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f'Record {number}: invalid JSON: {exc}')
+
+    def _read_checkpoint(self, checkpoint):
+        if not checkpoint or not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as f:
+            return json.load(f)['records']
+
+    def _write_checkpoint(self, checkpoint, records):
+        """Atomically record the number of committed records."""
+        if not checkpoint:
+            return
+        tmp_path = f'{checkpoint}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'records': records}, f)
+        os.replace(tmp_path, checkpoint)
+
+    def _resolve(self, model, names):
+        """Return {name: id} for names, bulk creating unknown ones."""
+        known = self.names[model]
+        missing = [name for name in dict.fromkeys(names) if name not in known]
+        if missing:
+            model.objects.bulk_create(
+                [model(user=self.user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            known.update(model.objects.filter(
+                user=self.user,
+                name__in=missing,
+            ).values_list('name', 'id'))
+        return known
+
+    @coalesce_data_changes()
+    @transaction.atomic
+    def _import_batch(self, batch, offset):
+        """Write one batch of records in a transaction."""
+        parsed = []
+        for number, record in enumerate(batch, start=offset + 1):
+            try:
+                parsed.append(_parse_record(record))
+            except (ValueError, AttributeError) as exc:
+                raise CommandError(f'Record {number}: {exc}')
+
+        recipes = [Recipe(user=self.user, **item[0]) for item in parsed]
+        if self.bulk_insert_ids:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+
+        relations = [
+            (Tag, Recipe.tags.through, 'tag_id', 1),
+            (Ingredient, Recipe.ingredient.through, 'ingredient_id', 2),
+        ]
+        for model, through, column, position in relations:
+            ids = self._resolve(
+                model,
+                [name for item in parsed for name in item[position]],
+            )
+            through.objects.bulk_create([
+                through(recipe_id=recipe.pk, **{column: ids[name]})
+                for recipe, item in zip(recipes, parsed)
+                for name in item[position]
+            ])
+
+        # bulk inserts send no signals
+        data_changed(self.user.pk)
@@ -0,0 +1,92 @@
+"""
+Django command to summarize the slow query log.
+"""
+import sys
+import textwrap
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import slow_queries
+
+
+class Command(BaseCommand):
+    """Django command to list the slowest queries by signature."""
+
+    help = (
+        'Read slow query logs written by core.slow_queries and list the '
+        'query signatures taking the most time, with the views running '
+        'them and the plan of their slowest sampled run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            help=(
+                "Log files, or '-' for stdin. Defaults to "
+                "SLOW_QUERIES['LOG_FILE']."
+            ),
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--order-by',
+            choices=['total', 'count', 'max', 'avg'],
+            default='total',
+        )
+        parser.add_argument('--view', help='Only queries run by this view.')
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the sampled EXPLAIN plans.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        paths = options['paths'] or list(filter(None, [
+            getattr(settings, 'SLOW_QUERIES', {}).get('LOG_FILE'),
+        ]))
+        if not paths:
+            raise CommandError(
+                "No log given and SLOW_QUERIES['LOG_FILE'] is not set.",
+            )
+
+        records = []
+        for path in paths:
+            try:
+                stream = sys.stdin if path == '-' else open(path)
+            except OSError as error:
+                raise CommandError(f'Cannot read {path}: {error}')
+            try:
+                records.extend(slow_queries.read_log(stream))
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+
+        summary = slow_queries.summarize(
+            records,
+            options['order_by'],
+            options['view'],
+        )[:options['top']]
+        if not summary:
+            self.stdout.write('No slow queries logged.')
+            return
+
+        self.stdout.write(
+            f'{len(records)} slow queries, top {len(summary)} signatures '
+            f"by {options['order_by']}:"
+        )
+        for rank, group in enumerate(summary, start=1):
+            self.stdout.write(
+                f"\n#{rank} {group['count']} runs, "
+                f"{group['total']:.1f} ms total, {group['avg']:.1f} ms avg, "
+                f"{group['max']:.1f} ms max, "
+                f"{group['distinct_params']} distinct params"
+            )
+            self.stdout.write(f"   views: {', '.join(group['views'])}")
+            self.stdout.write(textwrap.indent(
+                textwrap.fill(group['signature'][:1000], 76),
+                '   ',
+            ))
+            if options['plans'] and group['plan']:
+                self.stdout.write(textwrap.indent(group['plan'], '   | '))
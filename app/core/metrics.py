@@ -0,0 +1,467 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+Counters, gauges and histograms live in `registry`, one per process.
+Statistics kept by other objects, e.g. cache and pool counters, are
+copied in by collectors whenever a snapshot is taken.
+
+With METRICS['MULTIPROCESS_DIR'] set, each worker writes its snapshot
+there at most every WRITE_INTERVAL seconds and on scrapes, and `collect`
+sums the snapshots of all workers. `mark_process_dead`, called from
+gunicorn's child_exit hook, folds the counters and histograms of an
+exited worker into an archive and drops its gauges.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.deprecation import MiddlewareMixin
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+ARCHIVE = 'archive'
+UNMATCHED = '<unmatched>'
+
+
+class Metric:
+    """A named family of values, one per combination of label values."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set(self, value, **labels):
+        """Set the value for labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def describe(self):
+        """Return the JSON-able description and samples of this metric."""
+        with self._lock:
+            samples = [
+                [list(key), list(value) if isinstance(value, list) else value]
+                for key, value in self._values.items()
+            ]
+        return {
+            'type': self.type,
+            'help': self.documentation,
+            'labels': list(self.labelnames),
+            'samples': samples,
+        }
+
+
+class Counter(Metric):
+    """A total that only goes up.
+
+    `set` mirrors totals counted elsewhere, e.g. cache statistics.
+    """
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+
+    type = 'gauge'
+
+
+class Histogram(Metric):
+    """Observations counted in buckets, with their sum.
+
+    Values are stored as [count per bucket..., count above, sum].
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1)
+                counts.append(0.0)
+            counts[index] += 1
+            counts[-1] += value
+
+    def describe(self):
+        description = super().describe()
+        description['buckets'] = list(self.buckets)
+        return description
+
+
+class Registry:
+    """The metrics of a process and the collectors updating them."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add metric, returning it."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} already registered.')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """Call collector() before every snapshot."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def snapshot(self):
+        """Return {name: description} of every metric."""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collector in collectors:
+            collector()
+        return {metric.name: metric.describe() for metric in metrics}
+
+
+def merge(snapshots):
+    """Return the sum of snapshots, adding values with the same labels."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, description in snapshot.items():
+            target = merged.setdefault(name, {
+                **description,
+                'samples': [],
+            })
+            values = {
+                tuple(labels): value for labels, value in target['samples']
+            }
+            for labels, value in description['samples']:
+                labels = tuple(labels)
+                if labels not in values:
+                    values[labels] = value
+                elif isinstance(value, list):
+                    values[labels] = [
+                        a + b for a, b in zip(values[labels], value)
+                    ]
+                else:
+                    values[labels] += value
+            target['samples'] = [
+                [list(labels), value] for labels, value in values.items()
+            ]
+    return merged
+
+
+def _escape(value):
+    return (
+        value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+    )
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{_escape(value)}"' for name, value in pairs
+    ) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+def render(snapshot):
+    """Return snapshot in the Prometheus text exposition format."""
+    lines = []
+    for name in sorted(snapshot):
+        description = snapshot[name]
+        lines.append(f"# HELP {name} {description['help']}")
+        lines.append(f"# TYPE {name} {description['type']}")
+        names = description['labels']
+        for values, value in sorted(description['samples']):
+            if description['type'] != 'histogram':
+                labels = _labels(names, values)
+                lines.append(f'{name}{labels} {_number(value)}')
+                continue
+            *counts, total = value
+            cumulative = 0
+            for bound, count in zip(
+                [*description['buckets'], '+Inf'],
+                counts,
+            ):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(float(bound))
+                labels = _labels(names, values, [('le', le)])
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = _labels(names, values)
+            lines.append(f'{name}_sum{labels} {_number(total)}')
+            lines.append(f'{name}_count{labels} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    'http_requests_total',
+    'HTTP requests by view, method and status code.',
+    ['view', 'method', 'status'],
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by view and method.',
+    ['view', 'method'],
+))
+PHASE_SECONDS = registry.register(Histogram(
+    'http_request_phase_duration_seconds',
+    'Time sampled requests spent serializing and rendering, by view.',
+    ['view', 'phase'],
+))
+DB_QUERY_SECONDS = registry.register(Histogram(
+    'db_query_duration_seconds',
+    'SQL query latency by database alias.',
+    ['alias'],
+    buckets=(
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+        1.0, 2.5,
+    ),
+))
+DB_CONNECTIONS_CREATED = registry.register(Counter(
+    'db_connections_created_total',
+    'Database connections opened by alias.',
+    ['alias'],
+))
+DB_POOL_CONNECTIONS = registry.register(Gauge(
+    'db_pool_connections',
+    'Pooled database connections by alias and state.',
+    ['alias', 'state'],
+))
+DB_POOL_EVENTS = registry.register(Counter(
+    'db_pool_events_total',
+    'Connection pool acquisitions, waits and timeouts by alias.',
+    ['alias', 'event'],
+))
+DB_POOL_WAIT_SECONDS = registry.register(Counter(
+    'db_pool_wait_seconds_total',
+    'Time spent waiting for a pooled connection by alias.',
+    ['alias'],
+))
+AUTH_TOKEN_CACHE_LOOKUPS = registry.register(Counter(
+    'auth_token_cache_lookups_total',
+    'Token authentication cache lookups by result.',
+    ['result'],
+))
+AUTH_TOKEN_CACHE_SIZE = registry.register(Gauge(
+    'auth_token_cache_entries',
+    'Tokens held in the per-process authentication cache.',
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    'cache_lookups_total',
+    'Application cache lookups by cache and result.',
+    ['cache', 'result'],
+))
+
+
+def _collect_pools():
+    from core.db.pool import get_pools
+
+    totals = {}
+    for alias, pools in get_pools().items():
+        alias_totals = totals.setdefault(alias, {})
+        for pool in pools:
+            for key, value in pool.stats().items():
+                alias_totals[key] = alias_totals.get(key, 0) + value
+    for alias, stats in totals.items():
+        for state in ['open', 'idle', 'in_use']:
+            DB_POOL_CONNECTIONS.set(stats[state], alias=alias, state=state)
+        for event in ['acquired', 'waits', 'timeouts']:
+            DB_POOL_EVENTS.set(stats[event], alias=alias, event=event)
+        DB_POOL_WAIT_SECONDS.set(stats['wait_time_total'], alias=alias)
+
+
+def _collect_token_cache():
+    from core.authentication import get_token_cache
+
+    stats = get_token_cache().stats()
+    for key, result in [
+        ('hits', 'hit'),
+        ('shared_hits', 'shared_hit'),
+        ('misses', 'miss'),
+    ]:
+        AUTH_TOKEN_CACHE_LOOKUPS.set(stats[key], result=result)
+    AUTH_TOKEN_CACHE_SIZE.set(stats['size'])
+
+
+registry.add_collector(_collect_pools)
+registry.add_collector(_collect_token_cache)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    """Count the connections opened."""
+    DB_CONNECTIONS_CREATED.inc(alias=connection.alias)
+
+
+def _options():
+    return getattr(settings, 'METRICS', {})
+
+
+def _process_path(directory, name):
+    return os.path.join(directory, f'{name}.json')
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path, snapshot):
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_last_write = 0.0
+
+
+def write_snapshot(force=False):
+    """Write this process' snapshot to the multiprocess directory.
+
+    Unless forced, at most once every WRITE_INTERVAL seconds.
+    """
+    global _last_write
+    directory = _options().get('MULTIPROCESS_DIR')
+    now = time.monotonic()
+    if not directory or (
+        not force
+        and now - _last_write < _options().get('WRITE_INTERVAL', 5)
+    ):
+        return None
+    _last_write = now
+    snapshot = registry.snapshot()
+    _write(_process_path(directory, os.getpid()), snapshot)
+    return snapshot
+
+
+def collect():
+    """Return the snapshot to expose, summed over workers if configured."""
+    directory = _options().get('MULTIPROCESS_DIR')
+    own = write_snapshot(force=True)
+    if own is None:
+        return registry.snapshot()
+
+    snapshots = [own]
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        name = os.path.basename(path)[:-len('.json')]
+        if name == str(os.getpid()):
+            continue
+        if name != ARCHIVE and not name.isdigit():
+            continue
+        snapshot = _read(path)
+        if name != ARCHIVE and not _pid_alive(int(name)):
+            # left behind by a worker that was not marked dead
+            snapshot = _without_gauges(snapshot)
+        snapshots.append(snapshot)
+    return merge(snapshots)
+
+
+def _without_gauges(snapshot):
+    return {
+        name: description for name, description in snapshot.items()
+        if description['type'] != 'gauge'
+    }
+
+
+def mark_process_dead(pid):
+    """Fold the counters and histograms of exited worker pid."""
+    directory = _options().get('MULTIPROCESS_DIR')
+    if not directory:
+        return
+    path = _process_path(directory, pid)
+    if not os.path.exists(path):
+        return
+    archive = _process_path(directory, ARCHIVE)
+    _write(archive, merge([
+        _read(archive),
+        _without_gauges(_read(path)),
+    ]))
+    os.remove(path)
+
+
+def clear_multiprocess_dir():
+    """Remove the snapshots of a previous server run."""
+    directory = _options().get('MULTIPROCESS_DIR')
+    if directory:
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            os.remove(path)
+
+
+def view_label(request):
+    """Return the view name of request, bounded to the URL patterns."""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNMATCHED
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Count requests and their latency by view."""
+
+    def process_request(self, request):
+        request._metrics_started = time.perf_counter()
+
+    def process_response(self, request, response):
+        started = getattr(request, '_metrics_started', None)
+        if started is None:
+            return response
+        view = view_label(request)
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            view=view,
+            method=request.method,
+        )
+        REQUESTS.inc(
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        write_snapshot()
+        return response
@@ -0,0 +1,171 @@
+"""
+Middleware for API responses.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+class GzipCodec:
+    """gzip content coding, with a zeroed header timestamp like Django's."""
+
+    name = 'gzip'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def _compressor(self):
+        # wbits 31 writes the gzip header and trailer
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        compressor = self._compressor()
+        return compressor.compress(data) + compressor.flush()
+
+    def compress_stream(self, chunks):
+        """Yield each chunk compressed as soon as it arrives.
+
+        A sync flush per chunk emits everything written so far, so the
+        client is never left waiting for the compressor's buffer to fill.
+        """
+        compressor = self._compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(
+                zlib.Z_SYNC_FLUSH,
+            )
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class BrotliCodec:
+    """br content coding, available when the brotli package is installed."""
+
+    name = 'br'
+
+    def __init__(self, level=4):
+        self.level = level
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def compress_stream(self, chunks):
+        """Yield each chunk compressed as soon as it arrives."""
+        compressor = brotli.Compressor(quality=self.level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+def available_codecs():
+    """Return {name: codec class} for the codings this process supports."""
+    codecs = {GzipCodec.name: GzipCodec}
+    if brotli is not None:
+        codecs[BrotliCodec.name] = BrotliCodec
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """Return {coding: qvalue} from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        accepted[coding.lower()] = qvalue
+    return accepted
+
+
+def negotiate_codec(header, preference, levels=None):
+    """Return a codec for the best coding accepted by the client or None.
+
+    Codings are ranked by the client's qvalue, then by the order of
+    preference; codings this process does not support are skipped.
+    """
+    accepted = parse_accept_encoding(header)
+    codecs = available_codecs()
+    best = None
+    for name in preference:
+        if name not in codecs:
+            continue
+        qvalue = accepted.get(name, accepted.get('*', 0.0))
+        if qvalue > 0 and (best is None or qvalue > best[0]):
+            best = (qvalue, name)
+    if best is None:
+        return None
+    codec_class = codecs[best[1]]
+    level = (levels or {}).get(best[1])
+    return codec_class() if level is None else codec_class(level)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses using the best coding the client accepts.
+
+    Only responses with a content type listed in
+    RESPONSE_COMPRESSION['CONTENT_TYPES'] are compressed, and non
+    streaming ones only from MIN_SIZE bytes and when compression makes
+    them smaller. Streaming responses are compressed chunk by chunk and
+    flushed after each, so chunks of a few KiB compress best. Like
+    Django's GZipMiddleware, strong ETags are made weak.
+    """
+
+    def process_response(self, request, response):
+        options = getattr(settings, 'RESPONSE_COMPRESSION', {})
+        if response.has_header('Content-Encoding'):
+            return response
+
+        content_type = response.get('Content-Type', '')
+        content_type = content_type.split(';')[0].strip().lower()
+        if content_type not in options.get('CONTENT_TYPES', ()):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < options.get('MIN_SIZE', 1024)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        codec = negotiate_codec(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            options.get('CODECS', ['gzip']),
+            options.get('LEVELS'),
+        )
+        if codec is None:
+            return response
+
+        if response.streaming:
+            # the compressed size is unknown until the stream ends
+            response.streaming_content = codec.compress_stream(
+                response.streaming_content,
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
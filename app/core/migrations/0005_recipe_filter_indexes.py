@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_auto_20230708_1903'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='core_recipe_user_id_bf8313_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'price'], name='core_recipe_user_id_72b3b3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'time_minutes'], name='core_recipe_user_id_ca9f7e_idx'),
+        ),
+        # The auto-created through tables only have a unique index led by
+        # recipe_id; filtering recipes by tag/ingredient scans from the
+        # other side.
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx '
+            'ON core_recipe_tags (tag_id, recipe_id);',
+            'DROP INDEX core_recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingredient_ingredient_recipe_idx '
+            'ON core_recipe_ingredient (ingredient_id, recipe_id);',
+            'DROP INDEX core_recipe_ingredient_ingredient_recipe_idx;',
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:23
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Keep the weights and text search configuration in sync with
+# recipe.search.SEARCH_CONFIG.
+CREATE_SEARCH_VECTOR_SQL = [
+    """
+    CREATE FUNCTION core_recipe_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER core_recipe_search_vector_trigger
+        BEFORE INSERT ON core_recipe
+        FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_vector_update();
+    """,
+    # Model.save() writes every column, so compare the text itself
+    """
+    CREATE TRIGGER core_recipe_search_vector_update_trigger
+        BEFORE UPDATE OF title, description ON core_recipe
+        FOR EACH ROW
+        WHEN (OLD.title IS DISTINCT FROM NEW.title
+              OR OLD.description IS DISTINCT FROM NEW.description)
+        EXECUTE PROCEDURE core_recipe_search_vector_update();
+    """,
+    # backfill existing rows, unchanged text skips the triggers
+    """
+    UPDATE core_recipe SET search_vector =
+        setweight(to_tsvector('pg_catalog.english',
+                              coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english',
+                              coalesce(description, '')), 'B');
+    """,
+    """
+    CREATE INDEX core_recipe_search_vector_gin
+        ON core_recipe USING gin (search_vector);
+    """,
+]
+
+DROP_SEARCH_VECTOR_SQL = [
+    'DROP INDEX IF EXISTS core_recipe_search_vector_gin;',
+    'DROP TRIGGER IF EXISTS core_recipe_search_vector_update_trigger '
+    'ON core_recipe;',
+    'DROP TRIGGER IF EXISTS core_recipe_search_vector_trigger ON core_recipe;',
+    'DROP FUNCTION IF EXISTS core_recipe_search_vector_update();',
+]
+
+
+def _run_on_postgresql(statements):
+    """Return a RunPython callable executing statements on PostgreSQL only.
+
+    Other backends (SQLite in tests) keep a plain, always NULL column and
+    search falls back to LIKE matching.
+    """
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run_on_postgresql(CREATE_SEARCH_VECTOR_SQL),
+            _run_on_postgresql(DROP_SEARCH_VECTOR_SQL),
+        ),
+    ]
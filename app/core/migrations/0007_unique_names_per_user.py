@@ -0,0 +1,64 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:27
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Fold duplicate (user, name) tags and ingredients into the oldest."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field_name in [('Tag', 'tags'), ('Ingredient', 'ingredient')]:
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field_name).through
+        column = model_name.lower() + '_id'
+        duplicates = (
+            model.objects.values('user_id', 'name')
+            .annotate(keep_id=Min('id'), count=Count('id'))
+            .filter(count__gt=1)
+        )
+        for group in duplicates:
+            drop_ids = list(
+                model.objects.filter(user_id=group['user_id'], name=group['name'])
+                .exclude(id=group['keep_id'])
+                .values_list('id', flat=True)
+            )
+            recipe_ids = set(
+                through.objects.filter(**{column + '__in': drop_ids})
+                .values_list('recipe_id', flat=True)
+            )
+            linked = set(
+                through.objects.filter(
+                    recipe_id__in=recipe_ids, **{column: group['keep_id']}
+                ).values_list('recipe_id', flat=True)
+            )
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{column: group['keep_id']})
+                for recipe_id in recipe_ids - linked
+            ])
+            model.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+    # Commit the merge before adding constraints; PostgreSQL refuses to
+    # ALTER a table with deferred foreign key checks still pending.
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_names,
+            migrations.RunPython.noop,
+            atomic=True,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_ingredient_name_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+    ]
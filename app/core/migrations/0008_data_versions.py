@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def create_data_versions(apps, schema_editor):
+    """Give every existing user a version row to bump."""
+    User = apps.get_model('core', 'User')
+    UserDataVersion = apps.get_model('core', 'UserDataVersion')
+    now = timezone.now()
+    UserDataVersion.objects.bulk_create([
+        UserDataVersion(user_id=user_id, version=1, updated_at=now)
+        for user_id in User.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_unique_names_per_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDataVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.user')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(create_data_versions, migrations.RunPython.noop),
+    ]
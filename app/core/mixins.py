@@ -0,0 +1,42 @@
+"""
+View mixins shared by the API apps.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+from core.db.routers import (
+    allow_replica_reads,
+    is_pinned,
+    pin_to_primary,
+    primary_reads,
+)
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from read replicas.
+
+    Authentication and permissions are checked against the primary.
+    After an unsafe request the user is pinned to the primary for
+    REPLICA_PIN_SECONDS so they read their own writes. Responses
+    streamed after the view returns read from the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with primary_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and request.user.is_authenticated
+            and not is_pinned(request.user.pk)
+        ):
+            allow_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -3,7 +3,9 @@ Database models.
 """
 from django.conf import settings
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
         AbstractBaseUser,
         BaseUserManager,
@@ -58,6 +60,7 @@ class Recipe(models.Model):
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # added post creation of tag model/class
     tags = models.ManyToManyField('Tag')
@@ -65,6 +68,16 @@ class Recipe(models.Model):
     # added post defining Ingredient class
     ingredient = models.ManyToManyField('Ingredient')
 
+    # maintained by a database trigger on PostgreSQL, see migration 0006
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            models.Index(fields=['user', 'price']),
+            models.Index(fields=['user', 'time_minutes']),
+        ]
+
     def __str__(self):
         """String representation of recipe class."""
         return self.title
@@ -77,6 +90,15 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -88,6 +110,63 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
+
+
+class UserDataVersionManager(models.Manager):
+    """Manager for per-user data versions."""
+
+    def bump(self, user_id, create=True):
+        """Increment the version of a user's recipe data.
+
+        Pass create=False while the user may be being deleted, so no new
+        row references it.
+        """
+        now = timezone.now()
+        updated = self.filter(user_id=user_id).update(
+            version=models.F('version') + 1,
+            updated_at=now,
+        )
+        if not updated and create:
+            version, created = self.get_or_create(
+                user_id=user_id,
+                defaults={'version': 1, 'updated_at': now},
+            )
+            if not created:
+                self.bump(user_id)
+
+    def current(self, user_id):
+        """Return (version, updated_at) for a user, (0, None) if unset."""
+        row = self.filter(user_id=user_id).values_list(
+            'version',
+            'updated_at',
+        ).first()
+        return row or (0, None)
+
+
+class UserDataVersion(models.Model):
+    """Change counter for a user's recipes, tags and ingredients.
+
+    Bumped on every write so conditional and cached reads can be validated
+    with a single primary key lookup.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    objects = UserDataVersionManager()
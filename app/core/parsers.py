@@ -0,0 +1,43 @@
+"""
+JSON parser backed by orjson when it is installed.
+"""
+import io
+
+from django.conf import settings
+
+from rest_framework.parsers import JSONParser
+
+from core.renderers import FastJSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised by patching
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """Parse UTF-8 JSON bodies with orjson.
+
+    Other encodings, and bodies orjson rejects, go through `JSONParser`,
+    which keeps its error messages and its handling of integers beyond
+    64 bits.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as JSON."""
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(
+                io.BytesIO(body),
+                media_type,
+                parser_context,
+            )
@@ -0,0 +1,60 @@
+"""
+JSON renderer backed by orjson when it is installed.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised by patching
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render compact JSON with orjson, falling back to DRF's renderer.
+
+    Output is JSON semantically equivalent to `JSONRenderer`'s, though
+    not always byte for byte: floats may be spelled differently, e.g.
+    1e20 for 1e+20. Types orjson does not encode the same way
+    (datetimes, Decimal, lazy strings, querysets...) go through DRF's
+    `JSONEncoder.default`. Indented output, non default
+    JSON settings and anything orjson rejects, such as integers beyond 64
+    bits, use the stdlib encoder. NaN and infinity render as null instead
+    of raising.
+    """
+
+    def _use_orjson(self, indent):
+        return (
+            orjson is not None
+            and indent is None
+            and self.compact
+            and not self.ensure_ascii
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if not self._use_orjson(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=(
+                    orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS
+                ),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escape U+2028 and U+2029 like JSONRenderer, keeping a strict
+        # javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+            ret = ret.replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,110 @@
+"""
+Signal handlers keeping caches consistent with the database.
+"""
+from django.conf import settings
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from core.authentication import get_token_cache
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    UserDataVersion,
+)
+from core.versioning import data_changed
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a token from the cache once it is deleted."""
+    get_token_cache().invalidate(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached tokens of a changed user.
+
+    Covers deactivation and password changes, and keeps the cached user
+    object from going stale on any other change.
+    """
+    if created:
+        UserDataVersion.objects.get_or_create(
+            user=instance,
+            defaults={'updated_at': timezone.now()},
+        )
+        return
+    keys = Token.objects.filter(user_id=instance.pk).values_list(
+        'key',
+        flat=True,
+    )
+    get_token_cache().invalidate(*keys)
+
+
+def _touch_recipes(recipe_ids):
+    """Mark recipes as modified when data they render changes."""
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    """Bump the owner's data version on recipe writes."""
+    data_changed(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Bump the owner's data version when a recipe is deleted."""
+    data_changed(instance.user_id, create=False)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def named_object_saved(sender, instance, created, **kwargs):
+    """Bump versions when a tag or ingredient is created or renamed."""
+    if not created:
+        _touch_recipes(list(instance.recipe_set.values_list('pk', flat=True)))
+    data_changed(instance.user_id)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def named_object_deleting(sender, instance, **kwargs):
+    """Touch recipes about to lose a tag or ingredient."""
+    _touch_recipes(list(instance.recipe_set.values_list('pk', flat=True)))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def named_object_deleted(sender, instance, **kwargs):
+    """Bump the owner's data version when a tag or ingredient is deleted."""
+    data_changed(instance.user_id, create=False)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredient.through)
+def recipe_relations_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """Touch recipes whose tags or ingredients were changed."""
+    if reverse and action == 'pre_clear':
+        # the recipes losing this tag or ingredient are unknown afterwards
+        _touch_recipes(list(instance.recipe_set.values_list('pk', flat=True)))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _touch_recipes([instance.pk])
+    elif pk_set:
+        _touch_recipes(list(pk_set))
+    data_changed(instance.user_id)
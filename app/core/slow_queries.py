@@ -0,0 +1,177 @@
+"""
+Capture of slow SQL queries, with sampled EXPLAIN plans.
+
+`record_query` in core.instrumentation times every query and passes
+those taking SLOW_QUERIES['THRESHOLD_MS'] or more to `capture`, which
+logs one JSON line on the `core.slow_queries` logger: the SQL, its
+signature, a fingerprint of its parameters, the duration, the database
+alias and the view being served. On PostgreSQL, a SAMPLE_RATE fraction
+of them also gets the plan of `EXPLAIN (ANALYZE off)`, which plans the
+query without running it again.
+
+Parameters are only fingerprinted, so repeats of one parameter set show
+without logging their values; plans do contain the values, so set
+SAMPLE_RATE to 0 where the log must not. `manage.py slow_queries`
+summarizes logged queries by signature.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_view = contextvars.ContextVar('slow_query_view', default=None)
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def _options():
+    return getattr(settings, 'SLOW_QUERIES', {})
+
+
+def threshold():
+    """Return the duration in seconds from which queries are slow."""
+    threshold_ms = _options().get('THRESHOLD_MS')
+    return None if threshold_ms is None else threshold_ms / 1000
+
+
+def set_view(name):
+    """Attribute queries of the current context to view name."""
+    _view.set(name)
+
+
+@receiver(request_finished)
+def _forget_view(sender, **kwargs):
+    """Stop attributing queries once a response, streamed or not, is sent."""
+    _view.set(None)
+
+
+def params_fingerprint(params):
+    """Return a short digest of query parameters, None without any."""
+    if params is None:
+        return None
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:12]
+
+
+def explain(connection, sql, params):
+    """Return the PostgreSQL plan of sql, None if it cannot be planned.
+
+    Runs on the raw connection so the EXPLAIN is neither recorded nor
+    timed itself, inside a savepoint when a transaction is open so a
+    failure does not abort it. Never raises: a plan is not worth failing
+    the query it describes.
+    """
+    if (
+        connection.vendor != 'postgresql'
+        or not sql.lstrip().upper().startswith(EXPLAINABLE)
+    ):
+        return None
+    try:
+        raw = connection.connection
+        savepoint = not raw.autocommit
+        with raw.cursor() as cursor:
+            if savepoint:
+                cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                cursor.execute(f'EXPLAIN (ANALYZE off) {sql}', params)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+            except Exception:
+                if savepoint:
+                    cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                raise
+            if savepoint:
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    except Exception:
+        logger.debug('Could not explain %s', sql, exc_info=True)
+        return None
+    return plan
+
+
+def capture(sql, params, many, context, duration):
+    """Log a slow query, with its plan for a sampled subset."""
+    from core.instrumentation import query_signature
+
+    connection = context['connection']
+    plan = None
+    if not many and random.random() < _options().get('SAMPLE_RATE', 0):
+        plan = explain(connection, sql, params)
+    logger.warning(json.dumps({
+        'time': time.time(),
+        'duration_ms': round(duration * 1000, 2),
+        'alias': connection.alias,
+        'view': _view.get(),
+        'signature': query_signature(sql),
+        'sql': sql,
+        'params': params_fingerprint(params),
+        'many': many,
+        'plan': plan,
+    }))
+
+
+def read_log(lines):
+    """Yield the records of slow query log lines, skipping others."""
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and 'signature' in record:
+            yield record
+
+
+def summarize(records, order_by='total', view=None):
+    """Return per signature statistics of records, worst first.
+
+    order_by is one of total, count, max or avg; durations are in ms.
+    The plan kept is that of the slowest sampled query.
+    """
+    groups = {}
+    for record in records:
+        if view is not None and record.get('view') != view:
+            continue
+        group = groups.setdefault(record['signature'], {
+            'signature': record['signature'],
+            'count': 0,
+            'total': 0.0,
+            'max': 0.0,
+            'views': {},
+            'params': set(),
+            'plan': None,
+            'plan_duration': -1.0,
+        })
+        duration = record['duration_ms']
+        group['count'] += 1
+        group['total'] += duration
+        group['max'] = max(group['max'], duration)
+        record_view = record.get('view') or '-'
+        group['views'][record_view] = group['views'].get(record_view, 0) + 1
+        group['params'].add(record.get('params'))
+        if record.get('plan') and duration > group['plan_duration']:
+            group['plan'] = record['plan']
+            group['plan_duration'] = duration
+
+    summary = []
+    for group in groups.values():
+        summary.append({
+            'signature': group['signature'],
+            'count': group['count'],
+            'total': round(group['total'], 2),
+            'avg': round(group['total'] / group['count'], 2),
+            'max': group['max'],
+            'views': sorted(
+                group['views'],
+                key=group['views'].get,
+                reverse=True,
+            ),
+            'distinct_params': len(group['params']),
+            'plan': group['plan'],
+        })
+    summary.sort(key=lambda group: group[order_by], reverse=True)
+    return summary
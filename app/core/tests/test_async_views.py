@@ -0,0 +1,251 @@
+"""
+Tests for the async views and ASGI handler.
+"""
+import asyncio
+import threading
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import path, reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from app.urls import urlpatterns as sync_urlpatterns
+from app.urls_async import urlpatterns as async_urlpatterns
+from core.asgi import AsyncViewsASGIHandler
+from core.async_views import (
+    async_patterns,
+    async_view,
+    shutdown_view_executor,
+)
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def _callbacks(patterns):
+    """Return {url name: callback} for patterns and nested resolvers."""
+    callbacks = {}
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            nested = _callbacks(pattern.url_patterns)
+            prefix = f'{pattern.namespace}:' if pattern.namespace else ''
+            callbacks.update({
+                prefix + name: callback for name, callback in nested.items()
+            })
+        elif pattern.name:
+            callbacks[pattern.name] = pattern.callback
+    return callbacks
+
+
+def thread_name_view(request):
+    return HttpResponse(threading.current_thread().name)
+
+
+class AsyncPatternsTests(SimpleTestCase):
+    """Test building the ASGI URL configuration."""
+
+    def test_reads_are_async(self):
+        """Test list, retrieve and login routes are served by async views."""
+        callbacks = _callbacks(async_urlpatterns)
+
+        for name in [
+            'recipe:recipe-list',
+            'recipe:recipe-detail',
+            'recipe:tag-list',
+            'recipe:ingredient-list',
+            'user:token',
+        ]:
+            self.assertTrue(
+                asyncio.iscoroutinefunction(callbacks[name]),
+                name,
+            )
+        for name in [
+            'recipe:recipe-search',
+            'recipe:recipe-export',
+            'recipe:tag-detail',
+            'user:me',
+        ]:
+            self.assertFalse(
+                asyncio.iscoroutinefunction(callbacks[name]),
+                name,
+            )
+
+    def test_view_attributes_kept(self):
+        """Test the async view keeps DRF's and CSRF's attributes."""
+        sync_view = _callbacks(sync_urlpatterns)['recipe:recipe-list']
+        view = _callbacks(async_urlpatterns)['recipe:recipe-list']
+
+        self.assertIs(view.cls, sync_view.cls)
+        self.assertEqual(view.actions, sync_view.actions)
+        self.assertTrue(view.csrf_exempt)
+
+    def test_predicate(self):
+        """Test only views matching the predicate are wrapped."""
+        patterns = async_patterns(
+            [path('a/', thread_name_view), path('b/', thread_name_view)],
+            predicate=lambda callback: True,
+        )
+
+        self.assertTrue(all(
+            asyncio.iscoroutinefunction(pattern.callback)
+            for pattern in patterns
+        ))
+
+
+@override_settings(ASYNC_VIEW_THREADS=2)
+class AsyncViewsASGITests(TransactionTestCase):
+    """Test serving the API through the ASGI handler.
+
+    Safe requests run on worker threads with their own connections, so
+    the data has to be committed.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.handler = AsyncViewsASGIHandler()
+        self.addCleanup(shutdown_view_executor)
+
+    def _request(self, method, path, body=b'', headers=()):
+        """Return (status, headers, body) of a request through ASGI."""
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {self.token.key}'.encode()),
+                (b'content-length', str(len(body)).encode()),
+                *headers,
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(self.handler)(scope, receive, send)
+        start = messages[0]
+        return (
+            start['status'],
+            dict(start['headers']),
+            b''.join(message.get('body', b'') for message in messages[1:]),
+        )
+
+    def test_list_matches_wsgi(self):
+        """Test ASGI list responses match the WSGI ones."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=Decimal('2.50'),
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        for url in [RECIPES_URL, TAGS_URL]:
+            status, headers, body = self._request('GET', url)
+
+            self.assertEqual(status, 200)
+            self.assertEqual(body, client.get(url).content)
+
+    @override_settings(REQUEST_INSTRUMENTATION={'SAMPLE_RATE': 1})
+    def test_instrumented_on_worker_threads(self):
+        """Test queries and rendering on worker threads are timed."""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        with self.assertLogs('core.instrumentation', 'INFO'):
+            status, headers, body = self._request('GET', TAGS_URL)
+
+        timing = headers[b'Server-Timing'].decode()
+        self.assertNotIn('desc="0 queries"', timing)
+        self.assertIn('render;dur=', timing)
+
+    @override_settings(SLOW_QUERIES={'THRESHOLD_MS': 0, 'SAMPLE_RATE': 0})
+    def test_slow_queries_on_worker_threads(self):
+        """Test queries on worker threads are attributed to their view."""
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            status, headers, body = self._request('GET', TAGS_URL)
+
+        self.assertEqual(status, 200)
+        self.assertIn('"view": "recipe:tag-list"', logs.output[-1])
+
+    def test_reads_run_on_worker_threads(self):
+        """Test safe requests run on the executor, others on Django's."""
+        view = async_view(thread_name_view)
+        request = type('Request', (), {'method': 'GET'})()
+
+        response = async_to_sync(view)(request)
+        self.assertTrue(response.content.startswith(b'async-view'))
+
+        request.method = 'POST'
+        response = async_to_sync(view)(request)
+        self.assertEqual(
+            response.content.decode(),
+            threading.current_thread().name,
+        )
+
+    def test_create(self):
+        """Test writes through ASGI."""
+        status, headers, body = self._request(
+            'POST',
+            RECIPES_URL,
+            b'{"title": "Stew", "time_minutes": 30, "price": "4.00"}',
+            [(b'content-type', b'application/json')],
+        )
+
+        self.assertEqual(status, 201)
+        self.assertTrue(Recipe.objects.filter(title='Stew').exists())
+
+    def test_login(self):
+        """Test token logins through ASGI."""
+        status, headers, body = self._request(
+            'POST',
+            reverse('user:token'),
+            b'{"email": "user@example.com", "password": "testpass123"}',
+            [(b'content-type', b'application/json')],
+        )
+
+        self.assertEqual(status, 200)
+        self.assertIn(self.token.key.encode(), body)
+
+    def test_export_streams(self):
+        """Test streaming responses run their queries off the loop."""
+        Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=Decimal('2.50'),
+        )
+
+        status, headers, body = self._request(
+            'GET',
+            reverse('recipe:recipe-export'),
+        )
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'"Soup"', body)
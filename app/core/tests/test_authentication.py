@@ -0,0 +1,153 @@
+"""
+Tests for cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import TokenCache, get_token_cache
+
+ME_URL = reverse('user:me')
+
+LOCAL_ONLY = {'MAX_SIZE': 100, 'TTL': 60, 'CACHE_ALIAS': None}
+
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-tokens',
+    },
+}
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests through the token cache."""
+
+    def setUp(self):
+        # a fresh cache per test, rebuilt on the setting change
+        override = override_settings(TOKEN_AUTH_CACHE=LOCAL_ONLY)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_query(self):
+        """Test a cached token authenticates without a query."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        stats = get_token_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates its cache entry."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates their cached token."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_refreshes_user(self):
+        """Test changing password drops the cached user."""
+        self.client.get(ME_URL)
+
+        self.user.set_password('newpass123')
+        self.user.save()
+        self.client.get(ME_URL)
+
+        self.assertEqual(get_token_cache().stats()['misses'], 2)
+
+    def test_invalid_token_not_cached(self):
+        """Test unknown tokens keep failing and are not cached."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        for _ in range(2):
+            res = self.client.get(ME_URL)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(get_token_cache().stats()['size'], 0)
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={'MAX_SIZE': 100, 'TTL': 60, 'CACHE_ALIAS': 'auth'},
+        CACHES=SHARED_CACHES,
+    )
+    def test_shared_backend_used(self):
+        """Test a process without the entry reads the shared backend."""
+        self.client.get(ME_URL)
+        get_token_cache().clear()
+
+        with self.assertNumQueries(0):
+            self.client.get(ME_URL)
+
+        self.assertEqual(get_token_cache().stats()['shared_hits'], 1)
+
+
+class TokenCacheTests(TestCase):
+    """Test the token cache container."""
+
+    def test_lru_bounded(self):
+        """Test least recently used entries are evicted past max size."""
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', 'user-a', 'token-a')
+        cache.set('b', 'user-b', 'token-b')
+        cache.get('a')
+        cache.set('c', 'user-c', 'token-c')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), ('user-a', 'token-a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    @patch('core.authentication.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are not returned after the TTL."""
+        patched_monotonic.return_value = 100
+        cache = TokenCache(max_size=2, ttl=10)
+        cache.set('a', 'user-a', 'token-a')
+
+        patched_monotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_invalidation_reaches_other_processes(self):
+        """Test a token invalidated by one process fails in the others."""
+        first = TokenCache(ttl=60, cache_alias='auth')
+        second = TokenCache(ttl=60, cache_alias='auth')
+        first.set('a', 'user-a', 'token-a')
+        self.assertEqual(second.get('a'), ('user-a', 'token-a'))
+        self.assertEqual(first.get('a'), ('user-a', 'token-a'))
+
+        second.invalidate('a')
+
+        self.assertIsNone(first.get('a'))
+        self.assertIsNone(second.get('a'))
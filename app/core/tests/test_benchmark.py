@@ -0,0 +1,155 @@
+"""
+Tests for the API benchmark helpers.
+"""
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from rest_framework.authtoken.models import Token
+
+from core import benchmark
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    UserDataVersion,
+)
+
+
+class GenerateTests(TestCase):
+    """Test generating benchmark data."""
+
+    def test_generate(self):
+        """Test users get the requested data volumes."""
+        user_ids = benchmark.generate(
+            users=2,
+            recipes=10,
+            tags=4,
+            ingredients=6,
+        )
+
+        self.assertEqual(len(user_ids), 2)
+        for user_id in user_ids:
+            user = get_user_model().objects.get(id=user_id)
+            self.assertTrue(user.check_password(benchmark.PASSWORD))
+            self.assertTrue(Token.objects.filter(user=user).exists())
+            self.assertEqual(Recipe.objects.filter(user=user).count(), 10)
+            self.assertEqual(Tag.objects.filter(user=user).count(), 4)
+            self.assertEqual(
+                Ingredient.objects.filter(user=user).count(),
+                6,
+            )
+            self.assertTrue(
+                UserDataVersion.objects.filter(user_id=user_id).exists(),
+            )
+        for recipe in Recipe.objects.prefetch_related('tags', 'ingredient'):
+            self.assertTrue(1 <= len(recipe.tags.all()) <= 4)
+            self.assertTrue(3 <= len(recipe.ingredient.all()) <= 6)
+            self.assertTrue(all(
+                tag.user_id == recipe.user_id for tag in recipe.tags.all()
+            ))
+
+    def test_generate_reuses_users(self):
+        """Test existing benchmark users are kept as they are."""
+        first = benchmark.generate(users=1, recipes=3, tags=2, ingredients=3)
+
+        second = benchmark.generate(users=2, recipes=3, tags=2, ingredients=3)
+
+        self.assertEqual(second[0], first[0])
+        self.assertEqual(Recipe.objects.count(), 6)
+
+    def test_user_contexts(self):
+        """Test scenario arguments point at the user's own data."""
+        user_ids = benchmark.generate(
+            users=1,
+            recipes=2,
+            tags=2,
+            ingredients=3,
+        )
+
+        context, = benchmark.user_contexts(user_ids)
+
+        recipe = Recipe.objects.get(id=context['recipe'])
+        self.assertEqual(recipe.user_id, user_ids[0])
+        self.assertEqual(
+            Token.objects.get(user_id=user_ids[0]).key,
+            context['token'],
+        )
+
+
+class CompareTests(SimpleTestCase):
+    """Test comparing results with a baseline."""
+
+    baseline = {
+        'recipes': {
+            'errors': 0,
+            'queries': 4,
+            'p50_ms': 10.0,
+            'p95_ms': 20.0,
+            'peak_memory_kb': 100,
+            'throughput': 100.0,
+        },
+    }
+
+    def test_within_threshold(self):
+        """Test results within the threshold pass."""
+        results = {'recipes': {
+            'errors': 0,
+            'queries': 4,
+            'p50_ms': 12.0,
+            'p95_ms': 25.0,
+            'peak_memory_kb': 120,
+            'throughput': 80.0,
+        }}
+
+        self.assertEqual(
+            benchmark.compare(results, self.baseline, threshold=0.25),
+            [],
+        )
+
+    def test_regressions(self):
+        """Test each regressed metric is reported."""
+        results = {'recipes': {
+            'errors': 1,
+            'queries': 5,
+            'p50_ms': 10.0,
+            'p95_ms': 30.0,
+            'peak_memory_kb': 100,
+            'throughput': 70.0,
+        }}
+
+        regressions = benchmark.compare(results, self.baseline, 0.25)
+
+        self.assertEqual(
+            [regression.split()[1] for regression in regressions],
+            ['errors', 'queries', 'p95_ms', 'throughput'],
+        )
+
+    def test_slack(self):
+        """Test small absolute latency changes are not regressions."""
+        baseline = {'me': {'p50_ms': 1.0}}
+
+        self.assertEqual(
+            benchmark.compare({'me': {'p50_ms': 1.9}}, baseline, 0.25),
+            [],
+        )
+        self.assertEqual(
+            len(benchmark.compare({'me': {'p50_ms': 2.5}}, baseline, 0.25)),
+            1,
+        )
+
+    def test_missing_metrics_skipped(self):
+        """Test scenarios and metrics absent from either side are skipped."""
+        results = {
+            'recipes': {'p95_ms': 20.0, 'queries': None},
+            'tags': {'p95_ms': 1000.0},
+        }
+
+        self.assertEqual(benchmark.compare(results, self.baseline), [])
+
+    def test_percentile(self):
+        """Test percentiles use the nearest rank."""
+        values = list(range(1, 101))
+
+        self.assertEqual(benchmark.percentile(values, 50), 51)
+        self.assertEqual(benchmark.percentile(values, 99), 100)
+        self.assertEqual(benchmark.percentile([3], 95), 3)
@@ -0,0 +1,235 @@
+"""
+Tests for database connection pooling and health checks.
+"""
+import sqlite3
+import threading
+import time
+from unittest import skipUnless
+
+from django.db import OperationalError, connection, connections
+from django.test import SimpleTestCase
+
+from core.db.pool import (
+    ConnectionPool,
+    PoolTimeout,
+    close_pools,
+    get_or_create_pool,
+    get_pools,
+)
+
+
+def sqlite_factory():
+    """Open an in-memory SQLite connection standing in for PostgreSQL."""
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the connection pool with SQLite connections."""
+
+    def test_reuses_connections(self):
+        """Test released connections are handed out again."""
+        pool = ConnectionPool(sqlite_factory, max_size=2)
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+
+        self.assertIs(first, second)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['acquired'], 2)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_overflow_and_timeout(self):
+        """Test overflow connections are closed and waits time out."""
+        pool = ConnectionPool(
+            sqlite_factory,
+            max_size=1,
+            max_overflow=1,
+            timeout=0.05,
+        )
+        first = pool.acquire()
+        second = pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        pool.release(second)
+        pool.release(first)
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['open'], 1)
+        self.assertEqual(stats['idle'], 1)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            second.execute('SELECT 1')
+
+    def test_wait_metrics(self):
+        """Test waiting for a released connection is measured."""
+        pool = ConnectionPool(sqlite_factory, max_size=1, timeout=5)
+        held = pool.acquire()
+        timer = threading.Timer(0.1, pool.release, [held])
+        timer.start()
+        self.addCleanup(timer.join)
+
+        started = time.monotonic()
+        connection = pool.acquire()
+
+        self.assertIs(connection, held)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreaterEqual(stats['wait_time_max'], 0.05)
+        self.assertGreater(stats['wait_time_avg'], 0)
+
+    def test_check_discards_connections(self):
+        """Test idle connections failing the check are replaced."""
+        pool = ConnectionPool(sqlite_factory, check=lambda conn: False)
+        first = pool.acquire()
+        pool.release(first)
+
+        second = pool.acquire()
+
+        self.assertIsNot(first, second)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_check_runs_outside_lock(self):
+        """Test a slow check does not hold up other threads."""
+        checking = threading.Event()
+        answer = threading.Event()
+        pool = ConnectionPool(sqlite_factory, max_size=2, timeout=5)
+        slow = pool.acquire()
+        fast = pool.acquire()
+        pool.release(slow)
+
+        def check(conn):
+            if conn is slow:
+                checking.set()
+                return answer.wait(5)
+            return True
+
+        pool.check = check
+        result = []
+        thread = threading.Thread(target=lambda: result.append(pool.acquire()))
+        thread.start()
+        self.addCleanup(thread.join)
+        self.assertTrue(checking.wait(5))
+
+        started = time.monotonic()
+        pool.release(fast)
+        self.assertIs(pool.acquire(), fast)
+        self.assertEqual(pool.stats()['in_use'], 2)
+        self.assertLess(time.monotonic() - started, 1)
+
+        answer.set()
+        thread.join()
+        self.assertEqual(result, [slow])
+
+    def test_reset_on_release(self):
+        """Test connections are reset or discarded on release."""
+        def reset(conn):
+            conn.rollback()
+            return not getattr(conn, 'broken', False)
+
+        pool = ConnectionPool(lambda: _Connection(), reset=reset)
+        conn = pool.acquire()
+        conn.broken = True
+        pool.release(conn)
+
+        self.assertTrue(conn.rolled_back)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['open'], 0)
+
+    def test_factory_error_frees_slot(self):
+        """Test a failed connect does not leak capacity."""
+        def factory():
+            raise sqlite3.OperationalError('unreachable')
+
+        pool = ConnectionPool(factory, max_size=1, timeout=0.01)
+        for _ in range(2):
+            with self.assertRaises(sqlite3.OperationalError):
+                pool.acquire()
+
+        self.assertEqual(pool.stats()['open'], 0)
+
+    def test_registry(self):
+        """Test pools are built once per alias and key and closed."""
+        built = []
+
+        def build():
+            built.append(ConnectionPool(sqlite_factory))
+            return built[-1]
+
+        pool = get_or_create_pool('pool-test', 'key', build)
+        self.assertIs(get_or_create_pool('pool-test', 'key', build), pool)
+        self.assertEqual(get_pools()['pool-test'], [pool])
+
+        close_pools('pool-test')
+
+        self.assertNotIn('pool-test', get_pools())
+        self.assertEqual(len(built), 1)
+
+
+class _Connection:
+    """Minimal DB-API connection recording calls."""
+
+    rolled_back = False
+    closed = False
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL backend only')
+class PostgreSQLBackendTests(SimpleTestCase):
+    """Test pooling and health checks of the PostgreSQL backend."""
+
+    def make_wrapper(self, **settings):
+        wrapper = type(connections['default'])(
+            {**connection.settings_dict, **settings},
+            alias='pool-test',
+        )
+        self.addCleanup(close_pools, 'pool-test')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pooled_connection_reused(self):
+        """Test closing returns the connection to the pool."""
+        wrapper = self.make_wrapper(
+            POOL={'MAX_SIZE': 2, 'TIMEOUT': 1},
+            CONN_MAX_AGE=0,
+        )
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw)
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
+        pool = get_pools()['pool-test'][0]
+        self.assertEqual(pool.stats()['created'], 1)
+
+    def test_pool_timeout(self):
+        """Test exhausted pools raise OperationalError."""
+        wrapper = self.make_wrapper(POOL={'MAX_SIZE': 1, 'TIMEOUT': 0.01})
+        other = self.make_wrapper(POOL={'MAX_SIZE': 1, 'TIMEOUT': 0.01})
+        wrapper.ensure_connection()
+
+        with self.assertRaises(OperationalError):
+            other.ensure_connection()
+
+    def test_health_check_reconnects(self):
+        """Test a dead persistent connection is replaced on next use."""
+        wrapper = self.make_wrapper(HEALTH_CHECKS=True, CONN_MAX_AGE=60)
+        wrapper.ensure_connection()
+        wrapper.connection.close()
+
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
@@ -0,0 +1,136 @@
+"""
+Tests for the password hashers.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    check_password,
+    identify_hasher,
+    make_password,
+)
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher
+
+TOKEN_URL = reverse('user:token')
+
+# cheap parameters keep the tests fast
+FAST_HASHING = {
+    'PBKDF2_ITERATIONS': 1000,
+    'SCRYPT_N': 2 ** 10,
+    'SCRYPT_R': 8,
+    'SCRYPT_P': 1,
+}
+
+
+@override_settings(PASSWORD_HASHING=FAST_HASHING)
+class HasherTests(SimpleTestCase):
+    """Test hashing with parameters from settings."""
+
+    def test_scrypt(self):
+        """Test scrypt hashes verify and encode their parameters."""
+        hasher = ScryptPasswordHasher()
+
+        encoded = hasher.encode('pass123', hasher.salt())
+
+        self.assertTrue(encoded.startswith('scrypt$1024$'))
+        self.assertTrue(hasher.verify('pass123', encoded))
+        self.assertFalse(hasher.verify('pass124', encoded))
+        self.assertEqual(
+            hasher.safe_summary(encoded)['work factor'],
+            1024,
+        )
+        self.assertFalse(hasher.must_update(encoded))
+
+    def test_scrypt_parameters_changed(self):
+        """Test hashes with other parameters verify but need updating."""
+        hasher = ScryptPasswordHasher()
+        encoded = hasher.encode('pass123', hasher.salt())
+
+        with override_settings(PASSWORD_HASHING={
+            **FAST_HASHING,
+            'SCRYPT_N': 2 ** 11,
+        }):
+            self.assertTrue(hasher.verify('pass123', encoded))
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_pbkdf2_iterations(self):
+        """Test PBKDF2 iterations come from settings."""
+        hasher = PBKDF2PasswordHasher()
+        encoded = hasher.encode('pass123', hasher.salt())
+
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        with override_settings(PASSWORD_HASHING={
+            **FAST_HASHING,
+            'PBKDF2_ITERATIONS': 2000,
+        }):
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_default_hasher(self):
+        """Test new passwords use scrypt and old PBKDF2 ones verify."""
+        self.assertEqual(
+            identify_hasher(make_password('pass123')).algorithm,
+            'scrypt',
+        )
+        self.assertTrue(check_password(
+            'pass123',
+            make_password('pass123', hasher='pbkdf2_sha256'),
+        ))
+
+
+@override_settings(PASSWORD_HASHING=FAST_HASHING)
+class RehashOnLoginTests(TestCase):
+    """Test passwords are rehashed when logging in."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.login = {'email': 'user@example.com', 'password': 'testpass123'}
+
+    def test_rehash_old_algorithm(self):
+        """Test a PBKDF2 hash is replaced by scrypt on login."""
+        self.user.password = make_password(
+            'testpass123',
+            hasher='pbkdf2_sha256',
+        )
+        self.user.save()
+
+        res = self.client.post(TOKEN_URL, self.login)
+
+        self.assertEqual(res.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$1024$'))
+
+    def test_rehash_changed_parameters(self):
+        """Test a hash is redone when its cost parameters change."""
+        with override_settings(PASSWORD_HASHING={
+            **FAST_HASHING,
+            'SCRYPT_N': 2 ** 11,
+        }):
+            res = self.client.post(TOKEN_URL, self.login)
+
+        self.assertEqual(res.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$2048$'))
+
+    def test_failed_login_keeps_hash(self):
+        """Test a wrong password does not rehash."""
+        password = self.user.password
+
+        with override_settings(PASSWORD_HASHING={
+            **FAST_HASHING,
+            'SCRYPT_N': 2 ** 11,
+        }):
+            res = self.client.post(
+                TOKEN_URL,
+                {**self.login, 'password': 'wrong'},
+            )
+
+        self.assertEqual(res.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, password)
@@ -0,0 +1,149 @@
+"""
+Tests for the request instrumentation.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import instrumentation
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class QuerySignatureTests(SimpleTestCase):
+    """Test grouping queries by shape."""
+
+    def test_literals_and_parameters(self):
+        """Test literals and parameter lists do not change signatures."""
+        self.assertEqual(
+            instrumentation.query_signature(
+                "SELECT * FROM t WHERE a = %s AND b = 'x''y' AND c IN "
+                "(%s, %s, %s) LIMIT 21",
+            ),
+            'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (?) LIMIT ?',
+        )
+        self.assertEqual(
+            instrumentation.query_signature('SELECT 1 FROM t WHERE id = 2'),
+            instrumentation.query_signature('SELECT 1 FROM t WHERE id = 7'),
+        )
+        self.assertEqual(
+            instrumentation.query_signature(
+                'INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)',
+            ),
+            'INSERT INTO t (a, b) VALUES (?)',
+        )
+
+    def test_duplicates(self):
+        """Test queries repeated threshold times are reported."""
+        metrics = instrumentation.RequestMetrics()
+        for tag_id in range(6):
+            metrics.add_query(
+                f'SELECT * FROM core_tag WHERE id = {tag_id}',
+                0.001,
+            )
+        metrics.add_query('SELECT * FROM core_recipe', 0.001)
+
+        self.assertEqual(
+            metrics.duplicates(5),
+            [('SELECT * FROM core_tag WHERE id = ?', 6)],
+        )
+        self.assertEqual(metrics.duplicates(7), [])
+
+    def test_nested_timers_count_once(self):
+        """Test nested blocks of a phase are not counted twice."""
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation._current.set(metrics)
+        self.addCleanup(instrumentation._current.reset, token)
+
+        with instrumentation.timer('serialize'):
+            with instrumentation.timer('serialize'):
+                pass
+        first = metrics.phases['serialize']
+        with instrumentation.timer('serialize'):
+            pass
+
+        self.assertGreater(metrics.phases['serialize'], first)
+        self.assertEqual(metrics._open['serialize'], 0)
+
+    def test_timer_without_request(self):
+        """Test timers outside sampled requests record nothing."""
+        with instrumentation.timer('serialize'):
+            pass
+
+        self.assertIsNone(instrumentation.current_metrics())
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    """Test timing sampled requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=Decimal('2.50'),
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+    @override_settings(REQUEST_INSTRUMENTATION={'SAMPLE_RATE': 1})
+    def test_sampled_request(self):
+        """Test sampled requests get Server-Timing and a log line."""
+        detail_url = reverse(
+            'recipe:recipe-detail',
+            args=[Recipe.objects.get().id],
+        )
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as captured:
+                res = self.client.get(detail_url)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        for name in ['serialize', 'render', 'total']:
+            self.assertIn(f'{name};dur=', timing)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'recipe:recipe-detail')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], len(captured))
+        self.assertEqual(record['duplicates'], [])
+        self.assertGreater(record['serialize_ms'], 0)
+
+    @override_settings(REQUEST_INSTRUMENTATION={
+        'SAMPLE_RATE': 1,
+        'SERVER_TIMING': False,
+        'N_PLUS_ONE_THRESHOLD': 1,
+    })
+    def test_log_only(self):
+        """Test the header can be left out and duplicates reported."""
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record['duplicates'])
+        self.assertEqual(
+            sum(item['count'] for item in record['duplicates']),
+            record['queries'],
+        )
+
+    @override_settings(REQUEST_INSTRUMENTATION={'SAMPLE_RATE': 0})
+    def test_unsampled_request(self):
+        """Test unsampled requests are left alone."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertIsNone(instrumentation.current_metrics())
@@ -0,0 +1,305 @@
+"""
+Tests for the metrics registry and scrape endpoint.
+"""
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import metrics
+
+METRICS_URL = reverse('metrics')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample(snapshot, name, **labels):
+    """Return the value of name for labels in snapshot, None if absent."""
+    description = snapshot[name]
+    key = [str(labels[label]) for label in description['labels']]
+    for values, value in description['samples']:
+        if values == key:
+            return value
+    return None
+
+
+class RegistryTests(SimpleTestCase):
+    """Test metrics, merging and the text format."""
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_and_gauge(self):
+        """Test counters add up and gauges keep the last value."""
+        counter = self.registry.register(
+            metrics.Counter('jobs_total', 'Jobs.', ['kind']),
+        )
+        gauge = self.registry.register(metrics.Gauge('queue', 'Queued.'))
+        counter.inc(kind='a')
+        counter.inc(2, kind='a')
+        counter.inc(kind='b')
+        gauge.set(5)
+        gauge.set(3)
+
+        snapshot = self.registry.snapshot()
+
+        self.assertEqual(sample(snapshot, 'jobs_total', kind='a'), 3)
+        self.assertEqual(sample(snapshot, 'jobs_total', kind='b'), 1)
+        self.assertEqual(sample(snapshot, 'queue'), 3)
+
+    def test_duplicate_name(self):
+        """Test a name can only be registered once."""
+        self.registry.register(metrics.Gauge('queue', 'Queued.'))
+
+        with self.assertRaises(ValueError):
+            self.registry.register(metrics.Counter('queue', 'Queued.'))
+
+    def test_collectors_run_on_snapshot(self):
+        """Test collectors update metrics before each snapshot."""
+        gauge = self.registry.register(metrics.Gauge('queue', 'Queued.'))
+        sizes = iter([4, 7])
+        self.registry.add_collector(lambda: gauge.set(next(sizes)))
+
+        self.assertEqual(sample(self.registry.snapshot(), 'queue'), 4)
+        self.assertEqual(sample(self.registry.snapshot(), 'queue'), 7)
+
+    def test_render(self):
+        """Test rendering histograms cumulatively and escaping labels."""
+        histogram = self.registry.register(metrics.Histogram(
+            'latency_seconds',
+            'Latency.',
+            ['view'],
+            buckets=(0.1, 1.0),
+        ))
+        for value in [0.05, 0.5, 0.5, 3.0]:
+            histogram.observe(value, view='a"b')
+
+        text = metrics.render(self.registry.snapshot())
+
+        self.assertEqual(text, '\n'.join([
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{view="a\\"b",le="0.1"} 1',
+            'latency_seconds_bucket{view="a\\"b",le="1"} 3',
+            'latency_seconds_bucket{view="a\\"b",le="+Inf"} 4',
+            'latency_seconds_sum{view="a\\"b"} 4.05',
+            'latency_seconds_count{view="a\\"b"} 4',
+        ]) + '\n')
+
+    def test_merge(self):
+        """Test merging adds values with the same labels."""
+        counter = self.registry.register(
+            metrics.Counter('jobs_total', 'Jobs.', ['kind']),
+        )
+        histogram = self.registry.register(
+            metrics.Histogram('seconds', 'Time.', buckets=(1.0,)),
+        )
+        counter.inc(kind='a')
+        histogram.observe(0.5)
+        first = self.registry.snapshot()
+        counter.inc(kind='b')
+        histogram.observe(2.0)
+
+        merged = metrics.merge([first, self.registry.snapshot()])
+
+        self.assertEqual(sample(merged, 'jobs_total', kind='a'), 2)
+        self.assertEqual(sample(merged, 'jobs_total', kind='b'), 1)
+        self.assertEqual(sample(merged, 'seconds'), [2, 1, 3.0])
+
+
+class MultiprocessTests(SimpleTestCase):
+    """Test summing the metrics of worker processes."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(METRICS={
+            'MULTIPROCESS_DIR': self.directory,
+            'WRITE_INTERVAL': 5,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _write_worker(self, pid, requests, pool_open):
+        path = os.path.join(self.directory, f'{pid}.json')
+        with open(path, 'w') as f:
+            json.dump({
+                'http_requests_total': {
+                    'type': 'counter',
+                    'help': 'HTTP requests.',
+                    'labels': ['view', 'method', 'status'],
+                    'samples': [[['worker-view', 'GET', '200'], requests]],
+                },
+                'db_pool_connections': {
+                    'type': 'gauge',
+                    'help': 'Pooled connections.',
+                    'labels': ['alias', 'state'],
+                    'samples': [[['default', 'open'], pool_open]],
+                },
+            }, f)
+
+    def test_collect_sums_workers(self):
+        """Test scrapes sum workers, dropping gauges of dead ones."""
+        self._write_worker(os.getppid(), 3, 2)
+        # no process has a pid this large
+        self._write_worker(2 ** 30, 4, 5)
+
+        snapshot = metrics.collect()
+
+        self.assertEqual(
+            sample(
+                snapshot,
+                'http_requests_total',
+                view='worker-view',
+                method='GET',
+                status=200,
+            ),
+            7,
+        )
+        self.assertEqual(
+            sample(
+                snapshot,
+                'db_pool_connections',
+                alias='default',
+                state='open',
+            ),
+            2,
+        )
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, f'{os.getpid()}.json'),
+        ))
+
+    def test_mark_process_dead(self):
+        """Test exited workers are folded into the archive."""
+        self._write_worker(2 ** 30, 4, 5)
+        self._write_worker(2 ** 30 + 1, 1, 1)
+
+        metrics.mark_process_dead(2 ** 30)
+        metrics.mark_process_dead(2 ** 30 + 1)
+
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['archive.json'],
+        )
+        with open(os.path.join(self.directory, 'archive.json')) as f:
+            archive = json.load(f)
+        self.assertNotIn('db_pool_connections', archive)
+        self.assertEqual(
+            sample(
+                archive,
+                'http_requests_total',
+                view='worker-view',
+                method='GET',
+                status=200,
+            ),
+            5,
+        )
+
+        metrics.clear_multiprocess_dir()
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+@override_settings(METRICS={'ALLOWED_IPS': ['127.0.0.1']})
+class MetricsEndpointTests(TestCase):
+    """Test the scrape endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_requests_and_queries_counted(self):
+        """Test API requests and their queries show in the metrics."""
+        view = 'recipe:recipe-list'
+        before = metrics.registry.snapshot()
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res['Content-Type'],
+            'text/plain; version=0.0.4; charset=utf-8',
+        )
+        after = metrics.registry.snapshot()
+        self.assertEqual(
+            sample(
+                after,
+                'http_requests_total',
+                view=view,
+                method='GET',
+                status=200,
+            ) - (sample(
+                before,
+                'http_requests_total',
+                view=view,
+                method='GET',
+                status=200,
+            ) or 0),
+            2,
+        )
+        queries = sample(after, 'db_query_duration_seconds', alias='default')
+        self.assertGreater(sum(queries[:-1]), 0)
+        text = res.content.decode()
+        self.assertIn(
+            f'http_requests_total{{view="{view}",method="GET",'
+            f'status="200"}}',
+            text,
+        )
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('auth_token_cache_lookups_total{result="hit"}', text)
+        self.assertIn('cache_lookups_total{cache="response"', text)
+
+    def test_unmatched_paths_share_a_label(self):
+        """Test unknown paths do not add a label value each."""
+        self.client.get('/nope/1')
+        self.client.get('/nope/2')
+
+        snapshot = metrics.registry.snapshot()
+
+        self.assertGreaterEqual(
+            sample(
+                snapshot,
+                'http_requests_total',
+                view=metrics.UNMATCHED,
+                method='GET',
+                status=404,
+            ),
+            2,
+        )
+
+    @override_settings(METRICS={'TOKEN': 'secret'})
+    def test_token_required(self):
+        """Test the endpoint requires the configured bearer token."""
+        client = APIClient()
+
+        self.assertEqual(client.get(METRICS_URL).status_code, 403)
+        res = client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS={'ALLOWED_IPS': ['10.0.0.5']})
+    def test_allowed_ips(self):
+        """Test only allow-listed addresses may scrape without a token."""
+        client = APIClient()
+
+        self.assertEqual(client.get(METRICS_URL).status_code, 403)
+        res = client.get(METRICS_URL, REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS={})
+    def test_denied_by_default(self):
+        """Test the endpoint is hidden when no access is configured."""
+        self.assertEqual(APIClient().get(METRICS_URL).status_code, 404)
+
+        with override_settings(DEBUG=True):
+            self.assertEqual(APIClient().get(METRICS_URL).status_code, 200)
@@ -0,0 +1,160 @@
+"""
+Tests for API response middleware.
+"""
+import gzip
+import json
+import zlib
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from core import middleware
+from core.middleware import (
+    CompressionMiddleware,
+    negotiate_codec,
+    parse_accept_encoding,
+)
+
+COMPRESSION = {
+    'MIN_SIZE': 100,
+    'CODECS': ['br', 'gzip'],
+    'LEVELS': {'gzip': 6},
+    'CONTENT_TYPES': ['application/json', 'application/x-ndjson'],
+}
+BODY = json.dumps([{'id': i, 'title': 'Recipe'} for i in range(50)]).encode()
+
+
+@override_settings(RESPONSE_COMPRESSION=COMPRESSION)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def json_response(self, body=BODY, **headers):
+        response = HttpResponse(body, content_type='application/json')
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def test_compresses_json(self):
+        """Test large JSON responses are gzipped."""
+        response = self.process(self.json_response(ETag='"1.2.abc"'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(
+            response['Content-Length'],
+            str(len(response.content)),
+        )
+        self.assertEqual(response['ETag'], 'W/"1.2.abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_response(self):
+        """Test responses below MIN_SIZE are sent as is."""
+        response = self.process(self.json_response(b'{"id": 1}'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_content_type_not_allowed(self):
+        """Test content types outside the allow-list are sent as is."""
+        response = self.process(HttpResponse(BODY, content_type='text/html'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_not_accepted(self):
+        """Test clients not accepting a coding get identity."""
+        response = self.process(self.json_response(), 'identity, gzip;q=0')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_already_encoded(self):
+        """Test encoded responses are not compressed twice."""
+        response = self.process(
+            self.json_response(**{'Content-Encoding': 'gzip'}),
+        )
+
+        self.assertEqual(response.content, BODY)
+
+    def test_streaming(self):
+        """Test streaming responses are compressed without buffering."""
+        consumed = []
+
+        def lines():
+            for i in range(1000):
+                consumed.append(i)
+                yield json.dumps({'id': i}).encode() + b'\n'
+
+        response = StreamingHttpResponse(
+            lines(),
+            content_type='application/x-ndjson',
+        )
+        response = self.process(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(consumed, [])
+        chunks = iter(response.streaming_content)
+        first = next(chunks)
+        # each chunk is flushed, so it decompresses on arrival
+        self.assertEqual(consumed, [0])
+        self.assertEqual(
+            zlib.decompressobj(31).decompress(first),
+            b'{"id": 0}\n',
+        )
+        body = gzip.decompress(first + b''.join(chunks))
+        self.assertEqual(body.count(b'\n'), 1000)
+
+    def test_brotli_preferred_when_available(self):
+        """Test br is chosen when installed and accepted."""
+        brotli = mock.Mock()
+        brotli.compress.return_value = b'br'
+        with mock.patch.object(middleware, 'brotli', brotli):
+            response = self.process(self.json_response(), 'gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'br')
+
+    @mock.patch.object(middleware, 'brotli', None)
+    def test_brotli_unavailable(self):
+        """Test gzip is used when brotli is not installed."""
+        response = self.process(self.json_response(), 'br, gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class NegotiationTests(SimpleTestCase):
+    """Test Accept-Encoding negotiation."""
+
+    def test_parse_accept_encoding(self):
+        """Test codings and qvalues are parsed."""
+        accepted = parse_accept_encoding('gzip;q=0.5, BR, *;q=0, x;q=bad')
+
+        self.assertEqual(
+            accepted,
+            {'gzip': 0.5, 'br': 1.0, '*': 0.0, 'x': 0.0},
+        )
+
+    @mock.patch.object(middleware, 'brotli', mock.Mock())
+    def test_qvalue_then_preference(self):
+        """Test client qvalues win over server preference."""
+        preference = ['br', 'gzip']
+
+        codec = negotiate_codec('br;q=0.5, gzip', preference)
+        self.assertEqual(codec.name, 'gzip')
+
+        codec = negotiate_codec('gzip, br', preference)
+        self.assertEqual(codec.name, 'br')
+
+        codec = negotiate_codec('*', preference, {'br': 9})
+        self.assertEqual((codec.name, codec.level), ('br', 9))
+
+        self.assertIsNone(negotiate_codec('deflate', preference))
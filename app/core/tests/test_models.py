@@ -7,6 +7,7 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.versioning import coalesce_data_changes
 
 
 def create_user(email='user@example.com', password='TestPass123'):
@@ -92,3 +93,48 @@ class TModelTest(TestCase):
         )
 
         self.assertEqual(str(ingredient), ingredient.name)
+
+    def test_data_version_bumped_on_changes(self):
+        """Test recipe writes increment the user's data version."""
+        user = create_user()
+        start, _ = models.UserDataVersion.objects.current(user.pk)
+
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Sample recipe name',
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+        recipe.tags.add(models.Tag.objects.create(user=user, name='Tag1'))
+
+        version, updated_at = models.UserDataVersion.objects.current(user.pk)
+        self.assertEqual(version, start + 3)
+        self.assertIsNotNone(updated_at)
+
+    def test_coalesced_data_changes(self):
+        """Test changes inside coalesce_data_changes bump once."""
+        user = create_user()
+        start, _ = models.UserDataVersion.objects.current(user.pk)
+
+        with coalesce_data_changes():
+            for name in ['Tag1', 'Tag2', 'Tag3']:
+                models.Tag.objects.create(user=user, name=name)
+
+        version, _ = models.UserDataVersion.objects.current(user.pk)
+        self.assertEqual(version, start + 1)
+
+    def test_delete_user_with_recipes(self):
+        """Test deleting a user cascades without recreating versions."""
+        user = create_user()
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Sample recipe name',
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+        recipe.tags.add(models.Tag.objects.create(user=user, name='Tag1'))
+
+        user.delete()
+
+        self.assertFalse(models.UserDataVersion.objects.exists())
+        self.assertFalse(models.Recipe.objects.exists())
@@ -0,0 +1,140 @@
+"""
+Tests for the JSON renderer and parser.
+"""
+import datetime
+import io
+import json
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+SAMPLE = OrderedDict([
+    ('id', 1),
+    ('title', 'Crème brûlée \u2028 line \u2029 para "quoted"'),
+    ('price', Decimal('5.50')),
+    ('price_text', '5.50'),
+    ('created', datetime.datetime(
+        2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc,
+    )),
+    ('date', datetime.date(2024, 5, 1)),
+    ('duration', datetime.timedelta(minutes=90)),
+    ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+    ('lazy', gettext_lazy('Invalid input.')),
+    ('error', ErrorDetail('This field is required.', code='required')),
+    ('tuple', (1, 2)),
+    ('ints', {1: 'one', 2: 'two'}),
+    ('nested', [{'id': 2, 'name': 'Tag', 'flag': True, 'none': None}]),
+    ('float', 0.1),
+    ('floats', [1e-05, 1e20, -2.5e-300]),
+])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test rendering with orjson."""
+
+    def test_matches_json_renderer(self):
+        """Test output parses to the same values as DRF's renderer's."""
+        expected = JSONRenderer().render(SAMPLE)
+
+        rendered = FastJSONRenderer().render(SAMPLE)
+
+        self.assertEqual(json.loads(rendered), json.loads(expected))
+        self.assertIn(b'\\u2028', rendered)
+        self.assertIn(b'\\u2029', rendered)
+
+    def test_decimal_price(self):
+        """Test raw Decimal prices render like DRF's encoder."""
+        data = {'price': Decimal('12.30')}
+
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_indent_uses_stdlib(self):
+        """Test indented output matches DRF's renderer."""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type),
+            JSONRenderer().render(SAMPLE, media_type),
+        )
+
+    def test_large_int_falls_back(self):
+        """Test values orjson rejects go through the stdlib encoder."""
+        data = {'big': 2 ** 70}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            b'{"big":1180591620717411303424}',
+        )
+
+    def test_none(self):
+        """Test None renders an empty body."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    @mock.patch('core.renderers.orjson', None)
+    def test_without_orjson(self):
+        """Test the renderer works when orjson is not installed."""
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE),
+        )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test parsing with orjson."""
+
+    def parse(self, body, parser_context=None):
+        return FastJSONParser().parse(
+            io.BytesIO(body),
+            'application/json',
+            parser_context,
+        )
+
+    def test_matches_json_parser(self):
+        """Test parsed data equals DRF's parser."""
+        body = JSONRenderer().render(SAMPLE)
+
+        self.assertEqual(
+            self.parse(body),
+            JSONParser().parse(io.BytesIO(body), 'application/json'),
+        )
+
+    def test_invalid_body(self):
+        """Test invalid JSON raises DRF's parse error."""
+        with self.assertRaisesRegex(ParseError, 'JSON parse error'):
+            self.parse(b'{"title": ')
+
+    def test_nan_rejected(self):
+        """Test NaN is rejected like in strict JSON mode."""
+        with self.assertRaises(ParseError):
+            self.parse(b'{"price": NaN}')
+
+    def test_large_int(self):
+        """Test integers beyond 64 bits are parsed."""
+        self.assertEqual(self.parse(b'[18446744073709551616]'), [2 ** 64])
+
+    def test_other_encoding(self):
+        """Test non UTF-8 bodies are decoded with their charset."""
+        body = '{"title": "Crème"}'.encode('latin-1')
+
+        data = self.parse(body, {'encoding': 'latin-1'})
+
+        self.assertEqual(data, {'title': 'Crème'})
+
+    @mock.patch('core.parsers.orjson', None)
+    def test_without_orjson(self):
+        """Test the parser works when orjson is not installed."""
+        self.assertEqual(self.parse(b'{"id": 1}'), {'id': 1})
@@ -0,0 +1,228 @@
+"""
+Tests for routing reads to replicas.
+"""
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.checks import check_replica_pin_cache
+from core.db import routers
+from core.db.routers import (
+    ReplicaRouter,
+    allow_replica_reads,
+    primary_reads,
+    reset_lag_checks,
+)
+from core.models import Recipe
+
+RECIPE_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_MAX_LAG=5)
+class ReplicaRouterTests(SimpleTestCase):
+    """Test routing decisions."""
+
+    def setUp(self):
+        reset_lag_checks()
+        self.addCleanup(reset_lag_checks)
+        self.router = ReplicaRouter()
+
+    @mock.patch.object(routers, 'measure_lag', return_value=0.5)
+    def test_reads_in_replica_scope(self, measure_lag):
+        """Test only reads allowed in a scope go to replicas."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+        with primary_reads():
+            self.assertIsNone(self.router.db_for_read(Recipe))
+            allow_replica_reads()
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica')
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    @override_settings(REPLICA_DATABASES=['replica', 'replica_2'])
+    @mock.patch.object(routers, 'measure_lag', return_value=0.5)
+    def test_one_replica_per_scope(self, measure_lag):
+        """Test every read of a scope goes to the replica picked for it."""
+        with mock.patch.object(
+            routers.random, 'choice', side_effect=['replica_2', 'replica'],
+        ) as choice:
+            with primary_reads():
+                allow_replica_reads()
+                aliases = {
+                    self.router.db_for_read(Recipe) for _read in range(5)
+                }
+            with primary_reads():
+                allow_replica_reads()
+                next_scope = self.router.db_for_read(Recipe)
+
+        self.assertEqual(aliases, {'replica_2'})
+        self.assertEqual(next_scope, 'replica')
+        choice.assert_called_with(['replica', 'replica_2'])
+
+    @mock.patch.object(routers, 'measure_lag', return_value=30)
+    def test_lagging_replica(self, measure_lag):
+        """Test lagging replicas are skipped and checks are remembered."""
+        with primary_reads():
+            allow_replica_reads()
+            self.assertIsNone(self.router.db_for_read(Recipe))
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+        measure_lag.assert_called_once_with('replica')
+
+    @mock.patch.object(routers, 'measure_lag', side_effect=DatabaseError)
+    def test_unreachable_replica(self, measure_lag):
+        """Test replicas failing the lag check are skipped."""
+        with primary_reads():
+            allow_replica_reads()
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_no_migrations_on_replicas(self):
+        """Test migrations only run on the primary."""
+        self.assertFalse(self.router.allow_migrate('replica', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+
+class PinCacheCheckTests(SimpleTestCase):
+    """Test the system check of the replica pin cache."""
+
+    shared = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': 'cache:11211',
+    }
+    local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+    def errors(self, **options):
+        with override_settings(**options):
+            return [error.id for error in check_replica_pin_cache(None)]
+
+    def test_process_local_pin_cache(self):
+        """Test replicas with a per-process pin cache are an error."""
+        self.assertEqual(self.errors(
+            REPLICA_DATABASES=['replica1'],
+            REPLICA_PIN_CACHE='default',
+            CACHES={'default': self.local},
+        ), ['core.E002'])
+        self.assertEqual(self.errors(
+            REPLICA_DATABASES=['replica1'],
+            REPLICA_PIN_CACHE='pins',
+            CACHES={'default': self.local},
+        ), ['core.E001'])
+
+    def test_shared_pin_cache(self):
+        """Test a shared pin cache, or no replicas, pass."""
+        self.assertEqual(self.errors(
+            REPLICA_DATABASES=['replica1'],
+            REPLICA_PIN_CACHE='pins',
+            CACHES={'default': self.local, 'pins': self.shared},
+        ), [])
+        self.assertEqual(self.errors(
+            REPLICA_DATABASES=[],
+            CACHES={'default': self.local},
+        ), [])
+
+
+@override_settings(
+    RESPONSE_CACHE={'ENABLED': False},
+    FRAGMENT_CACHE={'ENABLED': False},
+    REPLICA_DATABASES=['replica'],
+    REPLICA_PIN_SECONDS=60,
+)
+class ReplicaReadTests(TestCase):
+    """Test API reads against a second SQLite database as replica.
+
+    The replica is registered after the test databases are set up, so it
+    is a plain SQLite file outside the test transaction, emptied after
+    each test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.tmpdir.name, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults('replica')
+        connections.prepare_test_settings('replica')
+        with override_settings(REPLICA_DATABASES=[]):
+            call_command('migrate', database='replica', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        reset_lag_checks()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+            name='Primary name',
+        )
+        replica_user = get_user_model()(
+            pk=self.user.pk,
+            email=self.user.email,
+            name='Replica name',
+        )
+        replica_user.save(using='replica')
+        self.addCleanup(
+            get_user_model().objects.using('replica').all().delete,
+        )
+        for db, title in [('default', 'Primary'), ('replica', 'Replica')]:
+            Recipe.objects.using(db).create(
+                user_id=self.user.pk,
+                title=title,
+                time_minutes=5,
+                price=Decimal('1.00'),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def titles(self):
+        res = self.client.get(RECIPE_URL)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_reads_from_replica(self):
+        """Test safe requests read from the replica."""
+        self.assertEqual(self.titles(), ['Replica'])
+
+    def test_profile_update_pins(self):
+        """Test writes through the user API pin reads to the primary."""
+        self.client.patch(ME_URL, {'name': 'Updated name'})
+
+        self.assertEqual(self.titles(), ['Primary'])
+
+    def test_read_your_writes(self):
+        """Test users read from the primary after writing."""
+        payload = {'title': 'New', 'time_minutes': 5, 'price': '2.00'}
+        self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(self.titles(), ['New', 'Primary'])
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_window_elapsed(self):
+        """Test reads go back to replicas once the pin expires."""
+        payload = {'title': 'New', 'time_minutes': 5, 'price': '2.00'}
+        self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(self.titles(), ['Replica'])
+
+    @mock.patch.object(routers, 'measure_lag', return_value=60)
+    def test_lagging_replica_falls_back(self, measure_lag):
+        """Test reads use the primary while replicas lag."""
+        self.assertEqual(self.titles(), ['Primary'])
@@ -0,0 +1,70 @@
+"""
+Tests for the production server configuration.
+"""
+import runpy
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from app.serving import (
+    asgi_workers,
+    cpu_count,
+    wsgi_threads,
+    wsgi_workers,
+)
+
+GUNICORN_CONF = settings.BASE_DIR / 'gunicorn.conf.py'
+
+
+class ServingTests(SimpleTestCase):
+    """Test sizing the server workers."""
+
+    def test_defaults_from_cpus(self):
+        """Test worker counts default to the available CPUs."""
+        self.assertEqual(wsgi_workers({}), cpu_count() + 1)
+        self.assertEqual(asgi_workers({}), cpu_count())
+        self.assertEqual(wsgi_threads({}), 4)
+
+    def test_env_overrides(self):
+        """Test WEB_CONCURRENCY and WSGI_THREADS override the defaults."""
+        environ = {'WEB_CONCURRENCY': '3', 'WSGI_THREADS': '1'}
+
+        self.assertEqual(wsgi_workers(environ), 3)
+        self.assertEqual(asgi_workers(environ), 3)
+        self.assertEqual(wsgi_threads(environ), 1)
+
+    def test_gunicorn_conf(self):
+        """Test the gunicorn configuration reads the environment."""
+        environ = {
+            'WEB_CONCURRENCY': '2',
+            'WSGI_THREADS': '8',
+            'GUNICORN_MAX_REQUESTS': '500',
+        }
+        with patch.dict('os.environ', environ):
+            conf = runpy.run_path(str(GUNICORN_CONF))
+
+        self.assertEqual(conf['workers'], 2)
+        self.assertEqual(conf['threads'], 8)
+        self.assertEqual(conf['worker_class'], 'gthread')
+        self.assertTrue(conf['preload_app'])
+        self.assertEqual(conf['max_requests'], 500)
+        self.assertEqual(conf['max_requests_jitter'], 50)
+
+    def test_gunicorn_sync_workers(self):
+        """Test single threaded workers use the sync worker class."""
+        with patch.dict('os.environ', {'WSGI_THREADS': '1'}):
+            conf = runpy.run_path(str(GUNICORN_CONF))
+
+        self.assertEqual(conf['worker_class'], 'sync')
+
+    @patch('core.db.pool.close_pools')
+    @patch('django.db.connections.close_all')
+    def test_pre_fork_closes_connections(self, close_all, close_pools):
+        """Test workers are forked without the master's connections."""
+        conf = runpy.run_path(str(GUNICORN_CONF))
+
+        conf['pre_fork'](None, None)
+
+        close_all.assert_called_once_with()
+        close_pools.assert_called_once_with()
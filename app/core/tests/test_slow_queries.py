@@ -0,0 +1,157 @@
+"""
+Tests for slow query capture.
+"""
+import json
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import slow_queries
+from core.models import Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def record(signature, duration_ms, view=None, params='p', plan=None):
+    return {
+        'signature': signature,
+        'duration_ms': duration_ms,
+        'view': view,
+        'params': params,
+        'plan': plan,
+    }
+
+
+class SummarizeTests(SimpleTestCase):
+    """Test summarizing logged slow queries."""
+
+    def test_summarize(self):
+        """Test queries are grouped by signature, worst total first."""
+        records = [
+            record('SELECT a', 300, 'recipe:recipe-list', plan='Seq Scan'),
+            record('SELECT a', 500, 'recipe:recipe-list', params='q'),
+            record('SELECT a', 400, 'recipe:tag-list', plan='Index Scan'),
+            record('SELECT b', 1000),
+        ]
+
+        summary = slow_queries.summarize(records)
+
+        self.assertEqual(
+            [group['signature'] for group in summary],
+            ['SELECT a', 'SELECT b'],
+        )
+        self.assertEqual(summary[0]['count'], 3)
+        self.assertEqual(summary[0]['total'], 1200)
+        self.assertEqual(summary[0]['avg'], 400)
+        self.assertEqual(summary[0]['max'], 500)
+        self.assertEqual(
+            summary[0]['views'],
+            ['recipe:recipe-list', 'recipe:tag-list'],
+        )
+        self.assertEqual(summary[0]['distinct_params'], 2)
+        self.assertEqual(summary[0]['plan'], 'Index Scan')
+        self.assertEqual(summary[1]['views'], ['-'])
+
+        by_max = slow_queries.summarize(records, order_by='max')
+        self.assertEqual(by_max[0]['signature'], 'SELECT b')
+
+        by_view = slow_queries.summarize(records, view='recipe:tag-list')
+        self.assertEqual(len(by_view), 1)
+        self.assertEqual(by_view[0]['count'], 1)
+
+    def test_read_log_skips_other_lines(self):
+        """Test lines that are not slow query records are skipped."""
+        lines = [
+            'Watching for file changes\n',
+            '{"method": "GET"}\n',
+            json.dumps(record('SELECT a', 300)) + '\n',
+        ]
+
+        self.assertEqual(
+            list(slow_queries.read_log(lines)),
+            [record('SELECT a', 300)],
+        )
+
+
+class CaptureTests(TestCase):
+    """Test capturing slow queries from requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(SLOW_QUERIES={'THRESHOLD_MS': 0, 'SAMPLE_RATE': 0})
+    def test_queries_logged_with_view(self):
+        """Test slow queries are logged with their view, not params."""
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            Tag.objects.create(user=self.user, name='secret-tag-name')
+            self.client.get(RECIPES_URL)
+            Tag.objects.filter(name='secret-tag-name').exists()
+
+        records = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        views = {entry['view'] for entry in records}
+        self.assertIn('recipe:recipe-list', views)
+        self.assertIsNone(records[-1]['view'])
+        self.assertTrue(all(entry['plan'] is None for entry in records))
+        self.assertNotIn('secret-tag-name', '\n'.join(logs.output))
+        self.assertEqual(
+            records[-1]['params'],
+            slow_queries.params_fingerprint(('secret-tag-name',)),
+        )
+
+    @override_settings(SLOW_QUERIES={'THRESHOLD_MS': 60000})
+    def test_fast_queries_ignored(self):
+        """Test queries under the threshold are not captured."""
+        with patch('core.slow_queries.capture') as capture:
+            self.client.get(RECIPES_URL)
+
+        capture.assert_not_called()
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN on PostgreSQL')
+    @override_settings(SLOW_QUERIES={'THRESHOLD_MS': 0, 'SAMPLE_RATE': 1})
+    def test_sampled_plans(self):
+        """Test sampled queries are logged with their plan."""
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            Tag.objects.filter(name='tag').exists()
+
+        entry = json.loads(logs.output[0].split(':', 2)[2])
+        self.assertIn('Scan', entry['plan'])
+
+    @override_settings(SLOW_QUERIES={'THRESHOLD_MS': 0, 'SAMPLE_RATE': 1})
+    def test_failed_queries_not_captured(self):
+        """Test a failing query raises its own error and is not logged."""
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            Tag.objects.create(user=self.user, name='tag')
+            with self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    Tag.objects.create(user=self.user, name='tag')
+
+        inserts = [
+            line for line in logs.output
+            if json.loads(line.split(':', 2)[2])['sql'].startswith('INSERT')
+        ]
+        self.assertEqual(len(inserts), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN on PostgreSQL')
+    def test_failed_explain_keeps_transaction(self):
+        """Test a failing EXPLAIN does not abort the open transaction."""
+        connection.ensure_connection()
+
+        plan = slow_queries.explain(
+            connection,
+            'SELECT * FROM missing_table WHERE id = %s',
+            (1,),
+        )
+
+        self.assertIsNone(plan)
+        self.assertTrue(Tag.objects.create(user=self.user, name='tag').pk)
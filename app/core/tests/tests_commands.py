@@ -1,13 +1,32 @@
 """
 Test custome django management commands.
 """
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from core.middleware import available_codecs
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -28,3 +47,420 @@ class CommandTests(SimpleTestCase):
         call_command('wait_for_db')
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', newline='') as f:
+            f.write(content)
+        return path
+
+    def _ndjson(self, count, start=0):
+        return ''.join(
+            json.dumps({
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '4.50',
+                'tags': [{'name': 'Dinner'}, {'name': f'Tag {i % 2}'}],
+                'ingredients': [{'name': 'Salt'}],
+            }) + '\n'
+            for i in range(start, start + count)
+        )
+
+    def test_import_ndjson(self):
+        """Test importing NDJSON with shared tags and ingredients."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        path = self._write('recipes.ndjson', self._ndjson(5))
+
+        call_command(
+            'import_recipes', path, user=self.user.email, batch_size=2,
+            stdout=io.StringIO(),
+        )
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(recipes.count(), 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            sorted(recipes[1].tags.values_list('name', flat=True)),
+            ['Dinner', 'Tag 1'],
+        )
+        self.assertEqual(recipes[0].price, Decimal('4.50'))
+
+    def test_import_csv_from_stdin(self):
+        """Test importing export-style CSV read from stdin."""
+        content = (
+            'id,title,description,time_minutes,price,link,tags,ingredients\n'
+            '7,Curry,"Hot, spicy",30,9.99,,Thai;Dinner,Rice\n'
+        )
+
+        with patch('sys.stdin', io.StringIO(content)):
+            call_command(
+                'import_recipes', '-', user=self.user.email,
+                input_format='csv', stdout=io.StringIO(),
+            )
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.description, 'Hot, spicy')
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Dinner', 'Thai'],
+        )
+
+    def test_resume_from_checkpoint(self):
+        """Test a failed import resumes after the last committed batch."""
+        bad = json.dumps({'title': '', 'time_minutes': 1, 'price': 1})
+        path = self._write(
+            'recipes.ndjson',
+            self._ndjson(4) + bad + '\n' + self._ndjson(2, start=5),
+        )
+        checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+        options = {
+            'user': self.user.email,
+            'batch_size': 2,
+            'checkpoint': checkpoint,
+            'stdout': io.StringIO(),
+        }
+
+        with self.assertRaisesMessage(CommandError, 'Record 5'):
+            call_command('import_recipes', path, **options)
+        self.assertEqual(Recipe.objects.count(), 4)
+
+        fixed = self._ndjson(4) + self._ndjson(3, start=4)
+        self._write('recipes.ndjson', fixed)
+        call_command('import_recipes', path, **options)
+
+        titles = list(
+            Recipe.objects.order_by('id').values_list('title', flat=True)
+        )
+        self.assertEqual(titles, [f'Recipe {i}' for i in range(7)])
+
+    def test_invalid_records(self):
+        """Test values the columns cannot hold fail with the record."""
+        valid = {'title': 'Soup', 'time_minutes': 10, 'price': '4.50'}
+        invalid = [
+            ({'price': '1000'}, 'price'),
+            ({'price': 'free'}, 'price'),
+            ({'time_minutes': 'long'}, 'time_minutes'),
+            ({'title': 'x' * 256}, 'title'),
+            ({'link': 'x' * 256}, 'link'),
+            ({'tags': ['x' * 256]}, 'name'),
+            ({'ingredients': [{'title': 'Salt'}]}, 'names'),
+        ]
+        for change, message in invalid:
+            with self.subTest(change=change):
+                path = self._write('recipes.ndjson', self._ndjson(1) + (
+                    json.dumps({**valid, **change}) + '\n'
+                ))
+
+                with self.assertRaises(CommandError) as cm:
+                    call_command(
+                        'import_recipes', path, user=self.user.email,
+                        stdout=io.StringIO(),
+                    )
+                self.assertTrue(str(cm.exception).startswith('Record 2: '))
+                self.assertIn(message, str(cm.exception))
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_malformed_json(self):
+        """Test undecodable lines fail with the record number."""
+        path = self._write(
+            'recipes.ndjson',
+            self._ndjson(2) + '\n{"title": \n',
+        )
+
+        with self.assertRaisesMessage(
+            CommandError, 'Record 3: invalid JSON',
+        ):
+            call_command(
+                'import_recipes', path, user=self.user.email,
+                stdout=io.StringIO(),
+            )
+
+    def test_blank_names_skipped(self):
+        """Test names are stripped before blank ones are dropped."""
+        content = (
+            'title,time_minutes,price,tags,ingredients\n'
+            'Curry,30,9.99, ;Thai; ,Rice;\n'
+        )
+        path = self._write('recipes.csv', content)
+
+        call_command(
+            'import_recipes', path, user=self.user.email,
+            stdout=io.StringIO(),
+        )
+
+        self.assertEqual(
+            list(Tag.objects.filter(user=self.user).values_list(
+                'name', flat=True,
+            )),
+            ['Thai'],
+        )
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+
+    def test_unknown_user(self):
+        """Test importing for an unknown user fails."""
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', '-', user='nobody@example.com')
+
+
+class BenchRenderersCommandTests(SimpleTestCase):
+    """Test the renderer benchmark command."""
+
+    def test_bench_renderers(self):
+        """Test the benchmark reports both implementations."""
+        out = io.StringIO()
+
+        call_command('bench_renderers', count=20, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('20 recipes', output)
+        self.assertIn('render speedup', output)
+        self.assertIn('parse speedup', output)
+
+
+class BenchCompressionCommandTests(SimpleTestCase):
+    """Test the compression benchmark command."""
+
+    def test_bench_compression(self):
+        """Test the benchmark reports each codec and size."""
+        out = io.StringIO()
+
+        call_command(
+            'bench_compression',
+            counts=[3, 30],
+            repeat=1,
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        rows_per_size = 1 + 3 * len(available_codecs())
+        self.assertEqual(len(lines), 1 + 2 * rows_per_size)
+        self.assertTrue(any(' gzip ' in line for line in lines))
+
+
+class BenchApiCommandTests(TestCase):
+    """Test the API benchmark command."""
+
+    options = {
+        'users': 2,
+        'recipes': 5,
+        'tags': 3,
+        'ingredients': 4,
+        'requests': 4,
+    }
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.baseline = os.path.join(self.tmpdir.name, 'baseline.json')
+
+    def test_bench_api(self):
+        """Test every scenario runs and the data is rolled back."""
+        out = io.StringIO()
+
+        call_command(
+            'bench_api',
+            save=self.baseline,
+            stdout=out,
+            **self.options,
+        )
+
+        with open(self.baseline) as f:
+            results = json.load(f)
+        self.assertEqual(
+            set(results),
+            {'recipes', 'recipes-filtered', 'recipes-sparse', 'recipe',
+             'search', 'tags', 'ingredients', 'me', 'token'},
+        )
+        for name, metrics in results.items():
+            self.assertEqual(metrics['requests'], 4, name)
+            self.assertEqual(metrics['errors'], 0, name)
+        self.assertGreater(results['recipes']['queries'], 0)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_cold_by_default(self):
+        """Test caches are off unless --warm is given."""
+        results = {}
+        for warm in [False, True]:
+            call_command(
+                'bench_api',
+                scenarios=['recipes', 'me'],
+                warm=warm,
+                save=self.baseline,
+                stdout=io.StringIO(),
+                **self.options,
+            )
+            with open(self.baseline) as f:
+                results[warm] = json.load(f)
+
+        # the token lookup
+        self.assertEqual(results[False]['me']['queries'], 1)
+        self.assertEqual(results[True]['me']['queries'], 0)
+
+    def test_baseline_regression(self):
+        """Test a run fails when it regresses against the baseline."""
+        call_command(
+            'bench_api',
+            scenarios=['recipes'],
+            save=self.baseline,
+            stdout=io.StringIO(),
+            **self.options,
+        )
+        with open(self.baseline) as f:
+            baseline = json.load(f)
+        baseline['recipes']['queries'] -= 1
+        with open(self.baseline, 'w') as f:
+            json.dump(baseline, f)
+
+        with self.assertRaisesMessage(CommandError, 'recipes: queries'):
+            call_command(
+                'bench_api',
+                scenarios=['recipes'],
+                baseline=self.baseline,
+                stdout=io.StringIO(),
+                **self.options,
+            )
+
+
+@override_settings(ASYNC_VIEW_THREADS=2)
+class BenchServingCommandTests(TransactionTestCase):
+    """Test the serving load test command."""
+
+    def test_bench_serving(self):
+        """Test the load test reports each server without errors."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        Recipe.objects.create(
+            user=user,
+            title='Soup',
+            time_minutes=10,
+            price=Decimal('2.50'),
+        )
+        out = io.StringIO()
+
+        call_command(
+            'bench_serving',
+            user='user@example.com',
+            requests=6,
+            concurrency=2,
+            host='testserver',
+            stdout=out,
+        )
+
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual(
+            [row[0] for row in rows],
+            ['wsgi', 'asgi', 'asgi-async'],
+        )
+        self.assertTrue(all(row[1:3] == ['6', '0'] for row in rows))
+
+    def test_unknown_user(self):
+        """Test the load test requires an existing user."""
+        with self.assertRaises(CommandError):
+            call_command('bench_serving', user='nobody@example.com')
+
+
+class SlowQueriesCommandTests(SimpleTestCase):
+    """Test summarizing the slow query log."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.log = os.path.join(self.tmpdir.name, 'slow.log')
+        entries = [
+            ('SELECT * FROM core_recipe', 250, 'Seq Scan on core_recipe'),
+            ('SELECT * FROM core_recipe', 350, None),
+            ('SELECT * FROM core_tag', 900, None),
+        ]
+        with open(self.log, 'w') as f:
+            for signature, duration, plan in entries:
+                f.write(json.dumps({
+                    'signature': signature,
+                    'duration_ms': duration,
+                    'view': 'recipe:recipe-list',
+                    'params': None,
+                    'plan': plan,
+                }) + '\n')
+
+    def test_slow_queries(self):
+        """Test signatures are listed by total time with their plans."""
+        out = io.StringIO()
+
+        call_command('slow_queries', self.log, plans=True, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('3 slow queries', output)
+        self.assertLess(
+            output.index('core_tag'),
+            output.index('FROM core_recipe'),
+        )
+        self.assertIn('#1 1 runs, 900.0 ms total', output)
+        self.assertIn('| Seq Scan on core_recipe', output)
+        self.assertIn('views: recipe:recipe-list', output)
+
+    def test_top(self):
+        """Test --top limits the signatures listed."""
+        out = io.StringIO()
+
+        call_command(
+            'slow_queries',
+            self.log,
+            top=1,
+            order_by='count',
+            stdout=out,
+        )
+
+        self.assertIn('core_recipe', out.getvalue())
+        self.assertNotIn('core_tag', out.getvalue())
+
+    @override_settings(SLOW_QUERIES={})
+    def test_no_log(self):
+        """Test a log is required."""
+        with self.assertRaises(CommandError):
+            call_command('slow_queries', stdout=io.StringIO())
+
+
+@override_settings(PASSWORD_HASHING={
+    'PBKDF2_ITERATIONS': 1000,
+    'SCRYPT_N': 2 ** 10,
+})
+class BenchLoginCommandTests(TestCase):
+    """Test the login benchmark command."""
+
+    def test_bench_login(self):
+        """Test each hasher is measured and the user rolled back."""
+        out = io.StringIO()
+
+        call_command(
+            'bench_login',
+            algorithms=['scrypt', 'pbkdf2_sha256'],
+            logins=2,
+            threads=2,
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('scrypt '))
+        self.assertIn('work factor=1024', lines[1])
+        self.assertIn('iterations=1000', lines[2])
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_unknown_algorithm(self):
+        """Test algorithms must be configured."""
+        with self.assertRaises(CommandError):
+            call_command('bench_login', algorithms=['md5'])
@@ -0,0 +1,27 @@
+"""
+Shared helpers for tests.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """Assertions pinning the number of queries an operation issues."""
+
+    def assertConstantQueries(self, num, func, grow, sizes=(1, 5, 20)):
+        """Assert `func` issues `num` queries for every result size.
+
+        `grow(count)` is called before each measurement to add `count` rows,
+        so an N+1 pattern shows up as a count that changes between sizes.
+        """
+        for size in sizes:
+            grow(size)
+            with CaptureQueriesContext(connection) as ctx:
+                func()
+            executed = [query['sql'] for query in ctx.captured_queries]
+            self.assertEqual(
+                len(executed),
+                num,
+                '%d queries executed after adding %d rows, %d expected:\n%s'
+                % (len(executed), size, num, '\n'.join(executed)),
+            )
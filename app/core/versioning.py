@@ -0,0 +1,40 @@
+"""
+Tracking changes to users' recipe data.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from core.models import UserDataVersion
+
+_pending = ContextVar('pending_data_changes', default=None)
+
+
+def data_changed(user_id, create=True):
+    """Record that a user's recipes, tags or ingredients changed."""
+    pending = _pending.get()
+    if pending is not None:
+        pending[user_id] = pending.get(user_id, False) or create
+        return
+    UserDataVersion.objects.bump(user_id, create=create)
+
+
+@contextmanager
+def coalesce_data_changes():
+    """Bump each changed user's version once, when the block succeeds.
+
+    Wrap bulk writes in this so per-row signals do not each issue an
+    UPDATE of the version row.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+
+    pending = {}
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+
+    for user_id, create in pending.items():
+        UserDataVersion.objects.bump(user_id, create=create)
@@ -1,3 +1,41 @@
-from django.shortcuts import render # noqa
+"""
+Views for operating the app.
+"""
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from core import metrics as app_metrics
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics(request):
+    """Expose the metrics of every worker in the Prometheus text format.
+
+    Scrapers must send METRICS['TOKEN'] as a bearer token when it is set,
+    or else connect from an address in METRICS['ALLOWED_IPS']. With
+    neither configured the endpoint only exists while DEBUG is on.
+    """
+    options = getattr(settings, 'METRICS', {})
+    token = options.get('TOKEN')
+    allowed_ips = options.get('ALLOWED_IPS') or []
+    if token:
+        allowed = constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            f'Bearer {token}',
+        )
+    elif allowed_ips:
+        allowed = request.META.get('REMOTE_ADDR') in allowed_ips
+    elif settings.DEBUG:
+        allowed = True
+    else:
+        raise Http404
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        app_metrics.render(app_metrics.collect()),
+        content_type=CONTENT_TYPE,
+    )
@@ -0,0 +1,83 @@
+"""
+gunicorn configuration for serving app.wsgi in production.
+
+    gunicorn app.wsgi
+
+Sizes from app.serving and the environment:
+
+- WEB_CONCURRENCY worker processes and WSGI_THREADS threads per worker.
+- GUNICORN_MAX_REQUESTS requests per worker, plus up to
+  GUNICORN_MAX_REQUESTS_JITTER, before it is replaced to bound memory
+  growth; 0 disables recycling.
+- GUNICORN_TIMEOUT seconds for a request before its worker is killed
+  and GUNICORN_GRACEFUL_TIMEOUT seconds for in-flight requests on
+  reload or shutdown.
+
+With METRICS_MULTIPROCESS_DIR set, /metrics reports the sum of all
+workers, including ones already replaced.
+
+The application is loaded once in the master and forked, sharing its
+memory copy on write. SIGHUP reloads gracefully: new workers start with
+the current configuration and old ones finish their requests first.
+With preloading, code changes need a restart, or USR2 then TERM to the
+old master.
+"""
+import os
+
+from app.serving import wsgi_threads, wsgi_workers
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 8000)}")
+pidfile = os.environ.get('GUNICORN_PIDFILE')
+
+workers = wsgi_workers()
+threads = wsgi_threads()
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+preload_app = True
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get(
+    'GUNICORN_MAX_REQUESTS_JITTER',
+    max_requests // 10,
+))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# worker heartbeats on disk stall on Docker's overlay filesystem
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+
+
+def pre_fork(server, worker):
+    """Close the master's connections so no worker inherits them."""
+    from django.db import connections
+
+    from core.db.pool import close_pools
+
+    connections.close_all()
+    close_pools()
+
+
+def on_starting(server):
+    """Drop the metrics of workers of a previous run."""
+    from core.metrics import clear_multiprocess_dir
+
+    clear_multiprocess_dir()
+
+
+def worker_exit(server, worker):
+    """Write the exiting worker's final metrics."""
+    from core.metrics import write_snapshot
+
+    write_snapshot(force=True)
+
+
+def child_exit(server, worker):
+    """Fold the metrics of an exited worker into the archive."""
+    from core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        """Report the response and fragment caches in the metrics."""
+        from core.metrics import registry
+        from recipe.caching import collect_cache_metrics
+
+        registry.add_collector(collect_cache_metrics)
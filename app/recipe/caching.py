@@ -0,0 +1,187 @@
+"""
+Caches of serialized recipe API responses and per-recipe fragments.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from core.metrics import CACHE_LOOKUPS
+
+
+class _CountingCache:
+    """Django cache wrapper counting hits and misses of this process."""
+
+    def __init__(self, cache_alias='default', ttl=300):
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(['hits', 'misses', 'stores'], 0)
+
+    @property
+    def backend(self):
+        """Return the configured Django cache backend."""
+        return caches[self.cache_alias]
+
+    def _count(self, name, count=1):
+        with self._lock:
+            self._stats[name] += count
+
+    def stats(self):
+        """Return hit/miss counters of this process."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+class ResponseCache(_CountingCache):
+    """Store response data under keys derived from conditional validators.
+
+    Keys embed the ETag and Last-Modified of the response, which change
+    whenever the user's data version or the object's `updated_at` do, so
+    writes invalidate through the signals bumping those instead of by
+    deleting keys. Superseded entries are never read again and age out
+    through `ttl` or the backend's own eviction (MAX_ENTRIES for the
+    local-memory backend).
+    """
+
+    key_prefix = 'response:'
+
+    def make_key(self, user_id, action, validator, last_modified):
+        """Return the cache key for a response of user.
+
+        Last-Modified guards against primary keys reused after a database
+        restore, where an old (user, version) pair could come back.
+        """
+        digest = hashlib.sha256(
+            f'{validator}|{last_modified.timestamp()}'.encode(),
+        ).hexdigest()
+        return f'{self.key_prefix}{user_id}:{action}:{digest}'
+
+    def get(self, key):
+        """Return cached data for key or None."""
+        data = self.backend.get(key)
+        self._count('misses' if data is None else 'hits')
+        return data
+
+    def set(self, key, data):
+        """Cache data under key."""
+        self.backend.set(key, data, self.ttl)
+        self._count('stores')
+
+
+class FragmentCache(_CountingCache):
+    """Store the representation of single objects by serializer.
+
+    Keys combine the serializer class and the names and classes of its
+    fields, which tell apart e.g. nested and primary key renderings of
+    one relation, with the object's primary key and `updated_at`, so a
+    changed object misses and the representations of unchanged ones keep
+    being reused.
+    """
+
+    key_prefix = 'fragment:'
+
+    def shape(self, serializer):
+        """Return the digest identifying what serializer renders."""
+        return hashlib.blake2b(
+            '|'.join([
+                type(serializer).__module__,
+                type(serializer).__qualname__,
+                *(
+                    f'{name}={type(field).__qualname__}'
+                    for name, field in serializer.fields.items()
+                ),
+            ]).encode(),
+            digest_size=8,
+        ).hexdigest()
+
+    def key(self, shape, pk, updated_at):
+        """Return the key of an object in shape, None if unversioned."""
+        if pk is None or updated_at is None:
+            return None
+        return f'{self.key_prefix}{shape}:{pk}:{updated_at.timestamp():.6f}'
+
+    def make_key(self, serializer, instance):
+        """Return the key of instance rendered by serializer or None."""
+        return self.key(
+            self.shape(serializer),
+            instance.pk,
+            getattr(instance, 'updated_at', None),
+        )
+
+    def get_many(self, keys):
+        """Return {key: representation} for cached keys, in one lookup."""
+        if not keys:
+            return {}
+        found = self.backend.get_many(keys)
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def set_many(self, fragments):
+        """Cache a {key: representation} mapping, in one round trip."""
+        if not fragments:
+            return
+        self.backend.set_many(fragments, self.ttl)
+        self._count('stores', len(fragments))
+
+
+_response_cache = None
+_fragment_cache = None
+
+
+def get_response_cache():
+    """Return the process wide response cache, None when disabled."""
+    global _response_cache
+    options = getattr(settings, 'RESPONSE_CACHE', {})
+    if not options.get('ENABLED', True):
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            cache_alias=options.get('CACHE_ALIAS', 'default'),
+            ttl=options.get('TTL', 300),
+        )
+    return _response_cache
+
+
+def get_fragment_cache():
+    """Return the process wide fragment cache, None when disabled."""
+    global _fragment_cache
+    options = getattr(settings, 'FRAGMENT_CACHE', {})
+    if not options.get('ENABLED', True):
+        return None
+    if _fragment_cache is None:
+        _fragment_cache = FragmentCache(
+            cache_alias=options.get('CACHE_ALIAS', 'default'),
+            ttl=options.get('TTL', 3600),
+        )
+    return _fragment_cache
+
+
+@receiver(setting_changed)
+def _reset_caches(setting, **kwargs):
+    """Rebuild the caches when their settings change in tests."""
+    global _response_cache, _fragment_cache
+    if setting in ('RESPONSE_CACHE', 'CACHES'):
+        _response_cache = None
+    if setting in ('FRAGMENT_CACHE', 'CACHES'):
+        _fragment_cache = None
+
+
+def collect_cache_metrics():
+    """Copy the counters of the enabled caches to cache_lookups_total."""
+    for name, cache in [
+        ('response', get_response_cache()),
+        ('fragment', get_fragment_cache()),
+    ]:
+        if cache is None:
+            continue
+        stats = cache.stats()
+        CACHE_LOOKUPS.set(stats['hits'], cache=name, result='hit')
+        CACHE_LOOKUPS.set(stats['misses'], cache=name, result='miss')
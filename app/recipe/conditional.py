@@ -0,0 +1,178 @@
+"""
+Conditional request handling for recipe APIs.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from rest_framework.response import Response
+
+from core.models import UserDataVersion
+from recipe.caching import get_response_cache
+
+
+def _timestamp(value):
+    """Return a datetime as an integer timestamp, keeping None."""
+    return int(value.timestamp()) if value is not None else None
+
+
+def _strong_if_match(request):
+    """Drop W/ prefixes from If-Match.
+
+    The ETags identify the data rather than its bytes, but compression
+    weakens them on the way out and If-Match only compares strong tags.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if header and 'W/' in header:
+        request.META['HTTP_IF_MATCH'] = header.replace('W/', '')
+
+
+class ConditionalRequestMixin:
+    """Answer conditional requests without building the response body.
+
+    List validators come from the user's data version, a single primary
+    key lookup; detail validators from the object's `updated_at`. GETs
+    honour If-None-Match/If-Modified-Since with 304 and writes honour
+    If-Match with 412.
+
+    Covers list, update and destroy; viewsets with a retrieve action wrap
+    it with `_conditional` themselves so the router does not route
+    retrieve to viewsets without one.
+
+    With `cache_responses` set, GET responses that do need a body are
+    served from the response cache, keyed by the same validators.
+    """
+
+    cache_responses = False
+
+    def _variant(self, request):
+        """Return a short digest of what the representation depends on."""
+        key = f'{request.get_full_path()}|{request.accepted_media_type}'
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+    def get_list_validators(self, request):
+        """Return (etag, last_modified) for the list of the user's objects."""
+        version, updated_at = UserDataVersion.objects.current(request.user.pk)
+        etag = f'"{request.user.pk}.{version}.{self._variant(request)}"'
+        return etag, updated_at
+
+    def get_object_validators(self, request):
+        """Return (etag, last_modified) of the object, (None, None) if none.
+
+        Writes compare If-Match against the ETag a GET returned, so only
+        the object state, not the request, goes into it.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            updated_at = self.get_queryset().prefetch_related(None).filter(
+                **lookup,
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            return None, None
+        if updated_at is None:
+            return None, None
+
+        model_name = self.get_queryset().model._meta.model_name
+        etag = '"{}.{}.{:.6f}"'.format(
+            model_name,
+            lookup[self.lookup_field],
+            updated_at.timestamp(),
+        )
+        return etag, updated_at
+
+    def _set_validators(self, response, etag, last_modified):
+        if etag is not None:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(_timestamp(last_modified))
+
+    def _conditional(self, request, validators, handler, *args, **kwargs):
+        """Run handler unless the request's preconditions short-circuit."""
+        etag, last_modified = validators
+        if etag is not None:
+            _strong_if_match(request)
+            response = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=_timestamp(last_modified),
+            )
+            if response is not None:
+                if response.status_code == 304:
+                    self._set_validators(response, etag, last_modified)
+                patch_vary_headers(response, ['Authorization'])
+                return response
+
+        response = self._cached(
+            request,
+            (etag, last_modified),
+            handler,
+            *args,
+            **kwargs,
+        )
+        if response.status_code == 200:
+            if request.method in ('PUT', 'PATCH'):
+                etag, last_modified = self.get_object_validators(request)
+            if request.method in ('GET', 'HEAD', 'PUT', 'PATCH'):
+                self._set_validators(response, etag, last_modified)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def _cached(self, request, validators, handler, *args, **kwargs):
+        """Run handler, reading and filling the response cache on GET."""
+        etag, last_modified = validators
+        response_cache = get_response_cache() if self.cache_responses else None
+        if (
+            response_cache is None
+            or etag is None
+            or last_modified is None
+            or request.method not in ('GET', 'HEAD')
+        ):
+            return handler(request, *args, **kwargs)
+
+        key = response_cache.make_key(
+            request.user.pk,
+            self.action,
+            f'{etag}|{self._variant(request)}',
+            last_modified,
+        )
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """List objects, answering conditional requests."""
+        return self._conditional(
+            request,
+            self.get_list_validators(request),
+            super().list,
+            *args,
+            **kwargs,
+        )
+
+    def update(self, request, *args, **kwargs):
+        """Update an object, honouring If-Match."""
+        return self._conditional(
+            request,
+            self.get_object_validators(request),
+            super().update,
+            *args,
+            **kwargs,
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        """Delete an object, honouring If-Match."""
+        return self._conditional(
+            request,
+            self.get_object_validators(request),
+            super().destroy,
+            *args,
+            **kwargs,
+        )
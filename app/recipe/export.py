@@ -0,0 +1,120 @@
+"""
+Streaming export of recipes.
+"""
+import csv
+import json
+from itertools import islice
+
+from core.models import Recipe
+
+# Same keys, in the same order, as RecipeDetailSerializer output.
+RECIPE_COLUMNS = ['id', 'title', 'time_minutes', 'price', 'link']
+EXPORT_FIELDS = RECIPE_COLUMNS + ['tags', 'ingredients', 'description']
+
+CSV_HEADER = [
+    'id', 'title', 'description', 'time_minutes', 'price', 'link', 'tags',
+    'ingredients',
+]
+
+
+def _related_by_recipe(field_name, recipe_ids):
+    """Return {recipe id: [{'id', 'name'}, ...]} for one M2M relation."""
+    through = getattr(Recipe, field_name).through
+    target = getattr(Recipe, field_name).rel.field.m2m_reverse_field_name()
+    rows = through.objects.filter(recipe_id__in=recipe_ids).values_list(
+        'recipe_id',
+        f'{target}_id',
+        f'{target}__name',
+    ).order_by(f'{target}_id')
+
+    related = {}
+    for recipe_id, obj_id, name in rows:
+        related.setdefault(recipe_id, []).append({'id': obj_id, 'name': name})
+    return related
+
+
+def iter_recipes(queryset, chunk_size=2000):
+    """Yield recipes as dicts, holding at most chunk_size rows at once.
+
+    Rows are read through a server-side cursor where the backend supports
+    it; tags and ingredients are fetched with one query each per chunk.
+    """
+    rows = queryset.order_by('id').values(
+        *RECIPE_COLUMNS,
+        'description',
+    ).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        recipe_ids = [row['id'] for row in chunk]
+        tags = _related_by_recipe('tags', recipe_ids)
+        ingredients = _related_by_recipe('ingredient', recipe_ids)
+
+        for row in chunk:
+            yield {
+                'id': row['id'],
+                'title': row['title'],
+                'time_minutes': row['time_minutes'],
+                'price': str(row['price']),
+                'link': row['link'],
+                'tags': tags.get(row['id'], []),
+                'ingredients': ingredients.get(row['id'], []),
+                'description': row['description'],
+            }
+
+
+def iter_ndjson(recipes):
+    """Yield one JSON document per line for each recipe."""
+    for recipe in recipes:
+        yield json.dumps(recipe, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """File-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(recipes):
+    """Yield CSV lines, tags and ingredients as ';' separated names."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for recipe in recipes:
+        yield writer.writerow([
+            recipe['id'],
+            recipe['title'],
+            recipe['description'],
+            recipe['time_minutes'],
+            recipe['price'],
+            recipe['link'],
+            ';'.join(tag['name'] for tag in recipe['tags']),
+            ';'.join(item['name'] for item in recipe['ingredients']),
+        ])
+
+
+def iter_batched(chunks, size):
+    """Join chunks into pieces of about size characters.
+
+    Compressed streams are flushed per piece, and tiny ones compress
+    poorly.
+    """
+    batch = []
+    length = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(batch)
+            batch = []
+            length = 0
+    if batch:
+        yield ''.join(batch)
+
+
+EXPORT_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
@@ -0,0 +1,93 @@
+"""
+Sparse fieldsets and relation expansion for recipe APIs.
+"""
+from django.utils.translation import gettext as _
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def _param_to_names(params, name):
+    """Return the names in a comma separated query parameter or None."""
+    value = params.get(name)
+    if value is None:
+        return None
+    names = [item.strip() for item in value.split(',')]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def expandable_fields(fields):
+    """Return names of the fields rendering related objects in full."""
+    return [
+        name for name, field in fields.items()
+        if isinstance(field, serializers.ListSerializer)
+        and isinstance(field.child, serializers.ModelSerializer)
+    ]
+
+
+def parse_fieldset(params, serializer):
+    """Return serializer kwargs for the `fields` and `expand` params.
+
+    `fields` lists the fields to render, all by default. `expand` lists
+    the relations rendered as nested objects, all by default; the others
+    render as lists of ids.
+    """
+    readable = [
+        name for name, field in serializer.fields.items()
+        if not field.write_only
+    ]
+    kwargs = {}
+
+    fields = _param_to_names(params, 'fields')
+    if fields is not None:
+        unknown = [name for name in fields if name not in readable]
+        if unknown or not fields:
+            raise ValidationError({'fields': _(
+                'Expected a comma separated list of: %(fields)s.'
+            ) % {'fields': ', '.join(readable)}})
+        kwargs['fields'] = fields
+
+    expand = _param_to_names(params, 'expand')
+    if expand is not None:
+        expandable = expandable_fields(serializer.fields)
+        unknown = [name for name in expand if name not in expandable]
+        if unknown:
+            raise ValidationError({'expand': _(
+                'Expected a comma separated list of: %(fields)s.'
+            ) % {'fields': ', '.join(expandable)}})
+        kwargs['expand'] = expand
+
+    return kwargs
+
+
+class SparseFieldsMixin:
+    """Serializer rendering only requested fields and expansions.
+
+    Takes `fields`, the names to keep, and `expand`, the nested relations
+    kept as objects; unexpanded relations become primary key lists. Both
+    default to everything.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.sparse_fields = fields
+        self.expand = expand
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.sparse_fields is not None:
+            fields = {
+                name: field for name, field in fields.items()
+                if name in self.sparse_fields or field.write_only
+            }
+        if self.expand is not None:
+            for name in expandable_fields(fields):
+                if name in self.expand:
+                    continue
+                source = fields[name].source
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=True,
+                    read_only=True,
+                    **({'source': source} if source else {}),
+                )
+        return fields
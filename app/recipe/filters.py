@@ -0,0 +1,87 @@
+"""
+Query parameter filtering for recipe APIs.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef
+from django.utils.translation import gettext as _
+
+from rest_framework.exceptions import ValidationError
+
+from core.models import Recipe
+
+
+def _params_to_ints(params, name):
+    """Convert a comma separated list of ids to a list of integers."""
+    try:
+        return [int(value) for value in params.split(',') if value]
+    except ValueError:
+        raise ValidationError(
+            {name: _('Expected a comma separated list of ids.')},
+        )
+
+
+def _param_to_number(params, name, convert):
+    """Return query parameter `name` converted with `convert` or None."""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return convert(value)
+    except (ValueError, InvalidOperation):
+        raise ValidationError({name: _('Expected a number.')})
+
+
+def filter_recipes(queryset, params):
+    """Filter recipes by the `tags`, `ingredients`, price and time params.
+
+    Tag and ingredient filters match recipes having any of the given ids.
+    They are applied as semi-joins against the through tables so recipes
+    are never duplicated and no DISTINCT is needed.
+    """
+    tags = params.get('tags')
+    if tags:
+        tag_ids = _params_to_ints(tags, 'tags')
+        queryset = queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                tag_id__in=tag_ids,
+            ),
+        ))
+
+    ingredients = params.get('ingredients')
+    if ingredients:
+        ingredient_ids = _params_to_ints(ingredients, 'ingredients')
+        queryset = queryset.filter(Exists(
+            Recipe.ingredient.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                ingredient_id__in=ingredient_ids,
+            ),
+        ))
+
+    ranges = [
+        ('price_min', 'price__gte', Decimal),
+        ('price_max', 'price__lte', Decimal),
+        ('time_min', 'time_minutes__gte', int),
+        ('time_max', 'time_minutes__lte', int),
+    ]
+    for name, lookup, convert in ranges:
+        value = _param_to_number(params, name, convert)
+        if value is not None:
+            queryset = queryset.filter(**{lookup: value})
+
+    return queryset
+
+
+def filter_assigned_only(queryset, params, through, column):
+    """Keep only objects used by a recipe when `assigned_only` is set.
+
+    `through` is the recipe M2M through model and `column` the name of its
+    foreign key to the filtered model.
+    """
+    assigned_only = _param_to_number(params, 'assigned_only', int)
+    if assigned_only:
+        queryset = queryset.filter(Exists(
+            through.objects.filter(**{column: OuterRef('pk')}),
+        ))
+    return queryset
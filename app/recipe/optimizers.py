@@ -0,0 +1,142 @@
+"""
+Queryset optimization derived from serializers.
+
+The serializer in use already describes which relations will be read, so
+`select_related`/`prefetch_related` are built from its fields instead of
+being maintained by hand next to every viewset.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+from rest_framework import serializers
+
+
+def _get_model_field(model, source):
+    """Return the model field for a plain (non dotted) source or None."""
+    if not source or '.' in source or source == '*':
+        return None
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+
+
+def _only_fields(serializer):
+    """Return concrete column names read by a flat nested serializer.
+
+    Returns None when the serializer reads anything other than concrete
+    columns on its own model, in which case no column narrowing is done.
+    """
+    model = serializer.Meta.model
+    names = {model._meta.pk.name}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        model_field = _get_model_field(model, field.source)
+        if model_field is None or not model_field.concrete:
+            return None
+        if model_field.is_relation and not model_field.many_to_one:
+            return None
+        names.add(model_field.name)
+    return sorted(names)
+
+
+def _child_queryset(model, serializer=None):
+    """Build the queryset used for a prefetched relation."""
+    queryset = model._default_manager.all()
+    if serializer is None:
+        return queryset.only(model._meta.pk.name).order_by('pk')
+
+    only = _only_fields(serializer)
+    if only is not None:
+        queryset = queryset.only(*only)
+    return optimize_queryset(queryset, serializer).order_by('pk')
+
+
+def _collect(model, serializer, prefix=''):
+    """Collect select_related paths and Prefetch objects for serializer."""
+    select_related = []
+    prefetches = []
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        child = None
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        elif isinstance(field, serializers.ManyRelatedField):
+            child = field.child_relation
+
+        model_field = _get_model_field(model, field.source)
+        if model_field is None or not model_field.is_relation:
+            continue
+        lookup = prefix + field.source
+        related_model = model_field.related_model
+
+        if model_field.many_to_many or model_field.one_to_many:
+            nested = (
+                child
+                if isinstance(child, serializers.ModelSerializer)
+                else None
+            )
+            prefetches.append(Prefetch(
+                lookup,
+                queryset=_child_queryset(related_model, nested),
+            ))
+        elif isinstance(field, serializers.ModelSerializer):
+            select_related.append(lookup)
+            nested_select, nested_prefetch = _collect(
+                related_model, field, prefix=lookup + '__',
+            )
+            select_related.extend(nested_select)
+            prefetches.extend(nested_prefetch)
+
+    return select_related, prefetches
+
+
+def optimize_queryset(queryset, serializer):
+    """Return queryset with the relations `serializer` reads preloaded.
+
+    `serializer` may be a serializer class or instance. Forward relations
+    rendered by nested serializers are joined with `select_related`, and
+    to-many relations are fetched with one ordered, column-narrowed
+    `Prefetch` each, so the number of queries does not depend on the number
+    of rows returned.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    select_related, prefetches = _collect(queryset.model, serializer)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+
+    return queryset
+
+
+def only_columns(queryset, serializer, extra=()):
+    """Return queryset loading only the columns `serializer` renders.
+
+    extra names columns to load regardless, e.g. ones cache keys read. The
+    queryset is returned unchanged when the serializer renders anything
+    other than model fields.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    model = queryset.model
+    names = [model._meta.pk.name, *extra]
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        model_field = _get_model_field(model, field.source)
+        if model_field is None:
+            return queryset
+        if model_field.many_to_many or model_field.one_to_many:
+            continue
+        names.append(model_field.name)
+    return queryset.only(*dict.fromkeys(names))
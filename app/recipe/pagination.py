@@ -0,0 +1,36 @@
+"""
+Pagination for recipe APIs.
+"""
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+class BaseCursorPagination(CursorPagination):
+    """Keyset pagination with a client selectable, capped page size.
+
+    Pages are addressed by an opaque cursor holding the last seen ordering
+    value, so every page is an indexed range scan regardless of depth and
+    rows inserted concurrently never shift rows between pages.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginate recipes newest first."""
+    ordering = ('-id',)
+
+
+class NamedObjectCursorPagination(BaseCursorPagination):
+    """Paginate tags and ingredients by name, id breaking ties."""
+    ordering = ('-name', 'id')
+
+
+class RecipeSearchPagination(PageNumberPagination):
+    """Paginate ranked search results, which have no keyset to seek on."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
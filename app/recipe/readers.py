@@ -0,0 +1,279 @@
+"""
+Read-only list rendering from `values()` rows.
+
+Model instances and per-field `to_representation` calls dominate the cost
+of large list responses. `ValuesReader` compiles a serializer into column
+lookups once per request and builds the same output from plain rows, with
+to-many relations fetched as one grouped query each.
+"""
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from core.instrumentation import timer
+from recipe.caching import get_fragment_cache
+from recipe.optimizers import _get_model_field
+
+
+# serializer fields whose to_representation returns database values as is
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+def _identity(value):
+    return value
+
+
+def _scalar_field(model, field):
+    """Return (source column, convert) for a plain column field or None."""
+    model_field = _get_model_field(model, field.source)
+    if (
+        model_field is None
+        or not model_field.concrete
+        or model_field.is_relation
+        or isinstance(field, serializers.SerializerMethodField)
+    ):
+        return None
+    if type(field) in IDENTITY_FIELDS:
+        return model_field.attname, _identity
+    return model_field.attname, field.to_representation
+
+
+def _scalar_fields(serializer):
+    """Return [(name, source, convert)] for a flat serializer or None.
+
+    None means the serializer renders something other than concrete,
+    non-relational columns of its model.
+    """
+    specs = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        spec = _scalar_field(serializer.Meta.model, field)
+        if spec is None:
+            return None
+        specs.append((name, *spec))
+    return specs
+
+
+class ValuesReader:
+    """Render querysets for a serializer without model instances.
+
+    Build readers with `for_serializer`, which returns None for
+    serializers that cannot be read this way, e.g. ones with method
+    fields or forward relations.
+    """
+
+    def __init__(self, model, fields, scalars, relations):
+        self.model = model
+        self.fields = fields
+        self.scalars = scalars
+        self.relations = relations
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        """Return a reader producing serializer's output or None."""
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        if not isinstance(serializer, serializers.ModelSerializer):
+            return None
+
+        model = serializer.Meta.model
+        fields = []
+        scalars = []
+        relations = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            fields.append(name)
+            model_field = _get_model_field(model, field.source)
+            if (
+                isinstance(field, serializers.ListSerializer)
+                and isinstance(field.child, serializers.ModelSerializer)
+                and model_field is not None
+                and model_field.many_to_many
+                and not model_field.auto_created
+            ):
+                nested = _scalar_fields(field.child)
+                if nested is None:
+                    return None
+                relations.append((name, model_field, nested))
+                continue
+            if (
+                isinstance(field, serializers.ManyRelatedField)
+                and type(field.child_relation) is (
+                    serializers.PrimaryKeyRelatedField
+                )
+                and field.child_relation.pk_field is None
+                and model_field is not None
+                and model_field.many_to_many
+                and not model_field.auto_created
+            ):
+                # rendered as a list of primary keys
+                relations.append((name, model_field, None))
+                continue
+
+            spec = _scalar_field(model, field)
+            if spec is None:
+                return None
+            scalars.append((name, *spec))
+
+        return cls(model, fields, scalars, relations)
+
+    def queryset(self, queryset, extra=()):
+        """Return queryset as rows holding the columns to render.
+
+        extra names further columns to select, e.g. pagination ordering.
+        """
+        columns = [source for name, source, convert in self.scalars]
+        columns.append(self.model._meta.pk.attname)
+        columns.extend(field.lstrip('-') for field in extra)
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(columns),
+        )
+
+    def _related_rows(self, model_field, nested, ids):
+        """Return {id: [representation]} for a many-to-many field.
+
+        nested None renders primary keys, read from the through table
+        alone.
+        """
+        through = model_field.remote_field.through
+        source = model_field.m2m_field_name()
+        target = model_field.m2m_reverse_field_name()
+        if nested is None:
+            grouped = {}
+            rows = through.objects.filter(
+                **{f'{source}__in': ids},
+            ).order_by(f'{target}_id').values_list(
+                f'{source}_id',
+                f'{target}_id',
+            )
+            for row_id, related_id in rows:
+                grouped.setdefault(row_id, []).append(related_id)
+            return grouped
+
+        rows = through.objects.filter(
+            **{f'{source}__in': ids},
+        ).order_by(
+            f'{target}__pk',
+        ).values_list(
+            f'{source}_id',
+            *[f'{target}__{column}' for name, column, convert in nested],
+        )
+
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append({
+                name: None if value is None else convert(value)
+                for (name, column, convert), value in zip(nested, row[1:])
+            })
+        return grouped
+
+    def render(self, rows):
+        """Return the representation of rows from `queryset`."""
+        rows = list(rows)
+        pk = self.model._meta.pk.attname
+        ids = [row[pk] for row in rows]
+        related = [
+            (name, self._related_rows(model_field, nested, ids))
+            if ids else (name, {})
+            for name, model_field, nested in self.relations
+        ]
+
+        data = []
+        for row in rows:
+            item = {
+                name: None if row[source] is None else convert(row[source])
+                for name, source, convert in self.scalars
+            }
+            for name, grouped in related:
+                item[name] = grouped.get(row[pk], [])
+            # keep the serializer's key order
+            if self.relations:
+                item = {name: item[name] for name in self.fields}
+            data.append(item)
+        return data
+
+
+class ValuesListMixin:
+    """Serve the list action through a `ValuesReader` when possible.
+
+    Falls back to the serializer when `list_from_values` is False or the
+    serializer cannot be read from rows. With `list_fragments`, rows are
+    looked up in the fragment cache by primary key and `updated_at`, in
+    the keys the serializer uses, and only the misses are rendered.
+    """
+
+    list_from_values = True
+    list_fragments = False
+
+    def _fragment_cache(self, reader):
+        """Return the fragment cache for list rows or None."""
+        if not self.list_fragments or not any(
+            field.name == 'updated_at'
+            for field in reader.model._meta.concrete_fields
+        ):
+            return None
+        return get_fragment_cache()
+
+    def _render(self, reader, serializer, rows, fragment_cache):
+        """Render rows, reusing cached fragments of unchanged ones."""
+        if fragment_cache is None:
+            return reader.render(rows)
+
+        rows = list(rows)
+        shape = fragment_cache.shape(serializer)
+        pk = reader.model._meta.pk.attname
+        keys = [
+            fragment_cache.key(shape, row[pk], row['updated_at'])
+            for row in rows
+        ]
+        cached = fragment_cache.get_many([key for key in keys if key])
+        rendered = iter(reader.render([
+            row for key, row in zip(keys, rows) if key not in cached
+        ]))
+
+        data = []
+        stored = {}
+        for key, row in zip(keys, rows):
+            fragment = cached.get(key)
+            if fragment is None:
+                fragment = next(rendered)
+                if key:
+                    stored[key] = fragment
+            data.append(fragment)
+        fragment_cache.set_many(stored)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        """List objects from values() rows."""
+        serializer = self.get_serializer()
+        reader = ValuesReader.for_serializer(serializer)
+        if not self.list_from_values or reader is None:
+            return super().list(request, *args, **kwargs)
+
+        fragment_cache = self._fragment_cache(reader)
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        if fragment_cache is not None:
+            ordering = (*ordering, 'updated_at')
+        queryset = reader.queryset(
+            self.filter_queryset(self.get_queryset()),
+            extra=ordering,
+        )
+
+        page = self.paginate_queryset(queryset)
+        with timer('serialize'):
+            data = self._render(
+                reader,
+                serializer,
+                queryset if page is None else page,
+                fragment_cache,
+            )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
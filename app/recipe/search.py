@@ -0,0 +1,74 @@
+"""
+Full-text search over recipes.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import (
+    Case,
+    F,
+    IntegerField,
+    Q,
+    Value,
+    When,
+)
+
+# Text search configuration used by the core_recipe search_vector trigger.
+SEARCH_CONFIG = 'english'
+
+MAX_SEARCH_TERMS = 10
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def parse_terms(text):
+    """Split user input into plain word terms, dropping tsquery syntax."""
+    return _TERM_RE.findall(text or '')[:MAX_SEARCH_TERMS]
+
+
+def _postgresql_search(queryset, terms):
+    """Match and rank against the GIN indexed search_vector column."""
+    # every term is matched as a prefix so partially typed words still hit
+    query = SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms),
+        config=SEARCH_CONFIG,
+        search_type='raw',
+    )
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query),
+    ).order_by('-rank', '-id')
+
+
+def _fallback_search(queryset, terms):
+    """Match with LIKE on backends without full-text search support.
+
+    Title hits outrank description hits, mirroring the A/B weights of the
+    PostgreSQL vector.
+    """
+    rank = Value(0, output_field=IntegerField())
+    for term in terms:
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(description__icontains=term),
+        )
+        rank = rank + Case(
+            When(title__icontains=term, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    return queryset.annotate(rank=rank).order_by('-rank', '-id')
+
+
+def search_recipes(queryset, text):
+    """Return recipes in queryset matching text, best matches first.
+
+    Every word in text must match, as a prefix, the recipe title or
+    description.
+    """
+    terms = parse_terms(text)
+    if not terms:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        return _postgresql_search(queryset, terms)
+    return _fallback_search(queryset, terms)
@@ -1,16 +1,55 @@
 """
 Serializers for recipe APIs.
 """
+from django.db import (
+    connections,
+    router,
+    transaction,
+)
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
 from rest_framework import serializers
 
+from core.instrumentation import TimedRepresentationMixin
 from core.models import (
     Recipe,
     Tag,
     Ingredient,
 )
+from core.versioning import (
+    coalesce_data_changes,
+    data_changed,
+)
+from recipe.caching import get_fragment_cache
+from recipe.fieldsets import SparseFieldsMixin
+
+# the most recipes one bulk request may create, update or delete
+BULK_MAX_ITEMS = 500
+
+
+class NamedObjectSerializer(TimedRepresentationMixin,
+                            serializers.ModelSerializer):
+    """Base serializer for objects with a name unique per user."""
+
+    def validate_name(self, value):
+        """Reject renaming to a name the user already uses."""
+        # nested in a recipe, existing names are reused rather than rejected
+        if self.instance is None:
+            return value
+
+        duplicate = self.Meta.model.objects.filter(
+            user=self.instance.user,
+            name=value,
+        ).exclude(pk=self.instance.pk)
+        if duplicate.exists():
+            raise serializers.ValidationError(
+                _('An item with this name already exists.'),
+            )
+        return value
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(NamedObjectSerializer):
     """Serializer for ingredients class."""
 
     class Meta:
@@ -19,7 +58,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_field = ['id']
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(NamedObjectSerializer):
     """Serializer for tags."""
 
     class Meta:
@@ -28,10 +67,139 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_field = ['id']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(TimedRepresentationMixin,
+                           serializers.ListSerializer):
+    """Create and update many recipes with set-based queries.
+
+    Tag and ingredient names across the whole batch are resolved once, and
+    through-table rows for every recipe are written in one insert.
+    """
+    related_models = [
+        ('tags', Tag),
+        ('ingredient', Ingredient),
+    ]
+
+    def _resolve(self, model, items_per_recipe):
+        """Return related objects for each recipe's items (None kept)."""
+        flat = [
+            item
+            for items in items_per_recipe if items
+            for item in items
+        ]
+        by_name = {
+            obj.name: obj
+            for obj in self.child._get_or_create(model, flat)
+        }
+        return [
+            None if items is None else [
+                by_name[name]
+                for name in dict.fromkeys(item['name'] for item in items)
+            ]
+            for items in items_per_recipe
+        ]
+
+    def to_representation(self, data):
+        """Render recipes, reusing cached fragments of unchanged ones.
+
+        The list action reads the same fragments from values() rows, see
+        recipe.readers.ValuesListMixin.
+        """
+        fragment_cache = self.child._fragment_cache()
+        if fragment_cache is None:
+            return super().to_representation(data)
+
+        items = list(data.all() if hasattr(data, 'all') else data)
+        keys = [fragment_cache.make_key(self.child, item) for item in items]
+        cached = fragment_cache.get_many([key for key in keys if key])
+
+        representation = []
+        rendered = {}
+        for key, item in zip(keys, items):
+            fragment = cached.get(key)
+            if fragment is None:
+                fragment = self.child.to_representation(item)
+                if key:
+                    rendered[key] = fragment
+            representation.append(fragment)
+        fragment_cache.set_many(rendered)
+        return representation
+
+    @coalesce_data_changes()
+    @transaction.atomic
+    def create(self, validated_data):
+        """Create recipes, in one insert where the backend returns ids."""
+        related = {
+            field_name: [attrs.pop(field_name, []) for attrs in validated_data]
+            for field_name, model in self.related_models
+        }
+        recipes = [Recipe(**attrs) for attrs in validated_data]
+
+        connection = connections[router.db_for_write(Recipe)]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+
+        for field_name, model in self.related_models:
+            objs = self._resolve(model, related[field_name])
+            self.child._link_related(field_name, zip(recipes, objs))
+
+        # bulk inserts send no signals
+        for user_id in {recipe.user_id for recipe in recipes}:
+            data_changed(user_id)
+
+        return recipes
+
+    @coalesce_data_changes()
+    @transaction.atomic
+    def update(self, instances, validated_data):
+        """Apply partial updates to instances, aligned with validated_data."""
+        related = {
+            field_name: [
+                attrs.pop(field_name, None) for attrs in validated_data
+            ]
+            for field_name, model in self.related_models
+        }
+
+        # bulk_update skips auto_now, set it like save() would
+        now = timezone.now()
+        changed = {'updated_at'}
+        for instance, attrs in zip(instances, validated_data):
+            attrs['updated_at'] = now
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+                changed.add(attr)
+        Recipe.objects.bulk_update(instances, sorted(changed))
+
+        for field_name, model in self.related_models:
+            objs = self._resolve(model, related[field_name])
+            self.child._link_related(
+                field_name,
+                [
+                    (instance, instance_objs)
+                    for instance, instance_objs in zip(instances, objs)
+                    if instance_objs is not None
+                ],
+                replace=True,
+            )
+
+        for user_id in {instance.user_id for instance in instances}:
+            data_changed(user_id)
+
+        return instances
+
+
+class RecipeSerializer(TimedRepresentationMixin,
+                       SparseFieldsMixin,
+                       serializers.ModelSerializer):
     """Serializer for recipes."""
     tags = TagSerializer(many=True, required=False)
-    ingredients = IngredientSerializer(many=True, required=False)
+    ingredients = IngredientSerializer(
+        many=True,
+        required=False,
+        source='ingredient',
+    )
 
     class Meta:
         model = Recipe
@@ -42,43 +210,130 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id',
         ]
+        list_serializer_class = RecipeListSerializer
 
-    def _get_or_create_tags(self, tags, recipe):
-        """Handle getting or creating tags as needed."""
+    def _fragment_cache(self):
+        """Return the fragment cache, None when it must not be used.
+
+        Responses to writes render in-memory instances, which are neither
+        read from nor stored in the cache.
+        """
+        if hasattr(self.root, 'initial_data'):
+            return None
+        return get_fragment_cache()
+
+    def to_representation(self, instance):
+        """Render a recipe, reusing a cached fragment when unchanged."""
+        # a list parent looks up fragments of all its children at once
+        fragment_cache = None
+        if not isinstance(self.parent, serializers.ListSerializer):
+            fragment_cache = self._fragment_cache()
+        key = fragment_cache and fragment_cache.make_key(self, instance)
+        if not key:
+            return super().to_representation(instance)
+
+        fragment = fragment_cache.get_many([key]).get(key)
+        if fragment is None:
+            fragment = super().to_representation(instance)
+            fragment_cache.set_many({key: fragment})
+        return fragment
+
+    def _get_or_create(self, model, items):
+        """Return user owned objects named in items, creating missing ones.
+
+        Costs one query when every name exists and three otherwise, however
+        many items are given.
+        """
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return []
+
+        found = {
+            obj.name: obj
+            for obj in model.objects.filter(user=auth_user, name__in=names)
+        }
+        missing = [name for name in names if name not in found]
+        if missing:
+            # rows created concurrently by another request are skipped by
+            # the (user, name) constraint and picked up by the re-read
+            model.objects.bulk_create(
+                [model(user=auth_user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            found.update(
+                (obj.name, obj)
+                for obj in model.objects.filter(
+                    user=auth_user,
+                    name__in=missing,
+                )
             )
-            recipe.tags.add(tag_obj)
+
+        return [found[name] for name in names]
+
+    def _link_related(self, field_name, links, replace=False):
+        """Link recipes to related objects with one through-table insert.
+
+        links is a sequence of (recipe, objs) pairs. With replace, existing
+        links of those recipes are deleted first, in one more query.
+        """
+        links = list(links)
+        through = getattr(Recipe, field_name).through
+        target_column = through._meta.get_field(
+            getattr(Recipe, field_name).rel.field.m2m_reverse_field_name(),
+        ).attname
+        if replace and links:
+            through.objects.filter(
+                recipe_id__in=[recipe.pk for recipe, objs in links],
+            ).delete()
+
+        rows = [
+            through(recipe_id=recipe.pk, **{target_column: obj.pk})
+            for recipe, objs in links
+            for obj in objs
+        ]
+        if rows:
+            through.objects.bulk_create(rows)
+
+    def _get_or_create_tags(self, tags, recipe):
+        """Handle getting or creating tags as needed."""
+        self._link_related(
+            'tags',
+            [(recipe, self._get_or_create(Tag, tags))],
+        )
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed."""
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, create = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredient.add(ingredient_obj)
+        self._link_related(
+            'ingredient',
+            [(recipe, self._get_or_create(Ingredient, ingredients))],
+        )
 
+    @coalesce_data_changes()
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop('tags', [])
-        ingredients = validated_data.pop('ingredients', [])
+        ingredients = validated_data.pop('ingredient', [])
         recipe = Recipe.objects.create(**validated_data)
         self._get_or_create_tags(tags, recipe)
         self._get_or_create_ingredients(ingredients, recipe)
 
         return recipe
 
+    @coalesce_data_changes()
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update recipe."""
         tags = validated_data.pop('tags', None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create(Tag, tags))
+
+        ingredients = validated_data.pop('ingredient', None)
+        if ingredients is not None:
+            instance.ingredient.set(
+                self._get_or_create(Ingredient, ingredients),
+            )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -92,3 +347,12 @@ class RecipeDetailSerializer(RecipeSerializer):
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ['description']
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Serializer for a list of recipe ids."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS,
+    )
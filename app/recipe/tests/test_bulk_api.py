@@ -0,0 +1,216 @@
+"""
+Tests for bulk recipe APIs.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.serializers import BULK_MAX_ITEMS
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_payload(index, tags=(), ingredients=()):
+    """Return a recipe payload for the bulk API."""
+    return {
+        'title': f'Recipe {index}',
+        'time_minutes': 10 + index,
+        'price': '4.50',
+        'tags': [{'name': name} for name in tags],
+        'ingredients': [{'name': name} for name in ingredients],
+    }
+
+
+class BulkRecipeAPITests(TestCase):
+    """Test bulk create, update and delete of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating recipes with shared tags and ingredients."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = [
+            recipe_payload(0, tags=['Dinner', 'Thai'], ingredients=['Rice']),
+            recipe_payload(1, tags=['Thai'], ingredients=['Rice', 'Lime']),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['title'] for item in res.data],
+            ['Recipe 0', 'Recipe 1'],
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+        first = Recipe.objects.get(id=res.data[0]['id'])
+        self.assertEqual(first.user, self.user)
+        self.assertEqual(
+            sorted(first.tags.values_list('name', flat=True)),
+            ['Dinner', 'Thai'],
+        )
+        self.assertEqual(
+            [tag['name'] for tag in res.data[1]['tags']],
+            ['Thai'],
+        )
+
+    def test_bulk_create_invalid_writes_nothing(self):
+        """Test one invalid recipe rejects the batch with aligned errors."""
+        invalid = recipe_payload(1)
+        del invalid['title']
+        payload = [recipe_payload(0), invalid]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_requires_list(self):
+        """Test a non-list or oversized body is rejected."""
+        res = self.client.post(BULK_URL, recipe_payload(0), format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(BULK_URL, [], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(
+        connection.features.can_return_rows_from_bulk_insert,
+        'backend does not return ids from bulk inserts',
+    )
+    def test_bulk_create_query_count_constant(self):
+        """Test batch size does not change the number of queries."""
+        counts = []
+        for size in (2, 20):
+            payload = [
+                recipe_payload(i, tags=[f'T{i}'], ingredients=[f'I{i}'])
+                for i in range(size)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(BULK_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_partial_update(self):
+        """Test updating fields and tags of several recipes."""
+        r1 = create_recipe(self.user, title='Old one')
+        r2 = create_recipe(self.user, title='Old two')
+        r2.tags.add(Tag.objects.create(user=self.user, name='Stale'))
+        payload = [
+            {'id': r1.id, 'title': 'New one'},
+            {'id': r2.id, 'price': '9.99', 'tags': [{'name': 'Fresh'}]},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        r1.refresh_from_db()
+        r2.refresh_from_db()
+        self.assertEqual(r1.title, 'New one')
+        self.assertEqual(r2.title, 'Old two')
+        self.assertEqual(r2.price, Decimal('9.99'))
+        self.assertEqual(
+            list(r2.tags.values_list('name', flat=True)),
+            ['Fresh'],
+        )
+        self.assertEqual(res.data[1]['tags'][0]['name'], 'Fresh')
+
+    def test_bulk_update_other_users_recipe(self):
+        """Test recipes of other users are reported as not found."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        mine = create_recipe(self.user)
+        theirs = create_recipe(other, title='Not yours')
+        payload = [
+            {'id': mine.id, 'title': 'Changed'},
+            {'id': theirs.id, 'title': 'Changed'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        theirs.refresh_from_db()
+        mine.refresh_from_db()
+        self.assertEqual(theirs.title, 'Not yours')
+        self.assertEqual(mine.title, 'Sample recipe')
+
+    def test_bulk_delete(self):
+        """Test deleting recipes by id, limited to the user."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        r1 = create_recipe(self.user)
+        r2 = create_recipe(self.user)
+        keep = create_recipe(self.user)
+        theirs = create_recipe(other)
+
+        res = self.client.delete(
+            BULK_URL,
+            {'ids': [r1.id, r2.id, theirs.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['deleted'], [r1.id, r2.id])
+        self.assertEqual(res.data['not_found'], [theirs.id])
+        self.assertEqual(
+            set(Recipe.objects.values_list('id', flat=True)),
+            {keep.id, theirs.id},
+        )
+
+    def test_bulk_limit(self):
+        """Test bodies and id lists share one size limit."""
+        too_many = BULK_MAX_ITEMS + 1
+
+        res = self.client.post(
+            BULK_URL,
+            [recipe_payload(i) for i in range(too_many)],
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.delete(
+            BULK_URL,
+            {'ids': list(range(1, too_many + 1))},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
@@ -0,0 +1,296 @@
+"""
+Tests for the recipe response cache.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+from recipe.caching import (
+    ResponseCache,
+    get_fragment_cache,
+    get_response_cache,
+)
+from recipe.readers import ValuesReader
+
+RECIPE_URL = reverse('recipe:recipe-list')
+SEARCH_URL = reverse('recipe:recipe-search')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-responses',
+        'OPTIONS': {'MAX_ENTRIES': 100},
+    },
+}
+
+
+class ResponseCacheTests(TestCase):
+    """Test caching of recipe API responses."""
+
+    def setUp(self):
+        override = override_settings(
+            CACHES=TEST_CACHES,
+            RESPONSE_CACHE={'CACHE_ALIAS': 'responses', 'TTL': 60},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        get_response_cache().backend.clear()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list request skips queries and serializers."""
+        recipe = create_recipe(self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Lunch'))
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), first.json())
+        stats = get_response_cache().stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_detail_served_from_cache(self):
+        """Test a repeated detail request is served from the cache."""
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+        first = self.client.get(url)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+
+        self.assertEqual(res.json(), first.json())
+
+    def test_writes_invalidate(self):
+        """Test recipe, tag and relation writes are visible immediately."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        self.client.get(RECIPE_URL)
+
+        recipe.tags.add(tag)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Lunch')
+
+        tag.name = 'Brunch'
+        tag.save()
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Brunch')
+
+        self.client.patch(detail_url(recipe.id), {'title': 'New title'})
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data['results'][0]['title'], 'New title')
+
+        self.assertEqual(get_response_cache().stats()['hits'], 0)
+
+    def test_cache_per_user_and_query(self):
+        """Test users and query parameters never share entries."""
+        create_recipe(self.user, time_minutes=5)
+        create_recipe(self.user, time_minutes=50)
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(other)
+
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 2)
+        res = self.client.get(RECIPE_URL, {'time_max': 10})
+        self.assertEqual(len(res.data['results']), 1)
+
+        self.client.force_authenticate(other)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(get_response_cache().stats()['hits'], 0)
+
+    @override_settings(RESPONSE_CACHE={'ENABLED': False})
+    def test_cache_disabled(self):
+        """Test responses are not cached when disabled."""
+        create_recipe(self.user)
+        self.client.get(RECIPE_URL)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(get_response_cache())
+
+    def test_bounded_size(self):
+        """Test the backend evicts entries beyond MAX_ENTRIES."""
+        response_cache = ResponseCache(cache_alias='responses')
+        for i in range(150):
+            response_cache.backend.set(f'key-{i}', i)
+
+        self.assertLessEqual(len(response_cache.backend._cache), 100)
+
+
+class FragmentCacheTests(TestCase):
+    """Test reuse of per-recipe representations."""
+
+    def setUp(self):
+        override = override_settings(
+            CACHES=TEST_CACHES,
+            RESPONSE_CACHE={'ENABLED': False},
+            FRAGMENT_CACHE={'CACHE_ALIAS': 'responses', 'TTL': 60},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        get_fragment_cache().backend.clear()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_search_reuses_unchanged_fragments(self):
+        """Test only new recipes are rendered after the results change."""
+        for i in range(3):
+            create_recipe(self.user, title=f'Recipe {i}')
+        self.client.get(SEARCH_URL, {'q': 'recipe'})
+        create_recipe(self.user, title='New recipe')
+        fragment_cache = get_fragment_cache()
+        backend = fragment_cache.backend
+
+        with mock.patch.object(
+            backend, 'get_many', wraps=backend.get_many,
+        ) as get_many:
+            res = self.client.get(SEARCH_URL, {'q': 'recipe'})
+
+        get_many.assert_called_once()
+        self.assertEqual(len(res.data['results']), 4)
+        self.assertEqual(res.data['results'][0]['title'], 'New recipe')
+        stats = fragment_cache.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 4)
+
+    def test_list_reuses_unchanged_fragments(self):
+        """Test the list renders only rows missing from the cache."""
+        for i in range(3):
+            create_recipe(self.user, title=f'Recipe {i}')
+        self.client.get(RECIPE_URL)
+        create_recipe(self.user, title='New recipe')
+
+        with mock.patch(
+            'recipe.readers.ValuesReader.render',
+            autospec=True,
+            side_effect=ValuesReader.render,
+        ) as render:
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(render.call_args.args[1]), 1)
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['results']],
+            ['New recipe', 'Recipe 2', 'Recipe 1', 'Recipe 0'],
+        )
+        stats = get_fragment_cache().stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 4)
+
+    def test_list_and_search_share_fragments(self):
+        """Test rows and instances of one recipe use the same fragment."""
+        recipe = create_recipe(self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Lunch'))
+        searched = self.client.get(SEARCH_URL, {'q': 'sample'})
+
+        listed = self.client.get(RECIPE_URL)
+
+        self.assertEqual(listed.data['results'], searched.data['results'])
+        self.assertEqual(get_fragment_cache().stats()['hits'], 1)
+
+    def test_changed_recipes_rendered_again(self):
+        """Test recipe and tag changes are never served from fragments."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag)
+        self.client.get(RECIPE_URL)
+
+        tag.name = 'Brunch'
+        tag.save()
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Brunch')
+
+        self.client.patch(detail_url(recipe.id), {'title': 'New sample'})
+        res = self.client.get(SEARCH_URL, {'q': 'sample'})
+        self.assertEqual(res.data['results'][0]['title'], 'New sample')
+        self.assertEqual(get_fragment_cache().stats()['hits'], 0)
+
+    def test_detail_fragment(self):
+        """Test the detail serializer caches its own fragment."""
+        recipe = create_recipe(self.user, description='Detail only')
+        self.client.get(SEARCH_URL, {'q': 'sample'})
+        url = detail_url(recipe.id)
+
+        first = self.client.get(url)
+        res = self.client.get(url)
+
+        self.assertEqual(first.data['description'], 'Detail only')
+        self.assertEqual(res.data, first.data)
+        stats = get_fragment_cache().stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+
+    def test_expanded_and_plain_fragments_kept_apart(self):
+        """Test primary key and nested renderings have their own keys."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag)
+        url = detail_url(recipe.id)
+
+        expanded = self.client.get(url, {'expand': ''})
+        res = self.client.get(url)
+
+        self.assertEqual(expanded.data['tags'], [tag.id])
+        self.assertEqual(
+            res.data['tags'],
+            [{'id': tag.id, 'name': 'Lunch'}],
+        )
+
+    def test_writes_skip_fragments(self):
+        """Test write responses neither read nor store fragments."""
+        payload = {'title': 'Sample', 'time_minutes': 5, 'price': '1.00'}
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        stats = get_fragment_cache().stats()
+        self.assertEqual(stats['misses'], 0)
+        self.assertEqual(stats['stores'], 0)
@@ -0,0 +1,189 @@
+"""
+Tests for conditional requests on recipe APIs.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test ETag and Last-Modified handling."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        """Test an unchanged list answers 304 from one version lookup."""
+        create_recipe(self.user)
+        res = self.client.get(RECIPE_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_list_if_modified_since(self):
+        """Test If-Modified-Since is answered from the data version."""
+        create_recipe(self.user)
+        res = self.client.get(RECIPE_URL)
+
+        res = self.client.get(
+            RECIPE_URL,
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified'],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes(self):
+        """Test recipe, tag and relation writes change the list ETag."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        etags = [self.client.get(RECIPE_URL)['ETag']]
+
+        changes = [
+            lambda: create_recipe(self.user),
+            lambda: recipe.tags.add(tag),
+            lambda: Tag.objects.filter(pk=tag.pk).get().save(),
+            lambda: recipe.delete(),
+        ]
+        for change in changes:
+            change()
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etags[-1])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            etags.append(res['ETag'])
+
+        self.assertEqual(len(set(etags)), len(etags))
+
+    def test_list_etag_depends_on_query(self):
+        """Test different query parameters get different ETags."""
+        create_recipe(self.user)
+
+        first = self.client.get(RECIPE_URL)['ETag']
+        filtered = self.client.get(RECIPE_URL, {'time_max': 5})['ETag']
+
+        self.assertNotEqual(first, filtered)
+
+    def test_bulk_create_changes_list_etag(self):
+        """Test bulk inserts, which send no signals, change the ETag."""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        payload = [{'title': 'Bulk', 'time_minutes': 5, 'price': '1.00'}]
+        self.client.post(BULK_URL, payload, format='json')
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified(self):
+        """Test an unchanged recipe answers 304."""
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_on_tag_rename(self):
+        """Test renaming a tag changes the ETag of recipes using it."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag)
+        url = detail_url(recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        tag.name = 'Brunch'
+        tag.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Brunch')
+
+    def test_update_if_match(self):
+        """Test updates with a stale If-Match fail with 412."""
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.patch(url, {'title': 'First'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        res = self.client.patch(url, {'title': 'Second'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'First')
+
+    def test_delete_if_match(self):
+        """Test deletes with a stale If-Match fail with 412."""
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+
+        res = self.client.delete(url, HTTP_IF_MATCH='"recipe.0.0"')
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_tag_update_if_match(self):
+        """Test tag updates honour If-Match."""
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        url = reverse('recipe:tag-detail', args=[tag.id])
+
+        res = self.client.patch(
+            url,
+            {'name': 'Dinner'},
+            HTTP_IF_MATCH='"tag.0.0"',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_update_with_weak_if_match(self):
+        """Test ETags weakened by compression still match on writes."""
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.patch(
+            url,
+            {'title': 'New title'},
+            HTTP_IF_MATCH=f'W/{etag}',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,137 @@
+"""
+Tests for the recipe export API.
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+from recipe.serializers import RecipeDetailSerializer
+from recipe.views import RecipeViewSet
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def create_recipe(user, index):
+    """Create and return a recipe with one tag and one ingredient."""
+    recipe = Recipe.objects.create(
+        user=user,
+        title=f'Recipe {index}',
+        description=f'Steps, "quoted"\nfor {index}',
+        time_minutes=10,
+        price=Decimal('5.25'),
+    )
+    recipe.tags.add(Tag.objects.create(user=user, name=f'Tag {index}'))
+    recipe.ingredient.add(
+        Ingredient.objects.create(user=user, name=f'Ingredient {index}'),
+    )
+    return recipe
+
+
+class RecipeExportAPITests(TestCase):
+    """Test streaming recipe exports."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _content(self, res):
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson_matches_detail_serializer(self):
+        """Test each NDJSON line equals the recipe detail representation."""
+        recipes = [create_recipe(self.user, i) for i in range(3)]
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = self._content(res).splitlines()
+        expected = [
+            json.loads(json.dumps(RecipeDetailSerializer(recipe).data))
+            for recipe in recipes
+        ]
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_export_csv(self):
+        """Test CSV export round-trips through a CSV reader."""
+        recipe = create_recipe(self.user, 0)
+
+        res = self.client.get(EXPORT_URL, {'output': 'csv'})
+
+        rows = list(csv.DictReader(io.StringIO(self._content(res))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(recipe.id))
+        self.assertEqual(rows[0]['description'], recipe.description)
+        self.assertEqual(rows[0]['tags'], 'Tag 0')
+        self.assertEqual(rows[0]['ingredients'], 'Ingredient 0')
+
+    def test_export_limited_to_user_and_filters(self):
+        """Test export only includes the user's recipes matching filters."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(other, 0)
+        mine = create_recipe(self.user, 1)
+        create_recipe(self.user, 2)
+        tag = mine.tags.get()
+
+        res = self.client.get(EXPORT_URL, {'tags': str(tag.id)})
+
+        lines = self._content(res).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [mine.id])
+
+    def test_export_invalid_output(self):
+        """Test unknown export formats are rejected."""
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch.object(RecipeViewSet, 'export_chunk_size', 2)
+    def test_export_queries_per_chunk(self):
+        """Test related rows are fetched per chunk, not per recipe."""
+        for i in range(5):
+            create_recipe(self.user, i)
+
+        res = self.client.get(EXPORT_URL)
+        with CaptureQueriesContext(connection) as ctx:
+            lines = self._content(res).splitlines()
+
+        self.assertEqual(len(lines), 5)
+        # the recipe rows plus a tags and an ingredients query per chunk
+        self.assertEqual(len(ctx.captured_queries), 1 + 3 * 2)
+
+    @patch.object(RecipeViewSet, 'export_write_size', 1)
+    def test_export_write_size(self):
+        """Test lines are sent in pieces of at least export_write_size."""
+        for i in range(3):
+            create_recipe(self.user, i)
+
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(len(list(res.streaming_content)), 3)
+
+        with patch.object(RecipeViewSet, 'export_write_size', 10 ** 6):
+            res = self.client.get(EXPORT_URL)
+            self.assertEqual(len(list(res.streaming_content)), 1)
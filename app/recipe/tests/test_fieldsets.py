@@ -0,0 +1,152 @@
+"""
+Tests for sparse fieldsets and expansion on recipe APIs.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.views import RecipeViewSet
+
+RECIPE_URL = reverse('recipe:recipe-list')
+SEARCH_URL = reverse('recipe:recipe-search')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(
+    RESPONSE_CACHE={'ENABLED': False},
+    FRAGMENT_CACHE={'ENABLED': False},
+)
+class SparseFieldsetTests(TestCase):
+    """Test the fields and expand query parameters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dinner']
+        ]
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Kale',
+        )
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Kale recipe {i}',
+                time_minutes=5,
+                price=Decimal('5.50'),
+                description='Green',
+            )
+            recipe.tags.set(self.tags[:i])
+            recipe.ingredient.add(self.ingredient)
+        self.recipe = recipe
+
+    def test_titles_only_list(self):
+        """Test a titles only list costs one narrow query."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'][0],
+            {'id': self.recipe.id, 'title': 'Kale recipe 2'},
+        )
+        # data version lookup and the recipe query
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"price"', queries[1]['sql'])
+
+    def test_expand_subset(self):
+        """Test unexpanded relations render as lists of ids."""
+        res = self.client.get(RECIPE_URL, {
+            'fields': 'id,tags,ingredients',
+            'expand': 'ingredients',
+        })
+
+        self.assertEqual(res.data['results'][0], {
+            'id': self.recipe.id,
+            'tags': sorted(tag.id for tag in self.tags),
+            'ingredients': [{'id': self.ingredient.id, 'name': 'Kale'}],
+        })
+
+    def test_serializer_parity(self):
+        """Test lists from values() rows match the serializer."""
+        cases = [
+            {'fields': 'title,price'},
+            {'expand': ''},
+            {'fields': 'tags,title', 'expand': 'tags'},
+        ]
+        for params in cases:
+            fast = self.client.get(RECIPE_URL, params)
+            with mock.patch.object(RecipeViewSet, 'list_from_values', False):
+                slow = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(fast.content, slow.content)
+
+    def test_retrieve_fields(self):
+        """Test detail reads skip prefetches of relations not requested."""
+        url = detail_url(self.recipe.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'fields': 'title,description'})
+
+        self.assertEqual(res.data, {
+            'title': 'Kale recipe 2',
+            'description': 'Green',
+        })
+        # object validators and the recipe query
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"link"', queries[1]['sql'])
+
+    def test_search_fields(self):
+        """Test search results honour fields."""
+        res = self.client.get(SEARCH_URL, {'q': 'kale', 'fields': 'title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [set(item) for item in res.data['results']],
+            [{'title'}] * 3,
+        )
+
+    def test_invalid_fieldsets(self):
+        """Test unknown fields and relations are rejected."""
+        for params in [
+            {'fields': 'title,secret'},
+            {'fields': ''},
+            {'expand': 'title'},
+        ]:
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
+
+    def test_writes_render_all_fields(self):
+        """Test write responses ignore fields."""
+        url = detail_url(self.recipe.id) + '?fields=title'
+
+        res = self.client.patch(url, {'time_minutes': 7})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('tags', res.data)
@@ -1,6 +1,8 @@
 """
 Test cases for ingredient API functionality.
 """
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
@@ -8,7 +10,10 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Ingredient
+from core.models import (
+    Recipe,
+    Ingredient,
+)
 
 from recipe.serializers import IngredientSerializer
 
@@ -60,7 +65,7 @@ class PrivateIngredientAPITest(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(serializer.data, res.data)
+        self.assertEqual(serializer.data, res.data['results'])
 
     def test_user_based_limited_ingredients(self):
         """Test list of ingredients which is limited to user."""
@@ -78,7 +83,7 @@ class PrivateIngredientAPITest(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
         # ========= created by Mark =========
         # Ingredient.objects.create(user=user1, name='Salt')
@@ -120,3 +125,22 @@ class PrivateIngredientAPITest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         ingredients = Ingredient.objects.filter(user=self.user)
         self.assertFalse(ingredients.exists())
+
+    def test_filter_ingredients_assigned_to_recipes(self):
+        """Test listing ingredients to those assigned to recipes."""
+        in1 = Ingredient.objects.create(user=self.user, name='Apples')
+        in2 = Ingredient.objects.create(user=self.user, name='Turkey')
+        for title in ['Apple crumble', 'Apple pie']:
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=Decimal('4.50'),
+                user=self.user,
+            )
+            recipe.ingredient.add(in1)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [in1.id])
+        self.assertNotIn(in2.id, ids)
@@ -0,0 +1,219 @@
+"""
+Tests for serializer driven queryset optimization.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.tests.utils import QueryCountAssertionsMixin
+
+from recipe.optimizers import optimize_queryset
+from recipe.serializers import (
+    RecipeSerializer,
+    RecipeDetailSerializer,
+    TagSerializer,
+)
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, index=0):
+    """Create and return a recipe with a tag and an ingredient."""
+    recipe = Recipe.objects.create(
+        user=user,
+        title=f'Recipe {index}',
+        time_minutes=10,
+        price=Decimal('5.50'),
+    )
+    recipe.tags.add(Tag.objects.create(user=user, name=f'Tag {index}'))
+    recipe.ingredient.add(
+        Ingredient.objects.create(user=user, name=f'Ingredient {index}'),
+    )
+    return recipe
+
+
+class OptimizeQuerysetTests(TestCase):
+    """Test prefetches derived from serializers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+
+    def test_prefetches_nested_relations(self):
+        """Test nested many relations are prefetched by model field name."""
+        queryset = optimize_queryset(Recipe.objects.all(), RecipeSerializer)
+
+        lookups = [p.prefetch_to for p in queryset._prefetch_related_lookups]
+        self.assertEqual(lookups, ['tags', 'ingredient'])
+
+    def test_prefetch_narrowed_to_serializer_fields(self):
+        """Test prefetched rows only load the columns the child reads."""
+        queryset = optimize_queryset(Recipe.objects.all(), RecipeSerializer)
+
+        prefetch = queryset._prefetch_related_lookups[0]
+        only, _ = prefetch.queryset.query.deferred_loading
+        self.assertEqual(set(only), {'id', 'name'})
+        self.assertEqual(prefetch.queryset.query.order_by, ('pk',))
+
+    def test_flat_serializer_unchanged(self):
+        """Test serializers without relations add no prefetches."""
+        queryset = optimize_queryset(Tag.objects.all(), TagSerializer)
+
+        self.assertEqual(queryset._prefetch_related_lookups, ())
+
+    def test_output_matches_unoptimized(self):
+        """Test optimized querysets serialize to the same data."""
+        for index in range(3):
+            create_recipe(self.user, index)
+        plain = Recipe.objects.order_by('-id')
+
+        optimized = optimize_queryset(plain, RecipeDetailSerializer)
+
+        self.assertEqual(
+            RecipeDetailSerializer(optimized, many=True).data,
+            RecipeDetailSerializer(plain, many=True).data,
+        )
+
+
+class RecipeQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    """Test recipe endpoints issue a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.created = 0
+
+    def _grow(self, count):
+        for _ in range(count):
+            create_recipe(self.user, self.created)
+            self.created += 1
+
+    def test_list_query_count_constant(self):
+        """Test listing recipes costs the same for any number of rows."""
+        def request():
+            res = self.client.get(RECIPE_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertConstantQueries(4, request, self._grow)
+
+    def test_retrieve_query_count_constant(self):
+        """Test retrieving a recipe costs the same for any relation size."""
+        recipe = create_recipe(self.user)
+
+        def grow(count):
+            for index in range(count):
+                recipe.tags.add(Tag.objects.create(
+                    user=self.user,
+                    name=f'Extra {self.created}-{index}',
+                ))
+            self.created += 1
+
+        def request():
+            res = self.client.get(detail_url(recipe.id))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertConstantQueries(4, request, grow)
+
+    def test_filtered_list_query_count_constant(self):
+        """Test filtering by tags keeps the list to a fixed query count."""
+        tag = Tag.objects.create(user=self.user, name='Filtered')
+
+        def grow(count):
+            for _ in range(count):
+                create_recipe(self.user, self.created).tags.add(tag)
+                self.created += 1
+
+        def request():
+            res = self.client.get(RECIPE_URL, {
+                'tags': str(tag.id),
+                'price_max': '10',
+            })
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertConstantQueries(4, request, grow)
+
+
+class RecipeWriteQueryCountTests(TestCase):
+    """Test nested tag and ingredient writes use constant round trips."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, size, prefix):
+        return {
+            'title': 'Big recipe',
+            'time_minutes': 30,
+            'price': '10.00',
+            'tags': [{'name': f'{prefix} tag {i}'} for i in range(size)],
+            'ingredients': [
+                {'name': f'{prefix} ingredient {i}'} for i in range(size)
+            ],
+        }
+
+    def _count_queries(self, method, url, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            res = getattr(self.client, method)(url, payload, format='json')
+        self.assertIn(res.status_code, (200, 201), res.data)
+        return len(ctx.captured_queries)
+
+    def test_create_query_count_constant(self):
+        """Test creating with 1 or 30 new tags/ingredients costs the same."""
+        small = self._count_queries('post', RECIPE_URL, self._payload(1, 'a'))
+        large = self._count_queries('post', RECIPE_URL, self._payload(30, 'b'))
+
+        self.assertEqual(small, large)
+        recipe = Recipe.objects.latest('id')
+        self.assertEqual(recipe.tags.count(), 30)
+        self.assertEqual(recipe.ingredient.count(), 30)
+
+    def test_create_reuses_existing_names(self):
+        """Test existing names are linked, not duplicated."""
+        tag = Tag.objects.create(user=self.user, name='a tag 0')
+        payload = self._payload(2, 'a')
+        payload['tags'].append({'name': 'a tag 0'})
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertIn(tag, recipe.tags.all())
+
+    def test_update_query_count_constant(self):
+        """Test replacing 1 or 30 tags/ingredients costs the same."""
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+
+        small = self._count_queries('patch', url, self._payload(1, 'a'))
+        large = self._count_queries('patch', url, self._payload(30, 'b'))
+
+        self.assertEqual(small, large)
+        self.assertEqual(recipe.tags.count(), 30)
@@ -0,0 +1,111 @@
+"""
+Tests for cursor pagination of recipe APIs.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+
+from recipe.pagination import RecipeCursorPagination
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def create_recipe(user, title='Sample recipe'):
+    """Create and return a sample recipe."""
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=Decimal('5.00'),
+    )
+
+
+class PaginationTests(TestCase):
+    """Test paginated list endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _collect_ids(self, url, params):
+        """Follow `next` links and return every id seen."""
+        ids = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in res.data['results'])
+            if not res.data['next']:
+                return ids
+            res = self.client.get(res.data['next'])
+
+    def test_recipes_paginated_newest_first(self):
+        """Test recipe pages are sized and ordered by descending id."""
+        recipes = [create_recipe(self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']],
+            [recipes[4].id, recipes[3].id],
+        )
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_following_cursors_returns_all(self):
+        """Test walking every page returns each recipe once."""
+        recipes = [create_recipe(self.user) for _ in range(7)]
+
+        ids = self._collect_ids(RECIPE_URL, {'page_size': 3})
+
+        self.assertEqual(ids, sorted((r.id for r in recipes), reverse=True))
+
+    def test_page_size_capped(self):
+        """Test requested page size is limited to the maximum."""
+        for _ in range(3):
+            create_recipe(self.user)
+
+        with patch.object(RecipeCursorPagination, 'max_page_size', 2):
+            res = self.client.get(RECIPE_URL, {'page_size': 100})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_insert_between_pages_is_stable(self):
+        """Test rows created while paging do not shift later pages."""
+        recipes = [create_recipe(self.user) for _ in range(4)]
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        create_recipe(self.user, title='Created while paging')
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']],
+            [recipes[1].id, recipes[0].id],
+        )
+
+    def test_tags_paginated_by_name(self):
+        """Test tag pages are ordered by descending name."""
+        for name in ['Vegan', 'Dessert', 'Brunch', 'Lunch']:
+            Tag.objects.create(user=self.user, name=name)
+
+        ids = self._collect_ids(TAGS_URL, {'page_size': 1})
+
+        expected = Tag.objects.order_by('-name', 'id')
+        self.assertEqual(ids, [tag.id for tag in expected])
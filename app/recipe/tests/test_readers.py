@@ -0,0 +1,152 @@
+"""
+Tests for rendering lists from values() rows.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import serializers as drf_serializers
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import serializers
+from recipe.readers import ValuesReader
+from recipe.views import (
+    RecipeViewSet,
+    TagViewSet,
+    IngredientViewSet,
+)
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+@override_settings(
+    RESPONSE_CACHE={'ENABLED': False},
+    FRAGMENT_CACHE={'ENABLED': False},
+)
+class ValuesListParityTests(TestCase):
+    """Test values() lists render byte-identical to the serializers."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dinner', 'Café', 'Quick']
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ['Salt', 'Kale', 'Crème fraîche']
+        ]
+        Tag.objects.create(user=self.user, name='Unused')
+        prices = ['0.99', '5.5', '10', '999.00', '12.30']
+        for i, price in enumerate(prices):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe "{i}" ü',
+                time_minutes=i * 7,
+                price=Decimal(price),
+                link='' if i % 2 else f'https://example.com/{i}',
+                description='Not in lists',
+            )
+            recipe.tags.set(tags[i % 4:])
+            recipe.ingredient.set(ingredients[:i % 3])
+
+    def assertParity(self, viewset, url, params=None):
+        """Assert fast and serializer lists produce the same bytes."""
+        fast = self.client.get(url, params)
+        with mock.patch.object(viewset, 'list_from_values', False):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_recipe_list(self):
+        """Test recipe lists match, including nested relations."""
+        res = self.assertParity(RecipeViewSet, RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_recipe_list_filtered(self):
+        """Test filtered recipe lists match."""
+        tag = Tag.objects.get(name='Quick')
+        self.assertParity(RecipeViewSet, RECIPE_URL, {'tags': str(tag.id)})
+        self.assertParity(RecipeViewSet, RECIPE_URL, {'price_max': '10'})
+
+    def test_recipe_list_pages(self):
+        """Test every page and the cursors between them match."""
+        res = self.assertParity(RecipeViewSet, RECIPE_URL, {'page_size': 2})
+        pages = 1
+        while res.data['next']:
+            res = self.assertParity(RecipeViewSet, res.data['next'])
+            pages += 1
+
+        self.assertEqual(pages, 3)
+
+    def test_named_object_lists(self):
+        """Test tag and ingredient lists match."""
+        self.assertParity(TagViewSet, TAGS_URL)
+        self.assertParity(TagViewSet, TAGS_URL, {'assigned_only': 1})
+        self.assertParity(
+            IngredientViewSet,
+            INGREDIENTS_URL,
+            {'page_size': 2},
+        )
+
+    def test_empty_list(self):
+        """Test empty lists match."""
+        Recipe.objects.all().delete()
+
+        self.assertParity(RecipeViewSet, RECIPE_URL)
+
+    def test_query_count(self):
+        """Test the fast path keeps one query per to-many relation."""
+        with self.assertNumQueries(4):
+            self.client.get(RECIPE_URL)
+
+
+class ValuesReaderTests(TestCase):
+    """Test compiling serializers into readers."""
+
+    def test_unsupported_serializer(self):
+        """Test serializers with method fields are not compiled."""
+        class TitleSerializer(drf_serializers.ModelSerializer):
+            upper = drf_serializers.SerializerMethodField()
+
+            class Meta:
+                model = Recipe
+                fields = ['id', 'upper']
+
+            def get_upper(self, obj):
+                return obj.title.upper()
+
+        self.assertIsNone(ValuesReader.for_serializer(TitleSerializer()))
+
+    def test_recipe_serializer(self):
+        """Test the recipe serializer compiles with both relations."""
+        reader = ValuesReader.for_serializer(serializers.RecipeSerializer())
+
+        self.assertEqual(
+            reader.fields,
+            ['id', 'title', 'time_minutes', 'price', 'link', 'tags',
+             'ingredients'],
+        )
+        self.assertEqual(
+            [name for name, field, nested in reader.relations],
+            ['tags', 'ingredients'],
+        )
@@ -86,7 +86,8 @@ class PrivateRecipeAPITest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)  # to match the data
+        # to match the data
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of recipes is limited to authenticated user."""
@@ -103,7 +104,7 @@ class PrivateRecipeAPITest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         """Test get recipe detail."""
@@ -375,3 +376,82 @@ class PrivateRecipeAPITest(TestCase):
                 user=self.user,
             ).exists()
             self.assertTrue(exists)
+
+    def test_update_recipe_ingredients(self):
+        """Test replacing ingredients when updating a recipe."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Pepper')
+        recipe = create_recipe(user=self.user)
+        recipe.ingredient.add(ingredient)
+
+        payload = {'ingredients': [{'name': 'Chili'}]}
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        new_ingredient = Ingredient.objects.get(user=self.user, name='Chili')
+        self.assertIn(new_ingredient, recipe.ingredient.all())
+        self.assertNotIn(ingredient, recipe.ingredient.all())
+        self.assertEqual(res.data['ingredients'][0]['name'], 'Chili')
+
+    def test_filter_by_tags(self):
+        """Test filtering recipes by tags."""
+        r1 = create_recipe(user=self.user, title='Thai vegetable curry')
+        r2 = create_recipe(user=self.user, title='Aubergine with tahini')
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Vegetarian')
+        r1.tags.add(tag1)
+        r2.tags.add(tag1, tag2)
+        r3 = create_recipe(user=self.user, title='Fish and chips')
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        res = self.client.get(RECIPE_URL, params)
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [r2.id, r1.id])
+        self.assertNotIn(r3.id, ids)
+
+    def test_filter_by_ingredients(self):
+        """Test filtering recipes by ingredients."""
+        r1 = create_recipe(user=self.user, title='Posh beans on toast')
+        r2 = create_recipe(user=self.user, title='Chicken cacciatore')
+        in1 = Ingredient.objects.create(user=self.user, name='Feta cheese')
+        in2 = Ingredient.objects.create(user=self.user, name='Chicken')
+        r1.ingredient.add(in1)
+        r2.ingredient.add(in2)
+        create_recipe(user=self.user, title='Red lentil daal')
+
+        params = {'ingredients': f'{in1.id},{in2.id}'}
+        res = self.client.get(RECIPE_URL, params)
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [r2.id, r1.id])
+
+    def test_filter_by_price_and_time(self):
+        """Test filtering recipes by price and time ranges."""
+        create_recipe(user=self.user, price=Decimal('2.00'), time_minutes=5)
+        match = create_recipe(
+            user=self.user,
+            price=Decimal('6.50'),
+            time_minutes=20,
+        )
+        create_recipe(user=self.user, price=Decimal('6.50'), time_minutes=90)
+        create_recipe(user=self.user, price=Decimal('20.00'), time_minutes=20)
+
+        params = {
+            'price_min': '5',
+            'price_max': '10.00',
+            'time_min': 10,
+            'time_max': 30,
+        }
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [match.id])
+
+    def test_filter_invalid_param(self):
+        """Test malformed filter values are rejected."""
+        for params in [{'tags': '1,a'}, {'price_min': 'cheap'}]:
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
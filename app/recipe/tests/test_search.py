@@ -0,0 +1,121 @@
+"""
+Tests for recipe full-text search.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe.search import parse_terms
+
+SEARCH_URL = reverse('recipe:recipe-search')
+
+
+def create_recipe(user, title, description=''):
+    """Create and return a sample recipe."""
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        description=description,
+        time_minutes=10,
+        price=Decimal('5.00'),
+    )
+
+
+class ParseTermsTests(TestCase):
+    """Test search input parsing."""
+
+    def test_operators_dropped(self):
+        """Test tsquery syntax in user input is reduced to words."""
+        self.assertEqual(
+            parse_terms("spicy & !curry:* | 'x'"),
+            ['spicy', 'curry', 'x'],
+        )
+
+
+class RecipeSearchAPITests(TestCase):
+    """Test the recipe search endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _search(self, text):
+        res = self.client.get(SEARCH_URL, {'q': text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data['results']]
+
+    def test_search_requires_terms(self):
+        """Test a query without words is rejected."""
+        res = self.client.get(SEARCH_URL, {'q': ' &! '})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_matches_all_words_by_prefix(self):
+        """Test every word must match the start of a word."""
+        curry = create_recipe(self.user, 'Thai green curry', 'With chicken')
+        create_recipe(self.user, 'Green salad')
+
+        self.assertEqual(self._search('gree curr'), [curry.id])
+
+    def test_title_matches_rank_first(self):
+        """Test title hits rank above description hits."""
+        in_description = create_recipe(
+            self.user,
+            'Weeknight dinner',
+            'Quick lentil soup for two',
+        )
+        in_title = create_recipe(self.user, 'Lentil soup')
+
+        self.assertEqual(
+            self._search('lentil'),
+            [in_title.id, in_description.id],
+        )
+
+    def test_search_limited_to_user(self):
+        """Test search only returns the authenticated user's recipes."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(other, 'Banana bread')
+        mine = create_recipe(self.user, 'Banana pancakes')
+
+        self.assertEqual(self._search('banana'), [mine.id])
+
+    @skipUnless(connection.vendor == 'postgresql', 'requires PostgreSQL')
+    def test_search_vector_maintained(self):
+        """Test the search vector is refreshed when a recipe changes."""
+        recipe = create_recipe(self.user, 'Porridge')
+        recipe.title = 'Overnight oats'
+        recipe.save()
+
+        self.assertEqual(self._search('oats'), [recipe.id])
+        self.assertEqual(self._search('porridge'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'requires PostgreSQL')
+    def test_search_vector_only_rebuilt_for_text(self):
+        """Test saves leaving title and description skip the trigger."""
+        recipe = create_recipe(self.user, 'Porridge')
+        recipes = Recipe.objects.filter(id=recipe.id)
+
+        recipes.update(search_vector=None)
+        recipes.update(price=Decimal('2.00'), time_minutes=7)
+        recipe.refresh_from_db()
+        recipe.save()
+        self.assertEqual(self._search('porridge'), [])
+
+        recipes.update(description='Warm oats')
+        self.assertEqual(self._search('porridge oats'), [recipe.id])
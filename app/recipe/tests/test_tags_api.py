@@ -2,6 +2,8 @@
 Test for the Tags API.
 """
 
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
@@ -9,7 +11,10 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import (
+    Recipe,
+    Tag,
+)
 
 from recipe.serializers import TagSerializer
 
@@ -58,7 +63,7 @@ class PrivateTagsAPITest(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_retrieve_tags_limited_to_user(self):
         """Test list of tags are limited to authenticate user."""
@@ -70,9 +75,9 @@ class PrivateTagsAPITest(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
 
     def test_update_tag(self):
         """Test updating a tag."""
@@ -103,3 +108,49 @@ class PrivateTagsAPITest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         # tag.refresh_from_db()
         self.assertFalse(Tag.objects.filter(id=tag.id).exists())
+
+    def test_filter_tags_assigned_to_recipes(self):
+        """Test listing tags to those assigned to recipes."""
+        tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        tag2 = Tag.objects.create(user=self.user, name='Lunch')
+        recipe = Recipe.objects.create(
+            title='Green eggs on toast',
+            time_minutes=10,
+            price=Decimal('2.50'),
+            user=self.user,
+        )
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertIn(tag1.id, ids)
+        self.assertNotIn(tag2.id, ids)
+
+    def test_filtered_tags_unique(self):
+        """Test filtered tags returns a unique list."""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Dinner')
+        for title in ['Pancakes', 'Porridge']:
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=Decimal('1.00'),
+                user=self.user,
+            )
+            recipe.tags.add(tag)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_rename_tag_to_existing_name_rejected(self):
+        """Test renaming a tag to a name already in use fails."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        tag = Tag.objects.create(user=self.user, name='Supper')
+
+        res = self.client.patch(tag_detail_url(tag.id), {'name': 'Dinner'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Supper')
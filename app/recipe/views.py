@@ -1,45 +1,349 @@
 """
 View for recipe APIs.
 """
+from drf_spectacular.utils import (
+    extend_schema_view,
+    extend_schema,
+    OpenApiParameter,
+    OpenApiTypes,
+)
+
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext as _
+
 from rest_framework import (
     viewsets,
     mixins,
+    status,
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from core.authentication import CachedTokenAuthentication
+from core.mixins import ReplicaReadMixin
 from core.models import (
     Recipe,
     Tag,
     Ingredient,
 )
+from core.versioning import coalesce_data_changes
 from recipe import serializers
+from recipe.conditional import ConditionalRequestMixin
+from recipe.export import (
+    EXPORT_FORMATS,
+    iter_batched,
+    iter_recipes,
+)
+from recipe.fieldsets import parse_fieldset
+from recipe.filters import (
+    filter_recipes,
+    filter_assigned_only,
+)
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeSearchPagination,
+    NamedObjectCursorPagination,
+)
+from recipe.search import (
+    parse_terms,
+    search_recipes,
+)
+from recipe.optimizers import (
+    only_columns,
+    optimize_queryset,
+)
+from recipe.readers import ValuesListMixin
+
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return, all by default',
+    ),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description=(
+            'Comma separated list of relations returned as objects, all by '
+            'default; the others are returned as lists of IDs'
+        ),
+    ),
+]
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(
+        parameters=FIELDSET_PARAMETERS + [
+            OpenApiParameter(
+                'tags',
+                OpenApiTypes.STR,
+                description='Comma separated list of tag IDs to filter',
+            ),
+            OpenApiParameter(
+                'ingredients',
+                OpenApiTypes.STR,
+                description='Comma separated list of ingredient IDs to filter',
+            ),
+            OpenApiParameter('price_min', OpenApiTypes.DECIMAL),
+            OpenApiParameter('price_max', OpenApiTypes.DECIMAL),
+            OpenApiParameter('time_min', OpenApiTypes.INT),
+            OpenApiParameter('time_max', OpenApiTypes.INT),
+        ]
+    ),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+    search=extend_schema(
+        parameters=FIELDSET_PARAMETERS + [
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description='Words to match against title and description',
+            ),
+        ]
+    ),
+    export=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'output',
+                OpenApiTypes.STR,
+                enum=list(EXPORT_FORMATS),
+                description='Export format, ndjson by default',
+            ),
+        ],
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR},
+    ),
+)
+class RecipeViewSet(ReplicaReadMixin,
+                    ConditionalRequestMixin,
+                    ValuesListMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe APIs."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    bulk_max_items = serializers.BULK_MAX_ITEMS
+    export_chunk_size = 2000
+    export_write_size = 16 * 1024
+    cache_responses = True
+    list_fragments = True
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(
+            user=self.request.user,
+        ).order_by('-id')
+
+        if self.action in ('list', 'search', 'export'):
+            queryset = filter_recipes(queryset, self.request.query_params)
+
+        if self.action in ('list', 'retrieve', 'search'):
+            serializer = self.get_serializer()
+            queryset = optimize_queryset(queryset, serializer)
+            # updated_at keys the fragment cache
+            queryset = only_columns(queryset, serializer, ['updated_at'])
+
+        return queryset
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == 'list':
+        if self.action in ('list', 'search'):
             return serializers.RecipeSerializer
 
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer, narrowed by `fields` and `expand`."""
+        if self.action in ('list', 'retrieve', 'search'):
+            if not hasattr(self, '_fieldset'):
+                self._fieldset = parse_fieldset(
+                    self.request.query_params,
+                    self.get_serializer_class()(),
+                )
+            kwargs.update(self._fieldset)
+        return super().get_serializer(*args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe, answering conditional requests."""
+        return self._conditional(
+            request,
+            self.get_object_validators(request),
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
+
     def perform_create(self, serializer):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
 
+    @action(
+        methods=['GET'],
+        detail=False,
+        pagination_class=RecipeSearchPagination,
+    )
+    def search(self, request):
+        """Search recipes by title and description, best match first."""
+        text = request.query_params.get('q', '')
+        if not parse_terms(text):
+            raise ValidationError({'q': _('Enter at least one search word.')})
+
+        queryset = search_recipes(self.get_queryset(), text)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        """Stream every recipe of the user with tags and ingredients.
+
+        Accepts the list filters. Memory use does not depend on the number
+        of recipes exported.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({
+                'output': _('Expected one of: %(formats)s.')
+                % {'formats': ', '.join(EXPORT_FORMATS)},
+            })
 
-class TagViewSet(mixins.DestroyModelMixin,
+        render, content_type = EXPORT_FORMATS[output]
+        recipes = iter_recipes(self.get_queryset(), self.export_chunk_size)
+        response = StreamingHttpResponse(
+            iter_batched(render(recipes), self.export_write_size),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{output}"'
+        )
+        return response
+
+    def _get_bulk_items(self, request):
+        """Return the list of recipe payloads of a bulk request."""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(_('Expected a non-empty list of recipes.'))
+        if len(items) > self.bulk_max_items:
+            raise ValidationError(
+                _('Send at most %(max)d recipes per request.')
+                % {'max': self.bulk_max_items},
+            )
+        return items
+
+    def _bulk_response(self, recipe_ids, status_code=status.HTTP_200_OK):
+        """Serialize recipes in the order of recipe_ids."""
+        queryset = optimize_queryset(
+            Recipe.objects.filter(id__in=recipe_ids),
+            serializers.RecipeDetailSerializer,
+        )
+        recipes = {recipe.id: recipe for recipe in queryset}
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for recipe_id in recipe_ids],
+            many=True,
+        )
+        return Response(serializer.data, status=status_code)
+
+    @extend_schema(
+        request=serializers.RecipeDetailSerializer(many=True),
+        responses=serializers.RecipeDetailSerializer(many=True),
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk', url_name='bulk')
+    def bulk_create(self, request):
+        """Create many recipes in one transaction.
+
+        Nothing is written unless every recipe is valid; errors are
+        returned as a list aligned with the request.
+        """
+        items = self._get_bulk_items(request)
+        serializer = self.get_serializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save(user=request.user)
+
+        return self._bulk_response(
+            [recipe.id for recipe in recipes],
+            status.HTTP_201_CREATED,
+        )
+
+    @bulk_create.mapping.patch
+    @extend_schema(
+        request=serializers.RecipeDetailSerializer(many=True),
+        responses=serializers.RecipeDetailSerializer(many=True),
+    )
+    def bulk_update(self, request):
+        """Partially update many recipes, each identified by its `id`."""
+        items = self._get_bulk_items(request)
+        ids = [
+            item.get('id') if isinstance(item, dict) else None
+            for item in items
+        ]
+        found = self.get_queryset().in_bulk([
+            recipe_id for recipe_id in ids if isinstance(recipe_id, int)
+        ])
+
+        errors = [{} for _item in items]
+        seen = set()
+        for index, recipe_id in enumerate(ids):
+            if recipe_id not in found:
+                errors[index] = {'id': [_('Recipe not found.')]}
+            elif recipe_id in seen:
+                errors[index] = {'id': [_('Duplicate recipe id.')]}
+            seen.add(recipe_id)
+        if any(errors):
+            raise ValidationError(errors)
+
+        serializer = self.get_serializer(
+            [found[recipe_id] for recipe_id in ids],
+            data=items,
+            many=True,
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return self._bulk_response(ids)
+
+    @bulk_create.mapping.delete
+    @extend_schema(request=serializers.RecipeIdsSerializer)
+    def bulk_destroy(self, request):
+        """Delete the authenticated user's recipes listed in `ids`."""
+        serializer = serializers.RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+
+        queryset = self.get_queryset().filter(id__in=ids)
+        deleted = set(queryset.values_list('id', flat=True))
+        with coalesce_data_changes():
+            queryset.delete()
+
+        return Response({
+            'deleted': [
+                recipe_id for recipe_id in ids if recipe_id in deleted
+            ],
+            'not_found': [
+                recipe_id for recipe_id in ids if recipe_id not in deleted
+            ],
+        })
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'assigned_only',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Filter by items assigned to recipes.',
+            ),
+        ]
+    )
+)
+class TagViewSet(ReplicaReadMixin,
+                 ConditionalRequestMixin,
+                 ValuesListMixin,
+                 mixins.DestroyModelMixin,
                  mixins.UpdateModelMixin,
                  mixins.ListModelMixin,
                  viewsets.GenericViewSet):
@@ -47,15 +351,38 @@ class TagViewSet(mixins.DestroyModelMixin,
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = NamedObjectCursorPagination
 
     def get_queryset(self):
-        """Retrieve recipes for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        """Retrieve tags for authenticated user."""
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = filter_assigned_only(
+                queryset,
+                self.request.query_params,
+                Recipe.tags.through,
+                'tag_id',
+            )
+        return queryset.order_by('-name')
 
 
-class IngredientViewSet(mixins.DestroyModelMixin,
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'assigned_only',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Filter by items assigned to recipes.',
+            ),
+        ]
+    )
+)
+class IngredientViewSet(ReplicaReadMixin,
+                        ConditionalRequestMixin,
+                        ValuesListMixin,
+                        mixins.DestroyModelMixin,
                         mixins.UpdateModelMixin,
                         mixins.ListModelMixin,
                         viewsets.GenericViewSet):
@@ -63,9 +390,18 @@ class IngredientViewSet(mixins.DestroyModelMixin,
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = NamedObjectCursorPagination
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = filter_assigned_only(
+                queryset,
+                self.request.query_params,
+                Recipe.ingredient.through,
+                'ingredient_id',
+            )
+        return queryset.order_by('-name')
@@ -10,8 +10,11 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.instrumentation import TimedRepresentationMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedRepresentationMixin,
+                     serializers.ModelSerializer):
     """Seralizer for the user object."""
 
     class Meta:
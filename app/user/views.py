@@ -2,7 +2,7 @@
 Views for the user API.
 """
 
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
@@ -11,6 +11,8 @@ from rest_framework.settings import api_settings
 
 # from rest_framework.views import APIView
 
+from core.authentication import CachedTokenAuthentication
+from core.mixins import ReplicaReadMixin
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -44,12 +46,15 @@ class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # password hashing releases the GIL, so logins run in parallel on
+    # the async view threads under ASGI
+    async_offload = True
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):